@@ -0,0 +1,58 @@
+import argparse
+import asyncio
+import json
+import sys
+
+from .harness import WORKLOADS, run_load
+from .micro import run_micro
+from .report import check, format_table, load_baseline, save_baseline
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("--suite", choices=["all", "load", "micro"], default="all")
+    parser.add_argument("--workload", action="append", choices=sorted(WORKLOADS), help="repeatable; default: all")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--allocation-requests", type=int, default=50)
+    parser.add_argument("--quick", action="store_true", help="a tenth of the work, for a smoke run")
+    parser.add_argument("--json", dest="json_path", help="also write the results to this file")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--check", action="store_true", help="fail if results regress past the saved baseline")
+    parser.add_argument(
+        "--allow-missing-baseline", action="store_true", help="with --check, only warn when there is no saved baseline"
+    )
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    scale = 0.1 if args.quick else 1.0
+    results: dict[str, dict] = {}
+    if args.suite in ("all", "load"):
+        load = asyncio.run(
+            run_load(
+                args.workload or list(WORKLOADS),
+                max(1, int(args.requests * scale)),
+                args.concurrency,
+                max(1, int(args.allocation_requests * scale)),
+            )
+        )
+        print(format_table(load), end="\n\n")
+        results.update(load)
+    if args.suite in ("all", "micro"):
+        micro = run_micro(scale)
+        print(format_table(micro), end="\n\n")
+        results.update(micro)
+
+    if args.json_path:
+        with open(args.json_path, "w") as fh:
+            json.dump(results, fh, indent=2, sort_keys=True)
+    if args.save_baseline:
+        save_baseline({**(load_baseline() or {}), **results})
+        print("Baseline saved.")
+    if args.check:
+        return check(results, load_baseline(), args.tolerance, args.allow_missing_baseline)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
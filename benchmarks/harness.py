@@ -0,0 +1,191 @@
+import os
+import tempfile
+
+# Settings are read at import time, so the stand-in environment must be in place before any service import.
+BENCH_DIR = tempfile.mkdtemp(prefix="pi-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{BENCH_DIR}/auth.db")
+os.environ.setdefault("MAINTENANCE_ENABLED", "false")
+os.environ.setdefault("MIGRATE_ON_STARTUP", "true")
+os.environ.setdefault("RATE_LIMIT_LOGIN_PER_MINUTE", "1000000000")
+os.environ.setdefault("RATE_LIMIT_REGISTER_PER_MINUTE", "1000000000")
+os.environ.setdefault("RATE_LIMIT_PER_IP", "1000000000")
+os.environ.setdefault("RATE_LIMIT_PER_SUBJECT", "1000000000")
+os.environ.setdefault("RATE_LIMIT_ROUTES", "{}")
+# Both apps get fakeredis injected below; the gateway must not try to reach a real Redis on its own.
+os.environ.pop("REDIS_URL", None)
+
+import asyncio
+import random
+import sys
+import time
+import tracemalloc
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+import fakeredis
+import httpx
+
+from services.auth_service.app import deps
+from services.auth_service.app.main import app as auth_app
+from services.gateway.app import main as gateway_main
+
+from .report import LoadResult
+
+
+PASSWORD = "benchmark-password"
+
+
+@dataclass
+class Apps:
+    auth: httpx.AsyncClient
+    gateway: httpx.AsyncClient
+
+
+@dataclass
+class Session:
+    email: str
+    access_token: str
+    refresh_token: str
+
+    @property
+    def headers(self) -> dict[str, str]:
+        return {"Authorization": f"Bearer {self.access_token}"}
+
+
+async def start_apps() -> Apps:
+    server = fakeredis.FakeServer()
+    deps._redis_client = fakeredis.FakeAsyncRedis(server=server, decode_responses=True)
+    gateway_main.redis_client = fakeredis.FakeAsyncRedis(server=server, decode_responses=True)
+    gateway_main.rate_limiter.redis = gateway_main.redis_client
+    # The gateway's upstream hop, health checks included, goes to the in-process auth app.
+    gateway_main.build_http_client = lambda: httpx.AsyncClient(transport=httpx.ASGITransport(app=auth_app))
+
+    await auth_app.router.startup()
+    await gateway_main.app.router.startup()
+    return Apps(
+        auth=httpx.AsyncClient(transport=httpx.ASGITransport(app=auth_app), base_url="http://auth"),
+        gateway=httpx.AsyncClient(transport=httpx.ASGITransport(app=gateway_main.app), base_url="http://gateway"),
+    )
+
+
+async def stop_apps(apps: Apps) -> None:
+    await apps.auth.aclose()
+    await apps.gateway.aclose()
+    await gateway_main.app.router.shutdown()
+    await auth_app.router.shutdown()
+
+
+async def create_sessions(apps: Apps, count: int) -> list[Session]:
+    sessions = []
+    for index in range(count):
+        email = f"bench-{index}-{random.getrandbits(32):08x}@example.com"
+        await apps.auth.post("/auth/register", json={"email": email, "password": PASSWORD})
+        tokens = (await apps.auth.post("/auth/login", json={"email": email, "password": PASSWORD})).json()
+        sessions.append(Session(email, tokens["access_token"], tokens["refresh_token"]))
+    return sessions
+
+
+Operation = Callable[[Apps, Session], Awaitable[httpx.Response]]
+
+
+async def gateway_me(apps: Apps, session: Session) -> httpx.Response:
+    return await apps.gateway.get("/api/auth/me", headers=session.headers)
+
+
+async def auth_me(apps: Apps, session: Session) -> httpx.Response:
+    return await apps.auth.get("/auth/me", headers=session.headers)
+
+
+async def login(apps: Apps, session: Session) -> httpx.Response:
+    return await apps.auth.post("/auth/login", json={"email": session.email, "password": PASSWORD})
+
+
+async def refresh(apps: Apps, session: Session) -> httpx.Response:
+    response = await apps.auth.post("/auth/refresh", json={"refresh_token": session.refresh_token})
+    if response.status_code == 200:
+        tokens = response.json()
+        session.access_token, session.refresh_token = tokens["access_token"], tokens["refresh_token"]
+    return response
+
+
+async def gateway_refresh(apps: Apps, session: Session) -> httpx.Response:
+    response = await apps.gateway.post("/api/auth/refresh", json={"refresh_token": session.refresh_token})
+    if response.status_code == 200:
+        tokens = response.json()
+        session.access_token, session.refresh_token = tokens["access_token"], tokens["refresh_token"]
+    return response
+
+
+async def gateway_login(apps: Apps, session: Session) -> httpx.Response:
+    return await apps.gateway.post("/api/auth/login", json={"email": session.email, "password": PASSWORD})
+
+
+# A polling-dashboard shaped mix: mostly /me through the gateway, some refreshes, the odd login.
+MIXED_WEIGHTS: list[tuple[Operation, int]] = [(gateway_me, 85), (gateway_refresh, 10), (gateway_login, 5)]
+
+
+async def mixed(apps: Apps, session: Session) -> httpx.Response:
+    operations, weights = zip(*MIXED_WEIGHTS)
+    return await random.choices(operations, weights)[0](apps, session)
+
+
+WORKLOADS: dict[str, Operation] = {
+    "gateway_me": gateway_me,
+    "auth_me": auth_me,
+    "login": login,
+    "refresh": refresh,
+    "mixed": mixed,
+}
+
+
+async def drive(apps: Apps, sessions: list[Session], operation: Operation, total: int) -> tuple[list[float], int, float]:
+    latencies: list[float] = []
+    errors = 0
+    remaining = total
+
+    async def worker(session: Session) -> None:
+        nonlocal errors, remaining
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter_ns()
+            response = await operation(apps, session)
+            latencies.append((time.perf_counter_ns() - started) / 1e6)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(session) for session in sessions))
+    return latencies, errors, time.perf_counter() - started
+
+
+async def measure_allocations(apps: Apps, session: Session, operation: Operation, total: int) -> tuple[float, float]:
+    # Sequential so the traced peak is the working set of a single request, not of the whole batch.
+    await operation(apps, session)
+    tracemalloc.start()
+    try:
+        peaks = []
+        blocks_before = sys.getallocatedblocks()
+        for _ in range(total):
+            baseline = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            await operation(apps, session)
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+        retained = sys.getallocatedblocks() - blocks_before
+    finally:
+        tracemalloc.stop()
+    return sum(peaks) / len(peaks) / 1024, retained / total
+
+
+async def run_load(names: list[str], requests: int, concurrency: int, allocation_requests: int) -> dict[str, dict]:
+    apps = await start_apps()
+    try:
+        results = {}
+        for name in names:
+            operation = WORKLOADS[name]
+            sessions = await create_sessions(apps, concurrency)
+            latencies, errors, seconds = await drive(apps, sessions, operation, requests)
+            peak_kib, retained_blocks = await measure_allocations(apps, sessions[0], operation, allocation_requests)
+            results[name] = LoadResult(name, requests, errors, seconds, latencies, peak_kib, retained_blocks).as_dict()
+        return results
+    finally:
+        await stop_apps(apps)
@@ -0,0 +1,69 @@
+import asyncio
+import time
+from collections.abc import Callable
+
+import fakeredis
+
+from services.auth_service.app.rate_limit import SCRIPTS, RedisRateLimiter
+from services.auth_service.app.security import create_access_token, hash_password
+from services.gateway.app.security import decode_access_token, token_verifier
+
+
+def _best_ns_per_op(run: Callable[[int], float], iterations: int, repeats: int) -> float:
+    return min(run(iterations) for _ in range(repeats)) / iterations
+
+
+def _timed(fn: Callable[[], object]) -> Callable[[int], float]:
+    def run(iterations: int) -> float:
+        started = time.perf_counter_ns()
+        for _ in range(iterations):
+            fn()
+        return time.perf_counter_ns() - started
+
+    return run
+
+
+def _timed_async(fn, loop: asyncio.AbstractEventLoop) -> Callable[[int], float]:
+    async def batch(iterations: int) -> float:
+        started = time.perf_counter_ns()
+        for _ in range(iterations):
+            await fn()
+        return time.perf_counter_ns() - started
+
+    return lambda iterations: loop.run_until_complete(batch(iterations))
+
+
+def run_micro(scale: float = 1.0, repeats: int = 5) -> dict[str, dict]:
+    header = f"Bearer {create_access_token('bench-user', role='user')}"
+
+    def decode_uncached():
+        token_verifier.cache.clear()
+        decode_access_token(header)
+
+    cases: dict[str, tuple[Callable[[int], float], int]] = {
+        "decode_access_token_cached": (_timed(lambda: decode_access_token(header)), 20_000),
+        "decode_access_token_uncached": (_timed(decode_uncached), 5_000),
+        "hash_password": (_timed(lambda: hash_password("benchmark-password")), 20),
+    }
+
+    loop = asyncio.new_event_loop()
+    try:
+        redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+        for algorithm in SCRIPTS:
+            limiter = RedisRateLimiter(redis, algorithm)
+            # Keys rotate so the limiter keeps admitting instead of benchmarking the reject path.
+            counter = iter(range(10**12))
+
+            def enforce(limiter=limiter, counter=counter):
+                return limiter.enforce(f"bench:{next(counter) % 1000}", 1000, 60)
+
+            cases[f"rate_limit_enforce_{algorithm}"] = (_timed_async(enforce, loop), 500)
+
+        results = {}
+        for name, (run, iterations) in cases.items():
+            iterations = max(1, int(iterations * scale))
+            ns_per_op = _best_ns_per_op(run, iterations, repeats)
+            results[name] = {"ns_per_op": round(ns_per_op), "ops_per_sec": round(1e9 / ns_per_op, 1)}
+        return results
+    finally:
+        loop.close()
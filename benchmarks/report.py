@@ -0,0 +1,97 @@
+import json
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+
+# Metrics where a larger value is a regression; everything else compared is "higher is better".
+LOWER_IS_BETTER = {"p50_ms", "p95_ms", "p99_ms", "ns_per_op"}
+COMPARED_METRICS = {"rps", "p95_ms", "p99_ms", "ns_per_op"}
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+@dataclass
+class LoadResult:
+    name: str
+    requests: int
+    errors: int
+    seconds: float
+    latencies_ms: list[float] = field(repr=False)
+    peak_kib_per_request: float = 0.0
+    retained_blocks_per_request: float = 0.0
+
+    def as_dict(self) -> dict:
+        latencies = sorted(self.latencies_ms)
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "rps": round(self.requests / self.seconds, 1) if self.seconds else 0.0,
+            "p50_ms": round(percentile(latencies, 50), 3),
+            "p95_ms": round(percentile(latencies, 95), 3),
+            "p99_ms": round(percentile(latencies, 99), 3),
+            "peak_kib_per_request": round(self.peak_kib_per_request, 1),
+            "retained_blocks_per_request": round(self.retained_blocks_per_request, 2),
+        }
+
+
+def compare(results: dict[str, dict], baseline: dict[str, dict], tolerance: float) -> list[str]:
+    regressions = []
+    for name, metrics in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        for metric in COMPARED_METRICS & metrics.keys() & expected.keys():
+            current, reference = metrics[metric], expected[metric]
+            if not reference:
+                continue
+            if metric in LOWER_IS_BETTER:
+                regressed = current > reference * (1 + tolerance)
+            else:
+                regressed = current < reference * (1 - tolerance)
+            if regressed:
+                regressions.append(f"{name}.{metric}: {current} vs baseline {reference} (tolerance {tolerance:.0%})")
+    return regressions
+
+
+def check(results: dict[str, dict], baseline: dict[str, dict] | None, tolerance: float, allow_missing: bool = False) -> int:
+    if baseline is None:
+        if allow_missing:
+            print("WARNING: no saved baseline, nothing was checked.", file=sys.stderr)
+            return 0
+        # A CI gate that silently passes without a baseline would never catch anything.
+        print(
+            "ERROR: no saved baseline to check against; run with --save-baseline first "
+            "or pass --allow-missing-baseline.",
+            file=sys.stderr,
+        )
+        return 2
+    regressions = compare(results, baseline, tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+def load_baseline(path: Path = BASELINE_PATH) -> dict[str, dict] | None:
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())
+
+
+def save_baseline(results: dict[str, dict], path: Path = BASELINE_PATH) -> None:
+    path.write_text(json.dumps(results, indent=2, sort_keys=True) + "\n")
+
+
+def format_table(results: dict[str, dict]) -> str:
+    columns = sorted({metric for metrics in results.values() for metric in metrics})
+    rows = [["benchmark", *columns]]
+    rows += [[name, *(str(metrics.get(column, "")) for column in columns)] for name, metrics in results.items()]
+    widths = [max(len(row[index]) for row in rows) for index in range(len(rows[0]))]
+    return "\n".join("  ".join(cell.ljust(width) for cell, width in zip(row, widths)) for row in rows)
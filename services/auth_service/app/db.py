@@ -1,17 +1,71 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import declarative_base, sessionmaker
+from collections.abc import AsyncGenerator
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base
 
 from .config import settings
+from .metrics import TimedQueuePool
+from .tracing import tracer
+
+
+def _engine_options() -> dict:
+    options: dict = {"pool_pre_ping": True}
+    if settings.database_url.startswith("postgresql"):
+        options.update(
+            poolclass=TimedQueuePool,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_recycle=settings.db_pool_recycle_seconds,
+            pool_timeout=settings.db_pool_timeout_seconds,
+            connect_args={"options": f"-c statement_timeout={settings.db_statement_timeout_ms}"},
+        )
+    return options
+
+
+def _start_statement_span(conn, cursor, statement, parameters, context, executemany) -> None:
+    # Statements run inside SQLAlchemy's greenlet, which carries the request's contextvars.
+    if tracer.current_context() is not None:
+        context._trace_span = tracer.start_span(
+            "db.query",
+            "client",
+            attributes={"db.system": conn.dialect.name, "db.statement": statement[:500], "db.executemany": executemany},
+        )
+
+
+def _end_statement_span(conn, cursor, statement, parameters, context, executemany) -> None:
+    tracer.end_span(getattr(context, "_trace_span", None))
 
 
-engine = create_engine(settings.database_url, pool_pre_ping=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def _fail_statement_span(exception_context) -> None:
+    tracer.end_span(
+        getattr(exception_context.execution_context, "_trace_span", None), exception_context.original_exception
+    )
+
+
+def _trace_statements(engine: AsyncEngine) -> None:
+    event.listen(engine.sync_engine, "before_cursor_execute", _start_statement_span)
+    event.listen(engine.sync_engine, "after_cursor_execute", _end_statement_span)
+    event.listen(engine.sync_engine, "handle_error", _fail_statement_span)
+
+
+# Bound to the engine on first get_engine(), so importing the app loads no DB driver and opens no pool.
+SessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False)
 Base = declarative_base()
+_engine: AsyncEngine | None = None
+
+
+def get_engine() -> AsyncEngine:
+    global _engine
+    if _engine is None:
+        _engine = create_async_engine(settings.database_url, **_engine_options())
+        if tracer.enabled:
+            _trace_statements(_engine)
+        SessionLocal.configure(bind=_engine)
+    return _engine
 
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
+    get_engine()
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
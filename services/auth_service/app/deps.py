@@ -1,40 +1,144 @@
-from collections.abc import Generator
+import hmac
+import logging
+from collections.abc import AsyncGenerator
 
-from fastapi import Depends, HTTPException, Request, status
+from fastapi import Depends, Header, HTTPException, Request, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from redis.asyncio import Redis
-from sqlalchemy.orm import Session
+from redis.exceptions import RedisError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from .config import settings
 from .db import get_db
+from .hashing import PasswordHasher, build_password_hasher
+from .metrics import InstrumentedRedis
 from .models import User
 from .rate_limit import RedisRateLimiter
 from .security import decode_token
+from .services.introspection import TokenIntrospector
+from .services.refresh_tokens import RefreshTokenStore, build_refresh_token_store
+from .services.revocation import RevocationPublisher
+from .services.user_cache import UserSnapshot, UserSnapshotCache
 
 
+logger = logging.getLogger(__name__)
+
 bearer_scheme = HTTPBearer(auto_error=False)
 _redis_client: Redis | None = None
+_user_cache: UserSnapshotCache | None = None
+_password_hasher: PasswordHasher | None = None
+_refresh_token_store: RefreshTokenStore | None = None
+_revocation_publisher: RevocationPublisher | None = None
+_rate_limiter: RedisRateLimiter | None = None
+_token_introspector: TokenIntrospector | None = None
 
 
 def get_redis() -> Redis:
     global _redis_client
     if _redis_client is None:
-        _redis_client = Redis.from_url(settings.redis_url, decode_responses=True)
+        _redis_client = InstrumentedRedis.from_url(
+            settings.redis_url,
+            decode_responses=True,
+            max_connections=settings.redis_max_connections,
+            socket_timeout=settings.redis_socket_timeout_seconds,
+            socket_connect_timeout=settings.redis_socket_connect_timeout_seconds,
+            health_check_interval=settings.redis_health_check_interval_seconds,
+        )
     return _redis_client
 
 
-def get_rate_limiter(redis: Redis = Depends(get_redis)) -> RedisRateLimiter:
-    return RedisRateLimiter(redis)
+def get_user_cache() -> UserSnapshotCache:
+    global _user_cache
+    if _user_cache is None:
+        _user_cache = UserSnapshotCache(
+            get_redis(),
+            max_size=settings.user_cache_size,
+            ttl_seconds=settings.user_cache_ttl_seconds,
+            redis_ttl_seconds=settings.user_cache_redis_ttl_seconds,
+        )
+    return _user_cache
+
+
+def get_password_hasher() -> PasswordHasher:
+    global _password_hasher
+    if _password_hasher is None:
+        _password_hasher = build_password_hasher()
+    return _password_hasher
+
+
+def get_refresh_token_store() -> RefreshTokenStore:
+    global _refresh_token_store
+    if _refresh_token_store is None:
+        _refresh_token_store = build_refresh_token_store(
+            settings.refresh_token_store, get_redis(), settings.refresh_token_sql_mirror
+        )
+    return _refresh_token_store
+
+
+def get_revocation_publisher() -> RevocationPublisher:
+    global _revocation_publisher
+    if _revocation_publisher is None:
+        _revocation_publisher = RevocationPublisher(
+            get_redis(), settings.access_token_minutes * 60, settings.refresh_token_days * 86400
+        )
+    return _revocation_publisher
+
+
+def get_rate_limiter() -> RedisRateLimiter:
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = RedisRateLimiter(
+            get_redis(),
+            settings.rate_limit_algorithm,
+            timeout_seconds=settings.rate_limit_redis_timeout_seconds,
+            failure_threshold=settings.rate_limit_breaker_failure_threshold,
+            reset_seconds=settings.rate_limit_breaker_reset_seconds,
+        )
+    return _rate_limiter
+
+
+def get_token_introspector() -> TokenIntrospector:
+    global _token_introspector
+    if _token_introspector is None:
+        _token_introspector = TokenIntrospector(
+            get_revocation_publisher(), get_user_cache(), max_size=settings.introspection_cache_size
+        )
+    return _token_introspector
+
+
+def require_introspection_client(x_introspection_key: str | None = Header(None)) -> None:
+    if x_introspection_key is None or not any(
+        hmac.compare_digest(x_introspection_key, key) for key in settings.introspection_api_keys
+    ):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid introspection key")
+
+
+async def load_user_snapshot(db: AsyncSession, user_cache: UserSnapshotCache, user_id: str | None) -> UserSnapshot | None:
+    if not user_id:
+        return None
+    snapshot = await user_cache.get(user_id)
+    if snapshot is None:
+        version = await user_cache.version([user_id])
+        # The session only checks out a connection here, on a cache miss.
+        user = await db.scalar(select(User).where(User.id == user_id))
+        if not user:
+            return None
+        snapshot = UserSnapshot.from_user(user)
+        await user_cache.put(snapshot, version)
+    return snapshot
 
 
 def _unauthorized() -> HTTPException:
     return HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or missing token")
 
 
-def get_current_user(
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials | None = Depends(bearer_scheme),
-    db: Session = Depends(get_db),
-) -> User:
+    db: AsyncSession = Depends(get_db),
+    user_cache: UserSnapshotCache = Depends(get_user_cache),
+    revocations: RevocationPublisher = Depends(get_revocation_publisher),
+) -> UserSnapshot:
     if credentials is None:
         raise _unauthorized()
 
@@ -46,15 +150,25 @@ def get_current_user(
     if payload.get("type") != "access":
         raise _unauthorized()
 
-    user = db.query(User).filter(User.id == payload.get("sub")).first()
-    if not user or not user.is_active:
+    try:
+        revoked = await revocations.is_revoked(payload)
+    except RedisError:
+        # Same trade-off as the rate limiter: a Redis outage must not take every authenticated route down.
+        # Deactivation still applies, since user status comes from the snapshot below.
+        logger.warning("Revocation state unavailable; accepting token on signature and user status", exc_info=True)
+        revoked = False
+    if revoked:
+        raise _unauthorized()
+
+    snapshot = await load_user_snapshot(db, user_cache, payload.get("sub"))
+    if not snapshot or not snapshot.is_active:
         raise _unauthorized()
 
-    return user
+    return snapshot
 
 
 def require_roles(*roles: str):
-    def checker(user: User = Depends(get_current_user)) -> User:
+    def checker(user: UserSnapshot = Depends(get_current_user)) -> UserSnapshot:
         if user.role not in roles:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient role")
         return user
@@ -66,5 +180,6 @@ def get_client_ip(request: Request) -> str:
     return request.client.host if request.client else "unknown"
 
 
-def db_session() -> Generator[Session, None, None]:
-    yield from get_db()
+async def db_session() -> AsyncGenerator[AsyncSession, None]:
+    async for db in get_db():
+        yield db
@@ -0,0 +1,59 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+from .config import settings
+from .security import hash_password, verify_and_update_password
+from .tracing import tracer
+
+
+class HashPoolSaturated(Exception):
+    pass
+
+
+class PasswordHasher:
+    def __init__(self, executor: Executor, max_pending: int):
+        self.executor = executor
+        self.max_pending = max_pending
+        self.pending = 0
+
+    async def _run(self, span_name: str, func, *args):
+        if self.pending >= self.max_pending:
+            raise HashPoolSaturated("Password hashing pool is saturated")
+        self.pending += 1
+        try:
+            with tracer.span(span_name, attributes={"hash.pending": self.pending}):
+                return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+        finally:
+            self.pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run("password.hash", hash_password, password)
+
+    async def verify_and_update(self, password: str, password_hash: str) -> tuple[bool, str | None]:
+        return await self._run("password.verify", verify_and_update_password, password, password_hash)
+
+    async def hash_many(self, passwords: list[str], concurrency: int) -> list[str]:
+        # Bulk work skips the max_pending guard but only keeps `concurrency` jobs queued at a time,
+        # so interactive logins still get pool slots between them.
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def hash_one(password: str) -> str:
+            async with semaphore:
+                return await loop.run_in_executor(self.executor, hash_password, password)
+
+        with tracer.span("password.hash_many", attributes={"hash.count": len(passwords)}):
+            return await asyncio.gather(*(hash_one(password) for password in passwords))
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def build_password_hasher() -> PasswordHasher:
+    # hashlib's PBKDF2 releases the GIL, so threads already run hashes in parallel;
+    # the process executor is there for schemes that do not.
+    if settings.password_hash_executor == "process":
+        executor: Executor = ProcessPoolExecutor(max_workers=settings.password_hash_workers)
+    else:
+        executor = ThreadPoolExecutor(max_workers=settings.password_hash_workers, thread_name_prefix="password-hash")
+    return PasswordHasher(executor, settings.password_hash_max_pending)
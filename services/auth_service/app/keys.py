@@ -0,0 +1,92 @@
+import logging
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+
+from .config import settings
+
+
+logger = logging.getLogger(__name__)
+
+SYMMETRIC_ALGORITHMS = {"HS256", "HS384", "HS512"}
+
+
+@dataclass(frozen=True)
+class SigningKey:
+    kid: str
+    algorithm: str
+    private_key: object
+
+    def public_jwk(self) -> dict:
+        jwk = jwt.get_algorithm_by_name(self.algorithm).to_jwk(self.private_key.public_key(), as_dict=True)
+        return {**jwk, "kid": self.kid, "alg": self.algorithm, "use": "sig"}
+
+
+def generate_private_key(algorithm: str):
+    if algorithm.startswith(("RS", "PS")):
+        return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    if algorithm == "ES256":
+        return ec.generate_private_key(ec.SECP256R1())
+    if algorithm == "EdDSA":
+        return ed25519.Ed25519PrivateKey.generate()
+    raise ValueError(f"Unsupported signing algorithm: {algorithm}")
+
+
+class KeyRing:
+    def __init__(self, algorithm: str, secret: str | None = None, keys: list[SigningKey] | None = None, active_kid: str | None = None):
+        self.algorithm = algorithm
+        self.secret = secret
+        self.keys = {key.kid: key for key in keys or []}
+        self._public_keys = {key.kid: key.private_key.public_key() for key in self.keys.values()}
+        self.active = self.keys.get(active_kid) if active_kid else None
+        if algorithm not in SYMMETRIC_ALGORITHMS and self.active is None:
+            raise ValueError(f"Active signing key {active_kid!r} not found")
+        self._decoder = jwt.PyJWT()
+
+    @property
+    def symmetric(self) -> bool:
+        return self.algorithm in SYMMETRIC_ALGORITHMS
+
+    def sign(self, payload: dict) -> str:
+        if self.symmetric:
+            return jwt.encode(payload, self.secret, algorithm=self.algorithm)
+        return jwt.encode(payload, self.active.private_key, algorithm=self.algorithm, headers={"kid": self.active.kid})
+
+    def decode(self, token: str) -> dict:
+        if self.symmetric:
+            return self._decoder.decode(token, self.secret, algorithms=[self.algorithm])
+        public_key = self._public_keys.get(jwt.get_unverified_header(token).get("kid"))
+        if public_key is None:
+            raise jwt.InvalidTokenError("Unknown signing key")
+        return self._decoder.decode(token, public_key, algorithms=[self.algorithm])
+
+    def jwks(self) -> dict:
+        return {"keys": [key.public_jwk() for key in self.keys.values()]}
+
+
+def load_key_ring() -> KeyRing:
+    if settings.jwt_algorithm in SYMMETRIC_ALGORITHMS:
+        return KeyRing(settings.jwt_algorithm, secret=settings.jwt_secret)
+
+    if not settings.jwt_keys_dir:
+        logger.warning("JWT_KEYS_DIR is not set; signing with an ephemeral %s key", settings.jwt_algorithm)
+        key = SigningKey("ephemeral", settings.jwt_algorithm, generate_private_key(settings.jwt_algorithm))
+        return KeyRing(settings.jwt_algorithm, keys=[key], active_kid=key.kid)
+
+    # Every <kid>.pem in the directory is published and accepted; JWT_ACTIVE_KID picks the signer.
+    # Rotation: add the new key, let verifiers pick it up from JWKS, switch the active kid, then
+    # remove the old file once the longest-lived token signed with it has expired.
+    keys = [
+        SigningKey(path.stem, settings.jwt_algorithm, serialization.load_pem_private_key(path.read_bytes(), password=None))
+        for path in sorted(Path(settings.jwt_keys_dir).glob("*.pem"))
+    ]
+    return KeyRing(settings.jwt_algorithm, keys=keys, active_kid=settings.jwt_active_kid)
+
+
+@lru_cache
+def get_key_ring() -> KeyRing:
+    return load_key_ring()
@@ -1,16 +1,114 @@
-from fastapi import FastAPI
+import asyncio
+import contextlib
 
+from fastapi import FastAPI, Request
+from fastapi.responses import ORJSONResponse
+
+from .compression import CompressionMiddleware
 from .config import settings
-from .db import Base, engine
+from .db import SessionLocal, get_engine
+from .deps import get_password_hasher, get_rate_limiter, get_token_introspector, get_user_cache
+from .hashing import HashPoolSaturated
+from .keys import get_key_ring
+from .metrics import HTTP_REQUEST_SECONDS, MetricsMiddleware, metrics_response, register_scrape_metric
 from .routers import admin, auth
+from .services.audit import audit_writer
+from .migrations import migrate
+from .readiness import readiness
+from .services.maintenance import run_maintenance_loop
+from .tracing import TracingMiddleware, tracer
+
 
+app = FastAPI(title=settings.app_name, version="0.1.0", default_response_class=ORJSONResponse)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.compression_minimum_size,
+    gzip_level=settings.compression_gzip_level,
+    brotli_quality=settings.compression_brotli_quality,
+)
+app.add_middleware(MetricsMiddleware, histogram=HTTP_REQUEST_SECONDS)
+app.add_middleware(TracingMiddleware, tracer=tracer)
 
-app = FastAPI(title=settings.app_name, version="0.1.0")
+register_scrape_metric(
+    "auth_user_cache_requests",
+    "User snapshot cache lookups.",
+    "counter",
+    ["result"],
+    lambda: {("hit",): get_user_cache().hits, ("miss",): get_user_cache().misses},
+)
+register_scrape_metric(
+    "auth_introspection_cache_requests",
+    "Token introspection lookups answered from the per-jti cache.",
+    "counter",
+    ["result"],
+    lambda: {("hit",): get_token_introspector().hits, ("miss",): get_token_introspector().misses},
+)
+register_scrape_metric(
+    "auth_password_hash_pending",
+    "Password hash/verify jobs queued or running in the hash pool.",
+    "gauge",
+    [],
+    lambda: {(): get_password_hasher().pending},
+)
+register_scrape_metric(
+    "auth_rate_limit_degraded",
+    "1 while rate limiting runs on the in-process fallback because Redis is failing.",
+    "gauge",
+    [],
+    lambda: {(): int(get_rate_limiter().degraded)},
+)
+register_scrape_metric(
+    "auth_db_pool_checked_out",
+    "DB connections currently checked out of the pool.",
+    "gauge",
+    [],
+    lambda: {(): get_engine().pool.checkedout()} if hasattr(get_engine().pool, "checkedout") else {},
+)
+register_scrape_metric(
+    "auth_audit_queue_depth",
+    "Audit events waiting for the batch writer.",
+    "gauge",
+    [],
+    lambda: {(): audit_writer.queue.qsize()} if audit_writer.queue is not None else {},
+)
+register_scrape_metric(
+    "auth_audit_events_dropped",
+    "Audit events dropped by the overflow policy.",
+    "counter",
+    [],
+    lambda: {(): audit_writer.dropped},
+)
 
 
 @app.on_event("startup")
-def on_startup() -> None:
-    Base.metadata.create_all(bind=engine)
+async def on_startup() -> None:
+    engine = get_engine()
+    # Schema changes normally run out of band (python -m services.auth_service.app.migrations) before rollout.
+    if settings.migrate_on_startup:
+        await migrate(engine)
+    audit_writer.start()
+    app.state.background_tasks = [
+        asyncio.create_task(readiness.run_warm_up()),
+        asyncio.create_task(get_user_cache().listen_for_invalidations()),
+    ]
+    if settings.maintenance_enabled:
+        app.state.background_tasks.append(
+            asyncio.create_task(run_maintenance_loop(SessionLocal, settings.maintenance_interval_seconds))
+        )
+
+
+@app.on_event("shutdown")
+async def on_shutdown() -> None:
+    readiness.draining = True
+    for task in app.state.background_tasks:
+        task.cancel()
+    for task in app.state.background_tasks:
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+    get_password_hasher().shutdown()
+    await audit_writer.stop(settings.audit_drain_timeout_seconds)
+    tracer.shutdown()
+    await get_engine().dispose()
 
 
 @app.get("/health")
@@ -18,5 +116,29 @@ def health() -> dict:
     return {"status": "ok", "service": "auth"}
 
 
+@app.get("/ready")
+async def ready() -> ORJSONResponse:
+    is_ready, checks = await readiness.status()
+    return ORJSONResponse(
+        status_code=200 if is_ready else 503,
+        content={"status": "ready" if is_ready else "not_ready", "service": "auth", "checks": checks},
+    )
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return metrics_response()
+
+
+@app.get("/.well-known/jwks.json")
+def jwks() -> ORJSONResponse:
+    return ORJSONResponse(get_key_ring().jwks(), headers={"Cache-Control": "public, max-age=300"})
+
+
+@app.exception_handler(HashPoolSaturated)
+async def hash_pool_saturated_handler(_: Request, exc: HashPoolSaturated):
+    return ORJSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
+
 app.include_router(auth.router)
 app.include_router(admin.router)
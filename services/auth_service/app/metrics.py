@@ -0,0 +1,45 @@
+import time
+
+from prometheus_client import Counter, Histogram
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from services.common import metrics as common
+from services.common.metrics import (  # noqa: F401  (re-exported for this service's modules)
+    FAST_BUCKETS,
+    LATENCY_BUCKETS,
+    MetricsMiddleware,
+    metrics_response,
+    register_scrape_metric,
+)
+
+from .tracing import tracer
+
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "auth_http_request_duration_seconds",
+    "Request latency by route template.",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+DB_POOL_WAIT_SECONDS = Histogram(
+    "auth_db_pool_wait_seconds", "Time spent waiting for a pooled DB connection.", buckets=FAST_BUCKETS
+)
+REDIS_COMMAND_SECONDS = Histogram(
+    "auth_redis_command_duration_seconds", "Redis round-trip latency.", ["command"], buckets=FAST_BUCKETS
+)
+RATE_LIMIT_REJECTED = Counter("auth_rate_limit_rejected_total", "Requests rejected by the rate limiter.", ["bucket"])
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    def _do_get(self):
+        # _do_get is where QueuePool blocks when every connection is checked out.
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_WAIT_SECONDS.observe(time.perf_counter() - started)
+
+
+class InstrumentedRedis(common.InstrumentedRedis):
+    command_seconds = REDIS_COMMAND_SECONDS
+    tracer = tracer
@@ -0,0 +1,191 @@
+import argparse
+import asyncio
+import logging
+import sys
+from collections.abc import Awaitable, Callable
+from datetime import datetime
+from typing import NamedTuple
+
+from sqlalchemy import inspect, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from . import models  # noqa: F401  (registers the tables on Base.metadata)
+from .config import settings
+from .db import Base, get_engine
+from .services.maintenance import create_partitioned_audit_table
+
+
+logger = logging.getLogger(__name__)
+
+VERSION_TABLE = "schema_migrations"
+
+
+async def _initial_schema(conn: AsyncConnection) -> None:
+    # Baseline: a no-op on databases that predate versioned migrations, since create_all skips existing
+    # tables. Later migrations must spell out their DDL instead of relying on the current models.
+    if settings.audit_partitioning and conn.dialect.name == "postgresql":
+        await create_partitioned_audit_table(conn)
+    await conn.run_sync(Base.metadata.create_all)
+
+
+async def _refresh_token_revoked_at(conn: AsyncConnection) -> None:
+    # Databases created by the baseline after this column was added already have it.
+    columns = await conn.run_sync(
+        lambda sync_conn: {column["name"] for column in inspect(sync_conn).get_columns("refresh_tokens")}
+    )
+    if "revoked_at" not in columns:
+        await conn.execute(text("ALTER TABLE refresh_tokens ADD COLUMN revoked_at TIMESTAMP"))
+        await conn.execute(text("CREATE INDEX ix_refresh_tokens_revoked_at ON refresh_tokens (revoked_at)"))
+    # When older rows were revoked is unknown; starting their retention now errs on the side of keeping them.
+    await conn.execute(
+        text("UPDATE refresh_tokens SET revoked_at = :now WHERE revoked = :revoked AND revoked_at IS NULL"),
+        {"now": datetime.utcnow(), "revoked": True},
+    )
+
+
+async def _refresh_token_family_id(conn: AsyncConnection) -> None:
+    # Rows from before token families keep NULL: _family() treats such a token as its own family, and the
+    # tokens rotated from it carry its jti, so a full-table backfill would buy nothing.
+    columns = await conn.run_sync(
+        lambda sync_conn: {column["name"] for column in inspect(sync_conn).get_columns("refresh_tokens")}
+    )
+    if "family_id" not in columns:
+        await conn.execute(text("ALTER TABLE refresh_tokens ADD COLUMN family_id VARCHAR(64)"))
+
+
+async def _create_index(conn: AsyncConnection, name: str, table: str, columns: str, include: str = "") -> None:
+    if conn.dialect.name != "postgresql":
+        await conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})"))
+        return
+    valid = await conn.scalar(text("SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"), {"name": name})
+    if valid:
+        return
+    if valid is False:
+        # Left behind by an interrupted CONCURRENTLY build; IF NOT EXISTS would keep the unusable index.
+        await conn.execute(text(f"DROP INDEX CONCURRENTLY {name}"))
+    # Partitioned tables cannot build an index concurrently; theirs come with the partitioned DDL anyway.
+    partitioned = await conn.scalar(
+        text("SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass(:table)"), {"table": table}
+    )
+    concurrently = "" if partitioned else " CONCURRENTLY"
+    include = f" INCLUDE ({include})" if include else ""
+    await conn.execute(text(f"CREATE INDEX{concurrently} IF NOT EXISTS {name} ON {table} ({columns}){include}"))
+
+
+async def _keyset_and_history_indexes(conn: AsyncConnection) -> None:
+    await _create_index(conn, "ix_refresh_tokens_family_id", "refresh_tokens", "family_id")
+    await _create_index(conn, "ix_users_created_at_id", "users", "created_at, id")
+    await _create_index(conn, "ix_audit_events_created_at_id", "audit_events", "created_at, id")
+    await _create_index(
+        conn, "ix_audit_events_user_created", "audit_events", "user_id, created_at DESC, id DESC", "action, ip_address"
+    )
+    # Superseded by ix_audit_events_user_created, which leads with user_id.
+    concurrently = " CONCURRENTLY" if conn.dialect.name == "postgresql" else ""
+    await conn.execute(text(f"DROP INDEX{concurrently} IF EXISTS ix_audit_events_user_id"))
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    apply: Callable[[AsyncConnection], Awaitable[None]]
+    # On Postgres a non-transactional step runs in autocommit mode, so it can build indexes CONCURRENTLY
+    # without blocking writes; it has to be safe to re-run after a partial failure.
+    transactional: bool = True
+
+
+MIGRATIONS: list[Migration] = [
+    Migration(1, "initial_schema", _initial_schema),
+    Migration(2, "refresh_token_revoked_at", _refresh_token_revoked_at),
+    Migration(3, "refresh_token_family_id", _refresh_token_family_id),
+    Migration(4, "keyset_and_history_indexes", _keyset_and_history_indexes, transactional=False),
+]
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+async def current_version(conn: AsyncConnection) -> int:
+    has_table = await conn.run_sync(lambda sync_conn: sync_conn.dialect.has_table(sync_conn, VERSION_TABLE))
+    if not has_table:
+        return 0
+    return await conn.scalar(text(f"SELECT COALESCE(MAX(version), 0) FROM {VERSION_TABLE}"))
+
+
+async def _record(conn: AsyncConnection, migration: Migration) -> None:
+    await conn.execute(
+        text(f"INSERT INTO {VERSION_TABLE} (version, name) VALUES (:version, :name)"),
+        {"version": migration.version, "name": migration.name},
+    )
+
+
+async def _apply(engine: AsyncEngine, migration: Migration) -> None:
+    logger.info("Applying migration %04d_%s", migration.version, migration.name)
+    if migration.transactional or engine.dialect.name != "postgresql":
+        async with engine.begin() as conn:
+            await migration.apply(conn)
+            await _record(conn, migration)
+        return
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await migration.apply(conn)
+        await _record(conn, migration)
+
+
+async def _migrate(engine: AsyncEngine) -> list[int]:
+    async with engine.begin() as conn:
+        await conn.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {VERSION_TABLE} "
+                "(version INTEGER PRIMARY KEY, name VARCHAR(200) NOT NULL, "
+                "applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP)"
+            )
+        )
+        version = await current_version(conn)
+    applied = []
+    # Each step commits on its own, so a failure keeps the steps before it and a re-run resumes there.
+    for migration in MIGRATIONS:
+        if migration.version > version:
+            await _apply(engine, migration)
+            applied.append(migration.version)
+    return applied
+
+
+async def migrate(engine: AsyncEngine) -> list[int]:
+    if engine.dialect.name != "postgresql":
+        return await _migrate(engine)
+    # Replicas started together may all run the migrate command; only one applies each step. The lock is
+    # session-level on an autocommit connection: an open transaction here would stall CREATE INDEX CONCURRENTLY.
+    async with engine.connect() as lock_conn:
+        lock_conn = await lock_conn.execution_options(isolation_level="AUTOCOMMIT")
+        await lock_conn.execute(text("SELECT pg_advisory_lock(hashtext(:name))"), {"name": VERSION_TABLE})
+        try:
+            return await _migrate(engine)
+        finally:
+            await lock_conn.execute(text("SELECT pg_advisory_unlock(hashtext(:name))"), {"name": VERSION_TABLE})
+
+
+async def _main(check: bool) -> int:
+    engine = get_engine()
+    try:
+        if check:
+            async with engine.connect() as conn:
+                version = await current_version(conn)
+            print(f"schema version {version}, latest {LATEST_VERSION}")
+            return 0 if version >= LATEST_VERSION else 1
+        applied = await migrate(engine)
+        print(f"applied {applied}" if applied else f"schema already at version {LATEST_VERSION}")
+        return 0
+    finally:
+        await engine.dispose()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m services.auth_service.app.migrations", description="Apply auth_service schema migrations."
+    )
+    parser.add_argument("--check", action="store_true", help="exit 1 if migrations are pending, apply nothing")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    return asyncio.run(_main(args.check))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
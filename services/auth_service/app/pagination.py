@@ -0,0 +1,39 @@
+import base64
+import json
+from datetime import datetime
+
+from fastapi import HTTPException, status
+from sqlalchemy import tuple_
+
+
+def encode_cursor(created_at: datetime, row_id: str | int) -> str:
+    raw = json.dumps([created_at.isoformat(), row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, id_type: type | None = None) -> tuple[datetime, str | int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        created_at = datetime.fromisoformat(created_at)
+    except (ValueError, TypeError) as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor") from exc
+    # A well-formed cursor holding the wrong id type would otherwise only fail inside the database.
+    if id_type is not None and type(row_id) is not id_type:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return created_at, row_id
+
+
+def keyset_page(stmt, created_at_column, id_column, cursor: str | None, limit: int):
+    # Newest first; (created_at, id) is unique, so the row-value comparison resumes exactly after the cursor.
+    if cursor:
+        position = decode_cursor(cursor, id_column.type.python_type)
+        stmt = stmt.where(tuple_(created_at_column, id_column) < tuple_(*position))
+    return stmt.order_by(created_at_column.desc(), id_column.desc()).limit(limit + 1)
+
+
+def next_cursor(rows: list, limit: int) -> tuple[list, str | None]:
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].created_at, rows[-1].id)
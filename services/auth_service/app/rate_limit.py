@@ -1,17 +1,311 @@
+import asyncio
+import logging
+import math
+import time
+import uuid
+from dataclasses import dataclass
+
 from redis.asyncio import Redis
+from redis.exceptions import NoScriptError, RedisError
+
+from .metrics import RATE_LIMIT_REJECTED
+from .tracing import tracer
+
+
+logger = logging.getLogger(__name__)
+
+# Every script reads the clock from Redis TIME so replicas with skewed clocks share one timeline,
+# and returns {allowed, remaining, retry_after_ms, reset_after_ms}.
+SLIDING_LOG_SCRIPT = """
+local key = KEYS[1]
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+
+redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+local count = redis.call('ZCARD', key)
+if count < limit then
+  redis.call('ZADD', key, now, ARGV[3])
+  redis.call('PEXPIRE', key, window)
+  return {1, limit - count - 1, 0, window}
+end
+
+local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+local retry = math.max(tonumber(oldest[2]) + window - now, 1)
+return {0, 0, retry, retry}
+"""
+
+SLIDING_WINDOW_SCRIPT = """
+local key = KEYS[1]
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local current = math.floor(now / window)
+local elapsed = now - current * window
+
+local state = redis.call('HMGET', key, 'w', 'c', 'p')
+local stored = tonumber(state[1])
+local count = tonumber(state[2]) or 0
+local previous = tonumber(state[3]) or 0
+if stored ~= current then
+  if stored == current - 1 then previous = count else previous = 0 end
+  count = 0
+end
+
+local weight = (window - elapsed) / window
+local estimated = previous * weight + count
+local allowed = 0
+local retry = 0
+if estimated + 1 <= limit then
+  allowed = 1
+  count = count + 1
+  estimated = estimated + 1
+elseif previous > 0 and count + 1 <= limit then
+  retry = math.ceil(window - (limit - 1 - count) * window / previous - elapsed)
+else
+  retry = window - elapsed
+end
+
+redis.call('HSET', key, 'w', current, 'c', count, 'p', previous)
+redis.call('PEXPIRE', key, window * 2)
+return {allowed, math.max(math.floor(limit - estimated), 0), math.max(retry, allowed == 1 and 0 or 1), window - elapsed}
+"""
+
+GCRA_SCRIPT = """
+local key = KEYS[1]
+local limit = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local emission = period / limit
+
+local tat = tonumber(redis.call('GET', key)) or now
+if tat < now then tat = now end
+local new_tat = tat + emission
+local allow_at = new_tat - period
+if now < allow_at then
+  return {0, 0, math.ceil(allow_at - now), math.ceil(tat - now)}
+end
+
+redis.call('SET', key, new_tat, 'PX', math.ceil(new_tat - now))
+return {1, math.floor((period - (new_tat - now)) / emission), 0, math.ceil(new_tat - now)}
+"""
+
+SCRIPTS = {
+    "sliding_log": SLIDING_LOG_SCRIPT,
+    "sliding_window": SLIDING_WINDOW_SCRIPT,
+    "gcra": GCRA_SCRIPT,
+}
+
+
+@dataclass(frozen=True)
+class RateLimitResult:
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: float
+    reset_after: float
+
+    def headers(self) -> dict[str, str]:
+        headers = {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(self.remaining),
+            "X-RateLimit-Reset": str(math.ceil(self.reset_after)),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(max(math.ceil(self.retry_after), 1))
+        return headers
 
 
 class RateLimitExceeded(Exception):
-    pass
+    def __init__(self, message: str, result: RateLimitResult | None = None):
+        super().__init__(message)
+        self.result = result
+
+
+class LocalRateLimiter:
+    # Approximate per-process sliding-window counter, used only while Redis is unreachable.
+    def __init__(self):
+        self._windows: dict[str, list] = {}
+
+    def __len__(self) -> int:
+        return len(self._windows)
+
+    def check(self, key: str, limit: int, window_seconds: int, now: float) -> RateLimitResult:
+        state = self._windows.get(key)
+        if state is None or state[1] != window_seconds:
+            # [limit, window_seconds, window_start, current, previous, admitted_while_degraded]
+            state = self._windows[key] = [limit, window_seconds, now - now % window_seconds, 0, 0, 0]
+        elapsed_windows = int((now - state[2]) // window_seconds)
+        if elapsed_windows:
+            state[4] = state[3] if elapsed_windows == 1 else 0
+            state[3] = 0
+            state[2] += elapsed_windows * window_seconds
+        into_window = now - state[2]
+        estimate = state[4] * (1 - into_window / window_seconds) + state[3]
+        reset_after = window_seconds - into_window
+        if estimate + 1 > limit:
+            return RateLimitResult(False, limit, 0, reset_after, reset_after)
+        state[3] += 1
+        state[5] += 1
+        return RateLimitResult(True, limit, max(int(limit - estimate - 1), 0), 0.0, reset_after)
+
+    def drain(self) -> list[tuple[str, int, int, int]]:
+        admitted = [(key, state[0], state[1], state[5]) for key, state in self._windows.items() if state[5]]
+        self._windows.clear()
+        return admitted
 
 
 class RedisRateLimiter:
-    def __init__(self, redis_client: Redis):
+    def __init__(
+        self,
+        redis_client: Redis,
+        algorithm: str = "sliding_window",
+        timeout_seconds: float = 0.25,
+        failure_threshold: int = 3,
+        reset_seconds: float = 5.0,
+        clock=time.monotonic,
+    ):
+        if algorithm not in SCRIPTS:
+            raise ValueError(f"Unknown rate limit algorithm: {algorithm}")
         self.redis = redis_client
+        self.algorithm = algorithm
+        self.timeout_seconds = timeout_seconds
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.clock = clock
+        self._script = redis_client.register_script(SCRIPTS[algorithm])
+        self._batch: list[tuple[str, list, asyncio.Future]] = []
+        self._tasks: set[asyncio.Task] = set()
+        self.fallback = LocalRateLimiter()
+        self.failures = 0
+        self.open_until = 0.0
+        self._trial_in_flight = False
+        self.batches = 0
+
+    @property
+    def degraded(self) -> bool:
+        return self.open_until > 0
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def load_script(self) -> None:
+        await self.redis.script_load(self._script.script)
+
+    def _args(self, limit: int, window_seconds: int) -> list:
+        args = [limit, window_seconds * 1000]
+        if self.algorithm == "sliding_log":
+            args.append(uuid.uuid4().hex)
+        return args
+
+    def _submit(self, key: str, args: list) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self._batch.append((f"rl:{self.algorithm}:{key}", args, future))
+        if len(self._batch) == 1:
+            # The flush task runs on the next loop iteration, so checks issued by other requests
+            # in the meantime ride the same pipeline round trip.
+            self._spawn(self._flush())
+        return future
+
+    async def _flush(self) -> None:
+        batch, self._batch = self._batch, []
+        self.batches += 1
+        try:
+            replies = await asyncio.wait_for(self._evaluate([(key, args) for key, args, _ in batch]), self.timeout_seconds)
+        except (RedisError, OSError, asyncio.TimeoutError) as exc:
+            # One failed round trip is one failure, however many checks rode on it.
+            self._record_failure(self.clock())
+            replies = [exc] * len(batch)
+        else:
+            self._record_success()
+        for (_, _, future), reply in zip(batch, replies):
+            if future.done():
+                continue
+            if isinstance(reply, BaseException):
+                future.set_exception(reply)
+            else:
+                future.set_result(reply)
+
+    async def _evaluate(self, calls: list[tuple[str, list]]) -> list:
+        pipe = self.redis.pipeline(transaction=False)
+        for key, args in calls:
+            pipe.evalsha(self._script.sha, 1, key, *args)
+        replies = await pipe.execute(raise_on_error=False)
+        missing = [index for index, reply in enumerate(replies) if isinstance(reply, NoScriptError)]
+        if missing:
+            await self.redis.script_load(self._script.script)
+            pipe = self.redis.pipeline(transaction=False)
+            for index in missing:
+                key, args = calls[index]
+                pipe.evalsha(self._script.sha, 1, key, *args)
+            for index, reply in zip(missing, await pipe.execute(raise_on_error=False)):
+                replies[index] = reply
+        return replies
+
+    def _record_failure(self, now: float) -> None:
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.degraded or self.failures >= self.failure_threshold:
+            if not self.degraded:
+                logger.warning("Redis rate limiter degraded; using the in-process fallback")
+            self.open_until = now + self.reset_seconds
+
+    def _record_success(self) -> None:
+        self.failures = 0
+        if self.degraded:
+            self.open_until = 0.0
+            self._trial_in_flight = False
+            logger.info("Redis rate limiter recovered; replaying fallback counts")
+            self._spawn(self._resync(self.fallback.drain()))
+
+    async def _resync(self, admitted: list[tuple[str, int, int, int]]) -> None:
+        # Fold what the fallback admitted back into Redis so the outage doesn't hand out a fresh budget.
+        calls = [
+            (f"rl:{self.algorithm}:{key}", self._args(limit, window_seconds))
+            for key, limit, window_seconds, count in admitted
+            for _ in range(min(count, limit))
+        ]
+        try:
+            await asyncio.wait_for(self._evaluate(calls), self.timeout_seconds * 4)
+        except (RedisError, OSError, asyncio.TimeoutError):
+            logger.warning("Could not resync rate limit counts after Redis recovered", exc_info=True)
+
+    async def check(self, key: str, limit: int, window_seconds: int) -> RateLimitResult:
+        now = self.clock()
+        trial = False
+        if self.degraded:
+            if now < self.open_until or self._trial_in_flight:
+                return self.fallback.check(key, limit, window_seconds, now)
+            self._trial_in_flight = trial = True
+
+        try:
+            allowed, remaining, retry_ms, reset_ms = await self._submit(key, self._args(limit, window_seconds))
+        except (RedisError, OSError, asyncio.TimeoutError):
+            return self.fallback.check(key, limit, window_seconds, now)
+        finally:
+            # Also on cancellation, or the breaker would never try Redis again.
+            if trial:
+                self._trial_in_flight = False
+        return RateLimitResult(
+            allowed=bool(allowed),
+            limit=limit,
+            remaining=int(remaining),
+            retry_after=int(retry_ms) / 1000,
+            reset_after=int(reset_ms) / 1000,
+        )
 
-    async def enforce(self, key: str, limit: int, window_seconds: int) -> None:
-        current = await self.redis.incr(key)
-        if current == 1:
-            await self.redis.expire(key, window_seconds)
-        if current > limit:
-            raise RateLimitExceeded(f"Rate limit exceeded for key={key}")
+    async def enforce(self, key: str, limit: int, window_seconds: int) -> RateLimitResult:
+        with tracer.span("rate_limit.enforce", attributes={"rate_limit.algorithm": self.algorithm}) as span:
+            result = await self.check(key, limit, window_seconds)
+            if span is not None:
+                span.set_attribute("rate_limit.allowed", result.allowed)
+                span.set_attribute("rate_limit.degraded", self.degraded)
+        if not result.allowed:
+            RATE_LIMIT_REJECTED.labels(key.split(":", 1)[0]).inc()
+            raise RateLimitExceeded(f"Rate limit exceeded for key={key}", result)
+        return result
@@ -0,0 +1,104 @@
+import asyncio
+import logging
+import time
+
+from sqlalchemy import text
+
+from .config import settings
+from .db import get_engine
+from .deps import get_password_hasher, get_rate_limiter, get_redis
+from .keys import get_key_ring
+from .migrations import LATEST_VERSION, current_version
+from .security import create_access_token, decode_token
+
+
+logger = logging.getLogger(__name__)
+
+
+class Readiness:
+    def __init__(self):
+        self.warmed = False
+        self.draining = False
+        self.schema_current = False
+        self.warmup_seconds: float | None = None
+
+    async def _open_db_connections(self) -> None:
+        engine = get_engine()
+        size = getattr(engine.pool, "size", lambda: 1)()
+
+        async def touch() -> None:
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+
+        # Held concurrently, so the pool has to open that many connections; they go back idle afterwards.
+        await asyncio.gather(*(touch() for _ in range(max(1, min(settings.warmup_db_connections, size)))))
+
+    async def _check_schema(self) -> int:
+        async with get_engine().connect() as conn:
+            version = await current_version(conn)
+        self.schema_current = version >= LATEST_VERSION
+        return version
+
+    async def warm_up(self) -> None:
+        started = time.perf_counter()
+        await self._open_db_connections()
+        version = await self._check_schema()
+        if not self.schema_current:
+            # Stays not-ready (see status()) until the migrations command has run.
+            logger.error(
+                "Database schema is at version %s, expected %s; run python -m services.auth_service.app.migrations",
+                version,
+                LATEST_VERSION,
+            )
+
+        # Best effort: Redis is optional for serving (see status()), so an outage must not hold back readiness.
+        try:
+            redis = get_redis()
+            await asyncio.gather(*(redis.ping() for _ in range(settings.warmup_redis_connections)))
+            await get_rate_limiter().load_script()
+        except Exception:
+            logger.warning("Redis warm-up skipped", exc_info=True)
+
+        hasher = get_password_hasher()
+        await hasher.hash_many(["warm-up"] * settings.password_hash_workers, settings.password_hash_workers)
+
+        # Loads signing keys and runs the sign/verify path once so the first login pays for neither.
+        get_key_ring()
+        decode_token(create_access_token("warm-up", "user"))
+
+        self.warmup_seconds = time.perf_counter() - started
+        self.warmed = True
+        logger.info("Warm-up finished in %.3fs", self.warmup_seconds)
+
+    async def run_warm_up(self) -> None:
+        while not self.warmed:
+            try:
+                await self.warm_up()
+            except Exception:
+                logger.warning("Warm-up failed; retrying", exc_info=True)
+                await asyncio.sleep(1)
+
+    async def _probe(self, check) -> bool:
+        try:
+            await asyncio.wait_for(check(), settings.readiness_timeout_seconds)
+        except Exception:
+            return False
+        return True
+
+    async def _ping_db(self) -> None:
+        async with get_engine().connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    async def status(self) -> tuple[bool, dict]:
+        checks = {"warmed": self.warmed, "draining": self.draining, "schema": self.schema_current}
+        if self.warmed and not self.schema_current:
+            await self._probe(self._check_schema)
+            checks["schema"] = self.schema_current
+        checks["database"] = await self._probe(self._ping_db)
+        # Login and rate limiting keep working without Redis, so an outage is reported but does not pull the instance.
+        checks["redis"] = await self._probe(get_redis().ping)
+        ready = self.warmed and not self.draining and self.schema_current and checks["database"]
+        return ready, checks
+
+
+readiness = Readiness()
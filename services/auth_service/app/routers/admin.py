@@ -1,41 +1,319 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+import csv
+import io
+from datetime import datetime
 
-from ..db import get_db
-from ..deps import require_roles
-from ..models import AuditEvent, User
-from ..schemas import AuditEventResponse, UserResponse
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from redis.exceptions import RedisError
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..db import SessionLocal, get_db
+from ..deps import get_client_ip, get_password_hasher, get_revocation_publisher, get_user_cache, require_roles
+from ..hashing import PasswordHasher
+from ..models import AuditEvent, RefreshToken, User
+from ..pagination import keyset_page, next_cursor
+from ..schemas import (
+    AuditEventPage,
+    BulkUserActionReport,
+    RoleChangeRequest,
+    UserImportReport,
+    UserPage,
+    UserSelector,
+)
+from ..services.audit import write_audit
+from ..services.maintenance import run_maintenance
+from ..services.revocation import RevocationPublisher
+from ..services.user_cache import UserSnapshot, UserSnapshotCache
+from ..services.user_import import UserImport
 
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
+USER_COLUMNS = (User.id, User.email, User.role, User.is_active, User.created_at)
+AUDIT_COLUMNS = (
+    AuditEvent.id,
+    AuditEvent.user_id,
+    AuditEvent.action,
+    AuditEvent.detail,
+    AuditEvent.ip_address,
+    AuditEvent.created_at,
+)
+EXPORT_CHUNK_ROWS = 1000
+INVALIDATION_CHUNK_SIZE = 1000
 
-@router.get("/users", response_model=list[UserResponse])
-def list_users(_: User = Depends(require_roles("admin")), db: Session = Depends(get_db)):
-    users = db.query(User).order_by(User.created_at.desc()).limit(200).all()
-    return [
-        UserResponse(
-            id=u.id,
-            email=u.email,
-            role=u.role,
-            is_active=u.is_active,
-            created_at=u.created_at,
-        )
-        for u in users
-    ]
-
-
-@router.get("/audit", response_model=list[AuditEventResponse])
-def list_audit_events(_: User = Depends(require_roles("admin")), db: Session = Depends(get_db)):
-    events = db.query(AuditEvent).order_by(AuditEvent.created_at.desc()).limit(500).all()
-    return [
-        AuditEventResponse(
-            id=e.id,
-            user_id=e.user_id,
-            action=e.action,
-            detail=e.detail,
-            ip_address=e.ip_address,
-            created_at=e.created_at,
+
+def audit_filters(
+    action: str | None = None,
+    user_id: str | None = None,
+    ip_address: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+) -> list:
+    conditions = []
+    if action is not None:
+        conditions.append(AuditEvent.action == action)
+    if user_id is not None:
+        conditions.append(AuditEvent.user_id == user_id)
+    if ip_address is not None:
+        conditions.append(AuditEvent.ip_address == ip_address)
+    if since is not None:
+        conditions.append(AuditEvent.created_at >= since)
+    if until is not None:
+        conditions.append(AuditEvent.created_at < until)
+    return conditions
+
+
+@router.get("/users", response_model=UserPage)
+async def list_users(
+    _: UserSnapshot = Depends(require_roles("admin")),
+    db: AsyncSession = Depends(get_db),
+    cursor: str | None = None,
+    limit: int = Query(50, ge=1, le=500),
+    role: str | None = None,
+    is_active: bool | None = None,
+):
+    stmt = select(*USER_COLUMNS)
+    if role is not None:
+        stmt = stmt.where(User.role == role)
+    if is_active is not None:
+        stmt = stmt.where(User.is_active.is_(is_active))
+    rows = (await db.execute(keyset_page(stmt, User.created_at, User.id, cursor, limit))).all()
+    rows, cursor_out = next_cursor(rows, limit)
+    # Rows come straight from typed columns, so they are serialized without a response_model pass.
+    return ORJSONResponse({"items": [row._asdict() for row in rows], "next_cursor": cursor_out})
+
+
+def user_conditions(selector: UserSelector) -> list:
+    conditions = []
+    if selector.user_ids is not None:
+        conditions.append(User.id.in_(selector.user_ids))
+    if selector.role is not None:
+        conditions.append(User.role == selector.role)
+    if selector.is_active is not None:
+        conditions.append(User.is_active.is_(selector.is_active))
+    if selector.created_after is not None:
+        conditions.append(User.created_at >= selector.created_after)
+    if selector.created_before is not None:
+        conditions.append(User.created_at < selector.created_before)
+    return conditions
+
+
+async def _update_users(db: AsyncSession, conditions: list, values: dict) -> list[str]:
+    result = await db.execute(
+        update(User)
+        .where(*conditions)
+        .values(**values)
+        .returning(User.id)
+        .execution_options(synchronize_session=False)
+    )
+    return list(result.scalars())
+
+
+async def _publish_revocations(db: AsyncSession, publish) -> None:
+    # Runs before the commit: if Redis is down nothing is applied and the call can simply be retried.
+    try:
+        await publish
+    except RedisError as exc:
+        await db.rollback()
+        raise HTTPException(status_code=503, detail="Revocation feed unavailable; no changes were applied") from exc
+
+
+async def _finish_bulk_action(
+    db: AsyncSession,
+    request: Request,
+    admin: UserSnapshot,
+    user_cache: UserSnapshotCache,
+    action: str,
+    selector: UserSelector,
+    user_ids: list[str],
+    report: BulkUserActionReport,
+) -> BulkUserActionReport:
+    await db.commit()
+    for start in range(0, len(user_ids), INVALIDATION_CHUNK_SIZE):
+        await user_cache.invalidate(*user_ids[start : start + INVALIDATION_CHUNK_SIZE])
+
+    criteria = selector.model_dump(mode="json", exclude_none=True)
+    if "user_ids" in criteria:
+        criteria["user_ids"] = len(criteria["user_ids"])
+    await write_audit(
+        db,
+        action=action,
+        detail=f"{report.model_dump_json()} selected by {orjson.dumps(criteria).decode()}",
+        user_id=admin.id,
+        ip_address=get_client_ip(request),
+    )
+    return report
+
+
+@router.post("/users/sessions/revoke", response_model=BulkUserActionReport)
+async def revoke_user_sessions(
+    selector: UserSelector,
+    request: Request,
+    admin: UserSnapshot = Depends(require_roles("admin")),
+    db: AsyncSession = Depends(get_db),
+    user_cache: UserSnapshotCache = Depends(get_user_cache),
+    revocations: RevocationPublisher = Depends(get_revocation_publisher),
+):
+    conditions = user_conditions(selector)
+    user_ids = list(await db.scalars(select(User.id).where(*conditions)))
+    # The session cutoff is what revokes the refresh tokens: /auth/refresh rejects anything issued before it,
+    # whichever store holds them. The redis store keys tokens by family, not user, so this UPDATE only
+    # tidies the SQL rows and its rowcount is no measure of what was revoked.
+    await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.user_id.in_(select(User.id).where(*conditions)), RefreshToken.revoked.is_(False))
+        .values(revoked=True, revoked_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    await _publish_revocations(db, revocations.revoke_sessions(*user_ids))
+    report = BulkUserActionReport(affected_users=len(user_ids))
+    return await _finish_bulk_action(
+        db, request, admin, user_cache, "users_bulk_sessions_revoked", selector, user_ids, report
+    )
+
+
+@router.post("/users/deactivate", response_model=BulkUserActionReport)
+async def deactivate_users(
+    selector: UserSelector,
+    request: Request,
+    admin: UserSnapshot = Depends(require_roles("admin")),
+    db: AsyncSession = Depends(get_db),
+    user_cache: UserSnapshotCache = Depends(get_user_cache),
+    revocations: RevocationPublisher = Depends(get_revocation_publisher),
+):
+    # The acting admin is never part of their own bulk lockout or demotion.
+    conditions = [*user_conditions(selector), User.is_active.is_(True), User.id != admin.id]
+    user_ids = await _update_users(db, conditions, {"is_active": False})
+    await _publish_revocations(db, revocations.revoke_sessions(*user_ids))
+    report = BulkUserActionReport(affected_users=len(user_ids))
+    return await _finish_bulk_action(db, request, admin, user_cache, "users_bulk_deactivated", selector, user_ids, report)
+
+
+@router.post("/users/activate", response_model=BulkUserActionReport)
+async def activate_users(
+    selector: UserSelector,
+    request: Request,
+    admin: UserSnapshot = Depends(require_roles("admin")),
+    db: AsyncSession = Depends(get_db),
+    user_cache: UserSnapshotCache = Depends(get_user_cache),
+):
+    user_ids = await _update_users(db, [*user_conditions(selector), User.is_active.is_(False)], {"is_active": True})
+    report = BulkUserActionReport(affected_users=len(user_ids))
+    return await _finish_bulk_action(db, request, admin, user_cache, "users_bulk_activated", selector, user_ids, report)
+
+
+@router.post("/users/role", response_model=BulkUserActionReport)
+async def change_user_roles(
+    body: RoleChangeRequest,
+    request: Request,
+    admin: UserSnapshot = Depends(require_roles("admin")),
+    db: AsyncSession = Depends(get_db),
+    user_cache: UserSnapshotCache = Depends(get_user_cache),
+    revocations: RevocationPublisher = Depends(get_revocation_publisher),
+):
+    conditions = [*user_conditions(body), User.role != body.new_role, User.id != admin.id]
+    user_ids = await _update_users(db, conditions, {"role": body.new_role})
+    # Access tokens carry the role claim, so they are cut off; the next refresh picks up the new role.
+    await _publish_revocations(db, revocations.revoke_users(*user_ids))
+    report = BulkUserActionReport(affected_users=len(user_ids))
+    return await _finish_bulk_action(db, request, admin, user_cache, "users_bulk_role_changed", body, user_ids, report)
+
+
+@router.post("/users/import", response_model=UserImportReport)
+async def import_users(
+    request: Request,
+    admin: UserSnapshot = Depends(require_roles("admin")),
+    db: AsyncSession = Depends(get_db),
+    hasher: PasswordHasher = Depends(get_password_hasher),
+    import_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+):
+    job = UserImport(db, hasher, settings.user_import_chunk_size, settings.password_hash_workers)
+    aborted = True
+    try:
+        await job.run(request.stream(), import_format, settings.user_import_max_rows, settings.user_import_max_line_bytes)
+        aborted = False
+    finally:
+        # Chunks committed before a failure or disconnect stay imported, so they are audited either way.
+        if aborted:
+            await db.rollback()
+        summary = ", ".join(f"{status}={count}" for status, count in job.counts.items())
+        await write_audit(
+            db,
+            action="users_bulk_import",
+            detail=f"Bulk import ({import_format}): {summary}"
+            + (" (truncated)" if job.truncated else "")
+            + (" (aborted)" if aborted else ""),
+            user_id=admin.id,
+            ip_address=get_client_ip(request),
         )
-        for e in events
-    ]
+    return ORJSONResponse(job.report())
+
+
+@router.get("/audit", response_model=AuditEventPage)
+async def list_audit_events(
+    _: UserSnapshot = Depends(require_roles("admin")),
+    db: AsyncSession = Depends(get_db),
+    conditions: list = Depends(audit_filters),
+    cursor: str | None = None,
+    limit: int = Query(100, ge=1, le=1000),
+):
+    stmt = select(*AUDIT_COLUMNS).where(*conditions)
+    rows = (await db.execute(keyset_page(stmt, AuditEvent.created_at, AuditEvent.id, cursor, limit))).all()
+    rows, cursor_out = next_cursor(rows, limit)
+    return ORJSONResponse({"items": [row._asdict() for row in rows], "next_cursor": cursor_out})
+
+
+def _ndjson_chunk(rows) -> bytes:
+    return b"".join(orjson.dumps(row._asdict(), option=orjson.OPT_APPEND_NEWLINE) for row in rows)
+
+
+def _csv_chunk(rows, header: bool) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow([column.key for column in AUDIT_COLUMNS])
+    writer.writerows(
+        [row.id, row.user_id, row.action, row.detail, row.ip_address, row.created_at.isoformat()] for row in rows
+    )
+    return buffer.getvalue()
+
+
+@router.get("/audit/export")
+async def export_audit_events(
+    _: UserSnapshot = Depends(require_roles("admin")),
+    conditions: list = Depends(audit_filters),
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+):
+    stmt = (
+        select(*AUDIT_COLUMNS)
+        .where(*conditions)
+        .order_by(AuditEvent.created_at.desc(), AuditEvent.id.desc())
+        .execution_options(yield_per=EXPORT_CHUNK_ROWS)
+    )
+
+    async def rows():
+        # The request-scoped session is closed before a streamed body is sent, so the export owns its own.
+        async with SessionLocal() as db:
+            result = await db.stream(stmt)
+            first = True
+            async for partition in result.partitions():
+                yield _ndjson_chunk(partition) if export_format == "ndjson" else _csv_chunk(partition, header=first)
+                first = False
+            if first and export_format == "csv":
+                yield _csv_chunk([], header=True)
+
+    media_type = "application/x-ndjson" if export_format == "ndjson" else "text/csv"
+    return StreamingResponse(
+        rows(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="audit-events.{export_format}"'},
+    )
+
+
+@router.post("/maintenance", response_model=list[dict])
+async def run_maintenance_now(_: UserSnapshot = Depends(require_roles("admin"))):
+    reports = await run_maintenance(SessionLocal)
+    return [report.as_dict() for report in reports]
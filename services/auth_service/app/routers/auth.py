@@ -1,36 +1,56 @@
-from datetime import UTC, datetime
-
-from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import ORJSONResponse
+from fastapi.security import HTTPAuthorizationCredentials
 from redis.asyncio import Redis
-from sqlalchemy.orm import Session
+from redis.exceptions import RedisError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..config import settings
 from ..db import get_db
-from ..deps import get_client_ip, get_current_user, get_rate_limiter, get_redis
-from ..models import RefreshToken, User
+from ..deps import (
+    bearer_scheme,
+    get_client_ip,
+    get_current_user,
+    get_password_hasher,
+    get_rate_limiter,
+    get_redis,
+    get_refresh_token_store,
+    get_revocation_publisher,
+    get_token_introspector,
+    get_user_cache,
+    load_user_snapshot,
+    require_introspection_client,
+)
+from ..hashing import PasswordHasher
+from ..models import AuditEvent, User
+from ..pagination import keyset_page, next_cursor
 from ..rate_limit import RateLimitExceeded, RedisRateLimiter
-from ..schemas import LoginRequest, RefreshRequest, RegisterRequest, TokenPair, UserResponse
-from ..security import create_access_token, create_refresh_token, decode_token, hash_password, verify_password
+from ..schemas import (
+    AuditEventSummaryPage,
+    IntrospectionRequest,
+    IntrospectionResponse,
+    LoginRequest,
+    RefreshRequest,
+    RegisterRequest,
+    TokenPair,
+    UserResponse,
+)
+from ..security import create_access_token, decode_token, issue_refresh_token
 from ..services.audit import write_audit
+from ..services.introspection import TokenIntrospector
+from ..services.refresh_tokens import RefreshTokenStore, RotationOutcome
+from ..services.revocation import RevocationPublisher
+from ..services.user_cache import UserSnapshot, UserSnapshotCache
 
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
-def _issue_token_pair(db: Session, user: User) -> TokenPair:
+async def _issue_token_pair(db: AsyncSession, store: RefreshTokenStore, user: User) -> TokenPair:
     access = create_access_token(user.id, user.role)
-    refresh = create_refresh_token(user.id, user.role)
-    payload = decode_token(refresh)
-
-    db.add(
-        RefreshToken(
-            user_id=user.id,
-            token_jti=payload["jti"],
-            expires_at=datetime.fromtimestamp(payload["exp"], tz=UTC).replace(tzinfo=None),
-        )
-    )
-    db.commit()
-
+    refresh, claims = issue_refresh_token(user.id, user.role)
+    await store.add(db, claims)
     return TokenPair(access_token=access, refresh_token=refresh)
 
 
@@ -38,25 +58,27 @@ def _issue_token_pair(db: Session, user: User) -> TokenPair:
 async def register(
     body: RegisterRequest,
     request: Request,
-    db: Session = Depends(get_db),
+    response: Response,
+    db: AsyncSession = Depends(get_db),
     limiter: RedisRateLimiter = Depends(get_rate_limiter),
+    hasher: PasswordHasher = Depends(get_password_hasher),
 ):
     ip = get_client_ip(request)
     try:
-        await limiter.enforce(f"register:{ip}", settings.rate_limit_register_per_minute, 60)
+        limit = await limiter.enforce(f"register:{ip}", settings.rate_limit_register_per_minute, 60)
     except RateLimitExceeded as exc:
-        raise HTTPException(status_code=429, detail=str(exc)) from exc
+        raise HTTPException(status_code=429, detail=str(exc), headers=exc.result.headers()) from exc
+    response.headers.update(limit.headers())
 
-    existing = db.query(User).filter(User.email == body.email.lower()).first()
+    existing = await db.scalar(select(User).where(User.email == body.email.lower()))
     if existing:
         raise HTTPException(status_code=409, detail="User already exists")
 
-    user = User(email=body.email.lower(), password_hash=hash_password(body.password), role="user")
+    user = User(email=body.email.lower(), password_hash=await hasher.hash(body.password), role="user")
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
 
-    write_audit(db, action="register", detail=f"User registered: {user.email}", user_id=user.id, ip_address=ip)
+    await write_audit(db, action="register", detail=f"User registered: {user.email}", user_id=user.id, ip_address=ip)
 
     return UserResponse(id=user.id, email=user.email, role=user.role, is_active=user.is_active, created_at=user.created_at)
 
@@ -65,80 +87,159 @@ async def register(
 async def login(
     body: LoginRequest,
     request: Request,
-    db: Session = Depends(get_db),
+    response: Response,
+    db: AsyncSession = Depends(get_db),
     limiter: RedisRateLimiter = Depends(get_rate_limiter),
+    hasher: PasswordHasher = Depends(get_password_hasher),
+    store: RefreshTokenStore = Depends(get_refresh_token_store),
 ):
     ip = get_client_ip(request)
     try:
-        await limiter.enforce(f"login:{ip}", settings.rate_limit_login_per_minute, 60)
+        limit = await limiter.enforce(f"login:{ip}", settings.rate_limit_login_per_minute, 60)
     except RateLimitExceeded as exc:
-        raise HTTPException(status_code=429, detail=str(exc)) from exc
-
-    user = db.query(User).filter(User.email == body.email.lower()).first()
-    if not user or not verify_password(body.password, user.password_hash):
-        write_audit(db, action="login_failed", detail=f"Failed login: {body.email.lower()}", ip_address=ip)
+        raise HTTPException(status_code=429, detail=str(exc), headers=exc.result.headers()) from exc
+    response.headers.update(limit.headers())
+
+    user = await db.scalar(select(User).where(User.email == body.email.lower()))
+    verified, upgraded_hash = False, None
+    if user:
+        verified, upgraded_hash = await hasher.verify_and_update(body.password, user.password_hash)
+    if not verified:
+        await write_audit(db, action="login_failed", detail=f"Failed login: {body.email.lower()}", ip_address=ip)
         raise HTTPException(status_code=401, detail="Invalid credentials")
+    if not user.is_active:
+        await write_audit(db, action="login_failed", detail=f"Login to disabled account: {user.email}", ip_address=ip)
+        raise HTTPException(status_code=403, detail="Account disabled")
 
-    tokens = _issue_token_pair(db, user)
-    write_audit(db, action="login_success", detail=f"Successful login: {user.email}", user_id=user.id, ip_address=ip)
+    if upgraded_hash:
+        user.password_hash = upgraded_hash
+        await db.commit()
+
+    tokens = await _issue_token_pair(db, store, user)
+    await write_audit(db, action="login_success", detail=f"Successful login: {user.email}", user_id=user.id, ip_address=ip)
     return tokens
 
 
 @router.post("/refresh", response_model=TokenPair)
-async def refresh_token(body: RefreshRequest, request: Request, db: Session = Depends(get_db)):
+async def refresh_token(
+    body: RefreshRequest,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    store: RefreshTokenStore = Depends(get_refresh_token_store),
+    user_cache: UserSnapshotCache = Depends(get_user_cache),
+    revocations: RevocationPublisher = Depends(get_revocation_publisher),
+):
     ip = get_client_ip(request)
     try:
         payload = decode_token(body.refresh_token)
     except Exception as exc:
-        write_audit(db, action="refresh_failed", detail="Invalid refresh token", ip_address=ip)
+        await write_audit(db, action="refresh_failed", detail="Invalid refresh token", ip_address=ip)
         raise HTTPException(status_code=401, detail="Invalid refresh token") from exc
 
     if payload.get("type") != "refresh":
         raise HTTPException(status_code=401, detail="Invalid token type")
 
-    record = db.query(RefreshToken).filter(RefreshToken.token_jti == payload.get("jti")).first()
-    if not record or record.revoked or record.expires_at < datetime.utcnow():
-        write_audit(db, action="refresh_failed", detail="Refresh token revoked or expired", ip_address=ip)
+    if await revocations.session_revoked(payload):
+        await write_audit(db, action="refresh_failed", detail="Session revoked by administrator", ip_address=ip)
         raise HTTPException(status_code=401, detail="Refresh token revoked or expired")
 
-    user = db.query(User).filter(User.id == payload.get("sub")).first()
+    user = await load_user_snapshot(db, user_cache, payload.get("sub"))
     if not user or not user.is_active:
         raise HTTPException(status_code=401, detail="User not found")
 
-    record.revoked = True
-    db.commit()
+    access = create_access_token(user.id, user.role)
+    refresh, claims = issue_refresh_token(user.id, user.role, family_id=payload.get("fam"))
+    outcome = await store.rotate(db, payload, claims)
+    if outcome is RotationOutcome.REUSED:
+        await revocations.revoke_users(user.id)
+        await write_audit(
+            db,
+            action="refresh_reuse_detected",
+            detail="Spent refresh token presented again; token family and access tokens revoked",
+            user_id=user.id,
+            ip_address=ip,
+        )
+        raise HTTPException(status_code=401, detail="Refresh token revoked or expired")
+    if outcome is RotationOutcome.INVALID:
+        await write_audit(db, action="refresh_failed", detail="Refresh token revoked or expired", ip_address=ip)
+        raise HTTPException(status_code=401, detail="Refresh token revoked or expired")
 
-    tokens = _issue_token_pair(db, user)
-    write_audit(db, action="token_refreshed", detail=f"Tokens refreshed for {user.email}", user_id=user.id, ip_address=ip)
-    return tokens
+    await write_audit(db, action="token_refreshed", detail=f"Tokens refreshed for {user.email}", user_id=user.id, ip_address=ip)
+    return TokenPair(access_token=access, refresh_token=refresh)
 
 
 @router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
-async def logout(body: RefreshRequest, request: Request, db: Session = Depends(get_db)):
+async def logout(
+    body: RefreshRequest,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    store: RefreshTokenStore = Depends(get_refresh_token_store),
+    revocations: RevocationPublisher = Depends(get_revocation_publisher),
+    credentials: HTTPAuthorizationCredentials | None = Depends(bearer_scheme),
+):
     ip = get_client_ip(request)
+    if credentials:
+        try:
+            access = decode_token(credentials.credentials)
+        except Exception:
+            access = None
+        if access and access.get("type") == "access":
+            await revocations.revoke_jti(access["jti"], access["exp"])
+
     try:
         payload = decode_token(body.refresh_token)
-        token_jti = payload.get("jti")
     except Exception:
         return
 
-    record = db.query(RefreshToken).filter(RefreshToken.token_jti == token_jti).first()
-    if record and not record.revoked:
-        record.revoked = True
-        db.commit()
-        write_audit(db, action="logout", detail="Refresh token revoked on logout", user_id=record.user_id, ip_address=ip)
+    if payload.get("type") == "refresh" and await store.revoke(db, payload):
+        await write_audit(db, action="logout", detail="Refresh token revoked on logout", user_id=payload.get("sub"), ip_address=ip)
 
 
-@router.get("/me", response_model=UserResponse)
-async def me(user: User = Depends(get_current_user)):
-    return UserResponse(id=user.id, email=user.email, role=user.role, is_active=user.is_active, created_at=user.created_at)
+@router.post(
+    "/introspect",
+    response_model=IntrospectionResponse,
+    dependencies=[Depends(require_introspection_client)],
+)
+async def introspect(
+    body: IntrospectionRequest,
+    db: AsyncSession = Depends(get_db),
+    introspector: TokenIntrospector = Depends(get_token_introspector),
+):
+    # Results line up with body.tokens; inactive tokens are reported as {"active": false} only (RFC 7662).
+    try:
+        results = await introspector.introspect(db, body.tokens)
+    except RedisError as exc:
+        raise HTTPException(status_code=503, detail="Revocation state unavailable") from exc
+    return ORJSONResponse({"results": results})
 
 
-@router.get("/audit", response_model=list[dict])
-async def my_audit(user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    events = (
-        db.query(User.id, User.email)
-        .filter(User.id == user.id)
-        .all()
+@router.get("/me", response_model=UserResponse)
+async def me(user: UserSnapshot = Depends(get_current_user)):
+    # Returning the response directly skips re-validating the snapshot through response_model.
+    return ORJSONResponse(
+        {"id": user.id, "email": user.email, "role": user.role, "is_active": user.is_active, "created_at": user.created_at}
     )
-    return [{"user_id": user.id, "email": user.email, "records": len(events)}]
+
+
+@router.get("/audit", response_model=AuditEventSummaryPage)
+async def my_audit(
+    user: UserSnapshot = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    cursor: str | None = None,
+    limit: int = Query(50, ge=1, le=200),
+    action: list[str] | None = Query(None),
+):
+    # Only columns held by ix_audit_events_user_created (keys plus INCLUDE), so Postgres answers from the
+    # index alone; detail would cost a heap fetch per row.
+    stmt = select(
+        AuditEvent.id,
+        AuditEvent.user_id,
+        AuditEvent.action,
+        AuditEvent.ip_address,
+        AuditEvent.created_at,
+    ).where(AuditEvent.user_id == user.id)
+    if action:
+        stmt = stmt.where(AuditEvent.action.in_(action))
+    rows = (await db.execute(keyset_page(stmt, AuditEvent.created_at, AuditEvent.id, cursor, limit))).all()
+    rows, cursor_out = next_cursor(rows, limit)
+    return ORJSONResponse({"items": [row._asdict() for row in rows], "next_cursor": cursor_out})
@@ -1,6 +1,7 @@
 from datetime import datetime
+from typing import Literal
 
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, EmailStr, Field, model_validator
 
 
 class RegisterRequest(BaseModel):
@@ -38,3 +39,92 @@ class AuditEventResponse(BaseModel):
     detail: str
     ip_address: str | None
     created_at: datetime
+
+
+class AuditEventSummary(BaseModel):
+    id: int
+    user_id: str | None
+    action: str
+    ip_address: str | None
+    created_at: datetime
+
+
+class UserPage(BaseModel):
+    items: list[UserResponse]
+    next_cursor: str | None
+
+
+class AuditEventPage(BaseModel):
+    items: list[AuditEventResponse]
+    next_cursor: str | None
+
+
+class AuditEventSummaryPage(BaseModel):
+    items: list[AuditEventSummary]
+    next_cursor: str | None
+
+
+class UserImportRow(BaseModel):
+    email: EmailStr
+    password: str = Field(min_length=8, max_length=128)
+    role: Literal["user", "admin"] = "user"
+    is_active: bool = True
+
+
+class UserImportRowResult(BaseModel):
+    line: int
+    email: str | None = None
+    status: Literal["created", "exists", "duplicate", "invalid"]
+    id: str | None = None
+    error: str | None = None
+
+
+class UserImportReport(BaseModel):
+    created: int
+    exists: int
+    duplicate: int
+    invalid: int
+    truncated: bool
+    results: list[UserImportRowResult]
+
+
+class IntrospectionRequest(BaseModel):
+    tokens: list[str] = Field(min_length=1, max_length=1000)
+
+
+class TokenIntrospection(BaseModel):
+    active: bool
+    sub: str | None = None
+    role: str | None = None
+    exp: int | None = None
+    iat: int | None = None
+    jti: str | None = None
+    token_type: str | None = None
+
+
+class IntrospectionResponse(BaseModel):
+    results: list[TokenIntrospection]
+
+
+class UserSelector(BaseModel):
+    # Criteria are ANDed; at least one is required so an empty body can't hit every account.
+    user_ids: list[str] | None = Field(None, min_length=1, max_length=10_000)
+    role: str | None = None
+    is_active: bool | None = None
+    created_after: datetime | None = None
+    created_before: datetime | None = None
+
+    @model_validator(mode="after")
+    def require_criteria(self) -> "UserSelector":
+        criteria = (self.user_ids, self.role, self.is_active, self.created_after, self.created_before)
+        if all(value is None for value in criteria):
+            raise ValueError("At least one selection criterion is required")
+        return self
+
+
+class RoleChangeRequest(UserSelector):
+    new_role: Literal["user", "admin"]
+
+
+class BulkUserActionReport(BaseModel):
+    affected_users: int
@@ -1,13 +1,19 @@
 import uuid
 from datetime import UTC, datetime, timedelta
 
-import jwt
 from passlib.context import CryptContext
 
 from .config import settings
+from .keys import get_key_ring
 
 
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+# Hashes below the configured cost report needs_update, so raising the cost upgrades them on next login.
+pwd_context = CryptContext(
+    schemes=["pbkdf2_sha256"],
+    deprecated="auto",
+    pbkdf2_sha256__default_rounds=settings.password_hash_rounds,
+    pbkdf2_sha256__min_rounds=settings.password_hash_rounds,
+)
 
 
 def hash_password(password: str) -> str:
@@ -18,26 +24,41 @@ def verify_password(password: str, password_hash: str) -> bool:
     return pwd_context.verify(password, password_hash)
 
 
-def _create_token(subject: str, token_type: str, expires_delta: timedelta, role: str) -> str:
+def verify_and_update_password(password: str, password_hash: str) -> tuple[bool, str | None]:
+    return pwd_context.verify_and_update(password, password_hash)
+
+
+def _create_token(
+    subject: str, token_type: str, expires_delta: timedelta, role: str, extra: dict | None = None
+) -> tuple[str, dict]:
     now = datetime.now(UTC)
     payload = {
         "sub": subject,
         "type": token_type,
         "role": role,
-        "iat": int(now.timestamp()),
+        # Sub-second, so a session cutoff taken earlier in the same second doesn't revoke the new token.
+        "iat": now.timestamp(),
         "exp": int((now + expires_delta).timestamp()),
         "jti": uuid.uuid4().hex,
     }
-    return jwt.encode(payload, settings.jwt_secret, algorithm=settings.jwt_algorithm)
+    if extra:
+        payload.update(extra)
+    return get_key_ring().sign(payload), payload
 
 
 def create_access_token(user_id: str, role: str) -> str:
-    return _create_token(user_id, "access", timedelta(minutes=settings.access_token_minutes), role)
+    return _create_token(user_id, "access", timedelta(minutes=settings.access_token_minutes), role)[0]
+
+
+def issue_refresh_token(user_id: str, role: str, family_id: str | None = None) -> tuple[str, dict]:
+    # Every refresh token rotated from the same login shares a family, so reuse can revoke them together.
+    extra = {"fam": family_id or uuid.uuid4().hex}
+    return _create_token(user_id, "refresh", timedelta(days=settings.refresh_token_days), role, extra)
 
 
 def create_refresh_token(user_id: str, role: str) -> str:
-    return _create_token(user_id, "refresh", timedelta(days=settings.refresh_token_days), role)
+    return issue_refresh_token(user_id, role)[0]
 
 
 def decode_token(token: str) -> dict:
-    return jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_algorithm])
+    return get_key_ring().decode(token)
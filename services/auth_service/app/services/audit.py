@@ -1,9 +1,147 @@
-from sqlalchemy.orm import Session
+import asyncio
+import contextlib
+import logging
+from datetime import datetime
 
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ..config import settings
+from ..db import SessionLocal
 from ..models import AuditEvent
 
 
-def write_audit(db: Session, action: str, detail: str, user_id: str | None = None, ip_address: str | None = None) -> None:
-    event = AuditEvent(user_id=user_id, action=action, detail=detail, ip_address=ip_address)
-    db.add(event)
-    db.commit()
+logger = logging.getLogger(__name__)
+
+OVERFLOW_POLICIES = {"block", "drop_newest", "drop_oldest"}
+
+
+class AuditWriter:
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        queue_size: int,
+        batch_size: int,
+        flush_interval_seconds: float,
+        overflow_policy: str,
+    ):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown audit overflow policy: {overflow_policy}")
+        self.session_factory = session_factory
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.overflow_policy = overflow_policy
+        self.queue: asyncio.Queue[dict | None] | None = None
+        self.dropped = 0
+        self.failed = 0
+        self._task: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float) -> None:
+        if not self.running:
+            return
+        try:
+            await asyncio.wait_for(self._drain(), timeout)
+        except TimeoutError:
+            logger.error("Audit writer did not drain within %ss; %s events lost", timeout, self.queue.qsize())
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+        self._task = None
+
+    async def _drain(self) -> None:
+        # The sentinel sits behind every queued event, so everything already submitted is flushed first.
+        # Putting it can itself wait on a full queue, hence inside stop()'s timeout.
+        await self.queue.put(None)
+        await self._task
+
+    async def submit(self, event: dict) -> None:
+        try:
+            self.queue.put_nowait(event)
+            return
+        except asyncio.QueueFull:
+            pass
+
+        if self.overflow_policy == "block":
+            await self.queue.put(event)
+            return
+
+        self.dropped += 1
+        if self.overflow_policy == "drop_oldest":
+            if self.queue.get_nowait() is None:
+                # Never drop the stop sentinel; the new event gives way instead.
+                event = None
+            self.queue.put_nowait(event)
+        logger.warning("Audit queue full, dropped %s events so far", self.dropped)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            first = await self.queue.get()
+            if first is None:
+                return
+            batch = [first]
+            deadline = loop.time() + self.flush_interval_seconds
+            stopping = False
+            while len(batch) < self.batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    event = await asyncio.wait_for(self.queue.get(), remaining)
+                except TimeoutError:
+                    break
+                if event is None:
+                    stopping = True
+                    break
+                batch.append(event)
+
+            await self._flush(batch)
+            if stopping:
+                return
+
+    async def _flush(self, batch: list[dict]) -> None:
+        try:
+            async with self.session_factory() as db:
+                # A list of parameter sets is sent as multi-row INSERTs by the driver.
+                await db.execute(insert(AuditEvent), batch)
+                await db.commit()
+        except Exception:
+            self.failed += len(batch)
+            logger.exception("Failed to write %s audit events", len(batch))
+
+
+audit_writer = AuditWriter(
+    SessionLocal,
+    queue_size=settings.audit_queue_size,
+    batch_size=settings.audit_batch_size,
+    flush_interval_seconds=settings.audit_flush_interval_seconds,
+    overflow_policy=settings.audit_overflow_policy,
+)
+
+
+async def write_audit(
+    db: AsyncSession, action: str, detail: str, user_id: str | None = None, ip_address: str | None = None
+) -> None:
+    event = {
+        "user_id": user_id,
+        "action": action,
+        "detail": detail,
+        "ip_address": ip_address,
+        "created_at": datetime.utcnow(),
+    }
+    if audit_writer.running:
+        await audit_writer.submit(event)
+        return
+
+    # Outside the app lifecycle (scripts, tests) there is no writer task, so write inline.
+    await db.execute(insert(AuditEvent), [event])
+    await db.commit()
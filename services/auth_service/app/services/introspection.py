@@ -0,0 +1,115 @@
+import time
+from collections import OrderedDict
+
+import jwt
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import User
+from ..security import decode_token
+from .revocation import RevocationPublisher
+from .user_cache import UserSnapshot, UserSnapshotCache
+
+
+INACTIVE = {"active": False}
+
+
+class TokenIntrospector:
+    def __init__(self, revocations: RevocationPublisher, user_cache: UserSnapshotCache, max_size: int):
+        self.revocations = revocations
+        self.user_cache = user_cache
+        self.max_size = max_size
+        # jti -> (token, claims) for tokens whose signature has already been verified.
+        self._verified: OrderedDict[str, tuple[str, dict]] = OrderedDict()
+        # Revocation is final, so a revoked jti never needs another Redis round trip before it expires.
+        self._revoked: OrderedDict[str, int] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _remember(self, cache: OrderedDict, jti: str, value) -> None:
+        cache[jti] = value
+        cache.move_to_end(jti)
+        while len(cache) > self.max_size:
+            cache.popitem(last=False)
+
+    def _claims(self, token: str, now: int) -> dict | None:
+        try:
+            jti = jwt.decode(token, options={"verify_signature": False}).get("jti")
+        except jwt.InvalidTokenError:
+            return None
+        revoked_exp = self._revoked.get(jti)
+        if revoked_exp is not None:
+            if revoked_exp > now:
+                self.hits += 1
+                return None
+            del self._revoked[jti]
+
+        entry = self._verified.get(jti)
+        if entry is not None:
+            cached_token, claims = entry
+            if claims["exp"] <= now:
+                del self._verified[jti]
+                return None
+            # A forged token can reuse a real jti; only the exact token string already verified counts.
+            if cached_token == token:
+                self.hits += 1
+                self._verified.move_to_end(jti)
+                return claims
+
+        self.misses += 1
+        try:
+            claims = decode_token(token)
+        except Exception:
+            return None
+        if claims.get("type") != "access" or not claims.get("jti"):
+            return None
+        self._remember(self._verified, claims["jti"], (token, claims))
+        return claims
+
+    async def _users(self, db: AsyncSession, user_ids: set[str]) -> dict[str, UserSnapshot]:
+        snapshots = await self.user_cache.get_many(user_ids)
+        missing = user_ids - snapshots.keys()
+        if missing:
+            version = await self.user_cache.version(list(missing))
+            for user in await db.scalars(select(User).where(User.id.in_(missing))):
+                snapshot = UserSnapshot.from_user(user)
+                snapshots[snapshot.id] = snapshot
+                await self.user_cache.put(snapshot, version)
+        return snapshots
+
+    async def introspect(self, db: AsyncSession, tokens: list[str]) -> list[dict]:
+        now = int(time.time())
+        candidates = [self._claims(token, now) for token in tokens]
+        verified = [claims for claims in candidates if claims is not None]
+        if not verified:
+            return [INACTIVE] * len(tokens)
+
+        revoked = dict(zip((claims["jti"] for claims in verified), await self.revocations.revoked_among(verified)))
+        users = await self._users(db, {claims["sub"] for claims in verified})
+
+        results = []
+        for claims in candidates:
+            if claims is None:
+                results.append(INACTIVE)
+                continue
+            if revoked[claims["jti"]]:
+                self._verified.pop(claims["jti"], None)
+                self._remember(self._revoked, claims["jti"], claims["exp"])
+                results.append(INACTIVE)
+                continue
+            user = users.get(claims["sub"])
+            if user is None or not user.is_active:
+                results.append(INACTIVE)
+                continue
+            results.append(
+                {
+                    "active": True,
+                    "sub": claims["sub"],
+                    "role": claims["role"],
+                    "exp": claims["exp"],
+                    "iat": int(claims["iat"]),
+                    "jti": claims["jti"],
+                    "token_type": "access",
+                }
+            )
+        return results
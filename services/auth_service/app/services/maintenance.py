@@ -0,0 +1,223 @@
+import asyncio
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, delete, or_, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession, async_sessionmaker
+
+from ..config import settings
+from ..models import AuditEvent, RefreshToken
+
+
+logger = logging.getLogger(__name__)
+
+PARTITION_NAME = re.compile(r"^audit_events_p(\d{4})(\d{2})$")
+
+PARTITIONED_AUDIT_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS audit_events (
+        id SERIAL,
+        user_id VARCHAR(36),
+        action VARCHAR(100) NOT NULL,
+        detail TEXT NOT NULL,
+        ip_address VARCHAR(64),
+        created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+        PRIMARY KEY (id, created_at)
+    ) PARTITION BY RANGE (created_at)
+    """,
+    "CREATE TABLE IF NOT EXISTS audit_events_default PARTITION OF audit_events DEFAULT",
+    "CREATE INDEX IF NOT EXISTS ix_audit_events_user_created ON audit_events "
+    "(user_id, created_at DESC, id DESC) INCLUDE (action, ip_address)",
+    "CREATE INDEX IF NOT EXISTS ix_audit_events_action ON audit_events (action)",
+    "CREATE INDEX IF NOT EXISTS ix_audit_events_created_at ON audit_events (created_at)",
+    "CREATE INDEX IF NOT EXISTS ix_audit_events_created_at_id ON audit_events (created_at, id)",
+]
+
+
+@dataclass
+class ReclaimReport:
+    table: str
+    rows: int = 0
+    batches: int = 0
+    batch_seconds: list[float] = field(default_factory=list)
+    partitions_dropped: list[str] = field(default_factory=list)
+
+    @property
+    def max_batch_seconds(self) -> float:
+        return max(self.batch_seconds, default=0.0)
+
+    @property
+    def avg_batch_seconds(self) -> float:
+        return sum(self.batch_seconds) / len(self.batch_seconds) if self.batch_seconds else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "table": self.table,
+            "rows": self.rows,
+            "batches": self.batches,
+            "avg_batch_seconds": round(self.avg_batch_seconds, 6),
+            "max_batch_seconds": round(self.max_batch_seconds, 6),
+            "partitions_dropped": self.partitions_dropped,
+        }
+
+
+async def _delete_in_batches(
+    session_factory: async_sessionmaker, model, condition, batch_size: int, max_batches: int, report: ReclaimReport
+) -> ReclaimReport:
+    # Each batch is its own short transaction so the reaper never holds locks over the whole backlog.
+    while report.batches < max_batches:
+        started = time.perf_counter()
+        async with session_factory() as db:
+            ids = select(model.id).where(condition).limit(batch_size).scalar_subquery()
+            result = await db.execute(delete(model).where(model.id.in_(ids)).execution_options(synchronize_session=False))
+            await db.commit()
+        report.batch_seconds.append(time.perf_counter() - started)
+        report.batches += 1
+        report.rows += result.rowcount
+        if result.rowcount < batch_size:
+            break
+    return report
+
+
+async def purge_refresh_tokens(
+    session_factory: async_sessionmaker, now: datetime, batch_size: int, max_batches: int, revoked_retention: timedelta
+) -> ReclaimReport:
+    # Revoked rows are kept for a while so a replayed token is still recognised as reuse.
+    condition = or_(
+        RefreshToken.expires_at < now,
+        and_(RefreshToken.revoked.is_(True), RefreshToken.revoked_at < now - revoked_retention),
+    )
+    return await _delete_in_batches(
+        session_factory, RefreshToken, condition, batch_size, max_batches, ReclaimReport("refresh_tokens")
+    )
+
+
+def _month_start(value: datetime, offset: int = 0) -> datetime:
+    month_index = value.year * 12 + value.month - 1 + offset
+    return datetime(month_index // 12, month_index % 12 + 1, 1)
+
+
+async def create_month_partition(conn: AsyncConnection | AsyncSession, start: datetime, end: datetime) -> None:
+    name = f"audit_events_p{start:%Y%m}"
+    bounds = f"FROM ('{start:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"
+    # Postgres refuses to add a range partition while the DEFAULT partition holds rows in that range, so any
+    # such rows are moved into the new table before it is attached.
+    await conn.execute(text(f"CREATE TABLE IF NOT EXISTS {name} (LIKE audit_events INCLUDING DEFAULTS)"))
+    await conn.execute(
+        text(
+            f"WITH moved AS (DELETE FROM audit_events_default WHERE created_at >= '{start:%Y-%m-%d}' "
+            f"AND created_at < '{end:%Y-%m-%d}' RETURNING *) INSERT INTO {name} SELECT * FROM moved"
+        )
+    )
+    await conn.execute(text(f"ALTER TABLE audit_events ATTACH PARTITION {name} FOR VALUES {bounds}"))
+
+
+async def create_partitioned_audit_table(conn: AsyncConnection, now: datetime | None = None) -> None:
+    for statement in PARTITIONED_AUDIT_DDL:
+        await conn.execute(text(statement))
+    # Rows must have a monthly home from the first insert on, not only after the first maintenance run.
+    now = now or datetime.utcnow()
+    existing = {name for name, _ in await _audit_partitions(conn) or []}
+    for offset in range(settings.audit_partition_premake_months + 1):
+        start = _month_start(now, offset)
+        if f"audit_events_p{start:%Y%m}" not in existing:
+            await create_month_partition(conn, start, _month_start(now, offset + 1))
+
+
+async def _audit_partitions(db: AsyncConnection | AsyncSession) -> list[tuple[str, float]] | None:
+    is_partitioned = await db.scalar(
+        text(
+            "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table pt "
+            "JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = 'audit_events')"
+        )
+    )
+    if not is_partitioned:
+        return None
+    rows = await db.execute(
+        text(
+            "SELECT c.relname, c.reltuples FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = 'audit_events'"
+        )
+    )
+    return [(name, tuples) for name, tuples in rows]
+
+
+async def rotate_audit_partitions(
+    db: AsyncSession, partitions: list[tuple[str, float]], now: datetime, cutoff: datetime, premake_months: int
+) -> ReclaimReport:
+    report = ReclaimReport("audit_events")
+    existing = {name for name, _ in partitions}
+    for offset in range(premake_months + 1):
+        start = _month_start(now, offset)
+        if f"audit_events_p{start:%Y%m}" not in existing:
+            await create_month_partition(db, start, _month_start(now, offset + 1))
+
+    for name, tuples in sorted(partitions):
+        match = PARTITION_NAME.match(name)
+        if not match:
+            continue
+        partition_end = _month_start(datetime(int(match[1]), int(match[2]), 1), 1)
+        if partition_end <= cutoff:
+            started = time.perf_counter()
+            await db.execute(text(f"DROP TABLE {name}"))
+            report.partitions_dropped.append(name)
+            # reltuples is the planner's estimate; counting a partition about to be dropped would cost a full scan.
+            report.rows += max(int(tuples), 0)
+            report.batches += 1
+            report.batch_seconds.append(time.perf_counter() - started)
+    await db.commit()
+    return report
+
+
+async def enforce_audit_retention(
+    session_factory: async_sessionmaker, now: datetime, retention: timedelta, batch_size: int, max_batches: int
+) -> ReclaimReport:
+    cutoff = now - retention
+    report = ReclaimReport("audit_events")
+    async with session_factory() as db:
+        if db.bind.dialect.name == "postgresql":
+            partitions = await _audit_partitions(db)
+            if partitions is not None:
+                report = await rotate_audit_partitions(
+                    db, partitions, now, cutoff, settings.audit_partition_premake_months
+                )
+    # Whatever is left past the cutoff (the default partition, or the whole unpartitioned table) goes in batches.
+    return await _delete_in_batches(
+        session_factory, AuditEvent, AuditEvent.created_at < cutoff, batch_size, max_batches, report
+    )
+
+
+async def run_maintenance(session_factory: async_sessionmaker) -> list[ReclaimReport]:
+    now = datetime.utcnow()
+    reports = [
+        await purge_refresh_tokens(
+            session_factory,
+            now,
+            settings.maintenance_batch_size,
+            settings.maintenance_max_batches,
+            timedelta(hours=settings.maintenance_revoked_token_retention_hours),
+        ),
+        await enforce_audit_retention(
+            session_factory,
+            now,
+            timedelta(days=settings.audit_retention_days),
+            settings.maintenance_batch_size,
+            settings.maintenance_max_batches,
+        ),
+    ]
+    for report in reports:
+        logger.info("Maintenance reclaimed %s", report.as_dict())
+    return reports
+
+
+async def run_maintenance_loop(session_factory: async_sessionmaker, interval_seconds: int) -> None:
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await run_maintenance(session_factory)
+        except Exception:
+            logger.exception("Maintenance run failed")
@@ -0,0 +1,193 @@
+import time
+from datetime import UTC, datetime
+from enum import Enum
+from typing import Protocol
+
+from redis.asyncio import Redis
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import RefreshToken
+
+
+class RotationOutcome(str, Enum):
+    ROTATED = "rotated"
+    INVALID = "invalid"
+    REUSED = "reused"
+
+
+def _family(claims: dict) -> str:
+    # Tokens issued before families existed form a family of their own.
+    return claims.get("fam") or claims["jti"]
+
+
+def _expires_at(claims: dict) -> datetime:
+    return datetime.fromtimestamp(claims["exp"], tz=UTC).replace(tzinfo=None)
+
+
+class RefreshTokenStore(Protocol):
+    async def add(self, db: AsyncSession, claims: dict) -> None: ...
+
+    async def rotate(self, db: AsyncSession, old_claims: dict, new_claims: dict) -> RotationOutcome: ...
+
+    async def revoke(self, db: AsyncSession, claims: dict) -> bool: ...
+
+
+class SqlRefreshTokenStore:
+    def _insert(self, claims: dict):
+        return insert(RefreshToken).values(
+            user_id=claims["sub"],
+            token_jti=claims["jti"],
+            family_id=_family(claims),
+            expires_at=_expires_at(claims),
+        )
+
+    async def add(self, db: AsyncSession, claims: dict) -> None:
+        await db.execute(self._insert(claims))
+        await db.commit()
+
+    async def rotate(self, db: AsyncSession, old_claims: dict, new_claims: dict) -> RotationOutcome:
+        # The guarded UPDATE is the compare-and-set: only one concurrent refresh can flip revoked.
+        result = await db.execute(
+            update(RefreshToken)
+            .where(
+                RefreshToken.token_jti == old_claims["jti"],
+                RefreshToken.revoked.is_(False),
+                RefreshToken.expires_at > datetime.utcnow(),
+            )
+            .values(revoked=True, revoked_at=datetime.utcnow())
+        )
+        if result.rowcount == 1:
+            await db.execute(self._insert(new_claims))
+            await db.commit()
+            return RotationOutcome.ROTATED
+
+        revoked = await db.scalar(select(RefreshToken.revoked).where(RefreshToken.token_jti == old_claims["jti"]))
+        if revoked:
+            await self.revoke_family(db, _family(old_claims))
+            return RotationOutcome.REUSED
+        await db.rollback()
+        return RotationOutcome.INVALID
+
+    async def revoke(self, db: AsyncSession, claims: dict) -> bool:
+        result = await db.execute(
+            update(RefreshToken)
+            .where(RefreshToken.token_jti == claims["jti"], RefreshToken.revoked.is_(False))
+            .values(revoked=True, revoked_at=datetime.utcnow())
+        )
+        await db.commit()
+        return result.rowcount == 1
+
+    async def revoke_family(self, db: AsyncSession, family_id: str) -> None:
+        await db.execute(
+            update(RefreshToken)
+            .where(RefreshToken.family_id == family_id, RefreshToken.revoked.is_(False))
+            .values(revoked=True, revoked_at=datetime.utcnow())
+        )
+        await db.commit()
+
+
+# Keys of one family share a {hash tag}, so the scripts stay single-slot on Redis Cluster.
+ADD_SCRIPT = """
+redis.call('HSET', KEYS[1], 'sub', ARGV[1], 'state', 'active')
+redis.call('PEXPIRE', KEYS[1], ARGV[2])
+redis.call('SADD', KEYS[2], ARGV[3])
+if redis.call('PTTL', KEYS[2]) < tonumber(ARGV[2]) then
+  redis.call('PEXPIRE', KEYS[2], ARGV[2])
+end
+return 1
+"""
+
+ROTATE_SCRIPT = """
+local state = redis.call('HGET', KEYS[1], 'state')
+if not state or redis.call('HGET', KEYS[1], 'sub') ~= ARGV[1] then
+  return 'invalid'
+end
+if state ~= 'active' then
+  for _, jti in ipairs(redis.call('SMEMBERS', KEYS[3])) do
+    redis.call('DEL', ARGV[4] .. jti)
+  end
+  redis.call('DEL', KEYS[3])
+  return 'reused'
+end
+
+-- The spent token is kept until it expires so a second presentation is detected as reuse.
+redis.call('HSET', KEYS[1], 'state', 'used')
+redis.call('HSET', KEYS[2], 'sub', ARGV[1], 'state', 'active')
+redis.call('PEXPIRE', KEYS[2], ARGV[2])
+redis.call('SADD', KEYS[3], ARGV[3])
+if redis.call('PTTL', KEYS[3]) < tonumber(ARGV[2]) then
+  redis.call('PEXPIRE', KEYS[3], ARGV[2])
+end
+return 'rotated'
+"""
+
+REVOKE_SCRIPT = """
+if redis.call('HGET', KEYS[1], 'state') == 'active' then
+  redis.call('HSET', KEYS[1], 'state', 'revoked')
+  return 1
+end
+return 0
+"""
+
+
+class RedisRefreshTokenStore:
+    def __init__(self, redis_client: Redis, mirror: SqlRefreshTokenStore | None = None):
+        self.redis = redis_client
+        self.mirror = mirror
+        self._add = redis_client.register_script(ADD_SCRIPT)
+        self._rotate = redis_client.register_script(ROTATE_SCRIPT)
+        self._revoke = redis_client.register_script(REVOKE_SCRIPT)
+
+    @staticmethod
+    def _prefix(family_id: str) -> str:
+        return f"rt:{{{family_id}}}:"
+
+    def _keys(self, claims: dict) -> tuple[str, str]:
+        family_id = _family(claims)
+        return f"{self._prefix(family_id)}{claims['jti']}", f"rtf:{{{family_id}}}"
+
+    @staticmethod
+    def _ttl_ms(claims: dict) -> int:
+        return max(int((claims["exp"] - time.time()) * 1000), 1)
+
+    async def add(self, db: AsyncSession, claims: dict) -> None:
+        token_key, family_key = self._keys(claims)
+        await self._add(keys=[token_key, family_key], args=[claims["sub"], self._ttl_ms(claims), claims["jti"]])
+        if self.mirror:
+            await self.mirror.add(db, claims)
+
+    async def rotate(self, db: AsyncSession, old_claims: dict, new_claims: dict) -> RotationOutcome:
+        old_key, family_key = self._keys(old_claims)
+        new_key, _ = self._keys(new_claims)
+        outcome = RotationOutcome(
+            await self._rotate(
+                keys=[old_key, new_key, family_key],
+                args=[
+                    old_claims["sub"],
+                    self._ttl_ms(new_claims),
+                    new_claims["jti"],
+                    self._prefix(_family(old_claims)),
+                ],
+            )
+        )
+        if self.mirror and outcome is RotationOutcome.ROTATED:
+            await self.mirror.rotate(db, old_claims, new_claims)
+        elif self.mirror and outcome is RotationOutcome.REUSED:
+            await self.mirror.revoke_family(db, _family(old_claims))
+        return outcome
+
+    async def revoke(self, db: AsyncSession, claims: dict) -> bool:
+        token_key, _ = self._keys(claims)
+        revoked = bool(await self._revoke(keys=[token_key]))
+        if self.mirror and revoked:
+            await self.mirror.revoke(db, claims)
+        return revoked
+
+
+def build_refresh_token_store(kind: str, redis_client: Redis, sql_mirror: bool) -> RefreshTokenStore:
+    if kind == "sql":
+        return SqlRefreshTokenStore()
+    if kind == "redis":
+        return RedisRefreshTokenStore(redis_client, SqlRefreshTokenStore() if sql_mirror else None)
+    raise ValueError(f"Unknown refresh token store: {kind}")
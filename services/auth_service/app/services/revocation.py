@@ -0,0 +1,85 @@
+import json
+import time
+
+from redis.asyncio import Redis
+
+
+REVOCATION_CHANNEL = "token-revocations"
+REVOKED_JTIS_KEY = "revoked:jti"
+USER_CUTOFFS_KEY = "revoked:users"
+# sub -> refresh tokens issued at or before this time are dead; only the auth service reads it.
+SESSION_CUTOFFS_KEY = "revoked:sessions"
+PUBLISH_CHUNK_SIZE = 1000
+
+
+class RevocationPublisher:
+    def __init__(self, redis_client: Redis, access_token_seconds: int, refresh_token_seconds: int = 7 * 86400):
+        self.redis = redis_client
+        self.access_token_seconds = access_token_seconds
+        self.refresh_token_seconds = refresh_token_seconds
+
+    async def revoke_jti(self, jti: str, exp: int) -> None:
+        now = int(time.time())
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.zadd(REVOKED_JTIS_KEY, {jti: exp})
+        pipe.zremrangebyscore(REVOKED_JTIS_KEY, "-inf", now)
+        pipe.publish(REVOCATION_CHANNEL, json.dumps({"kind": "jti", "jti": jti, "exp": exp}))
+        await pipe.execute()
+
+    async def revoke_users(self, *user_ids: str, before: float | None = None) -> None:
+        if not user_ids:
+            return
+        # A cutoff only matters until the last access token issued before it has expired.
+        before = before if before is not None else time.time()
+        expires = before + self.access_token_seconds
+        cutoff = json.dumps({"before": before, "expires": expires})
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.hset(USER_CUTOFFS_KEY, mapping={user_id: cutoff for user_id in user_ids})
+        # Bulk revocations go out in chunks, so gateways handle 30k users as a few dozen messages.
+        for start in range(0, len(user_ids), PUBLISH_CHUNK_SIZE):
+            pipe.publish(
+                REVOCATION_CHANNEL,
+                json.dumps(
+                    {
+                        "kind": "users",
+                        "subs": user_ids[start : start + PUBLISH_CHUNK_SIZE],
+                        "before": before,
+                        "expires": expires,
+                    }
+                ),
+            )
+        await pipe.execute()
+        await self._prune(USER_CUTOFFS_KEY, lambda raw: json.loads(raw)["expires"])
+
+    async def revoke_sessions(self, *user_ids: str, before: float | None = None) -> None:
+        # Access tokens go through the feed; refresh tokens are checked against the session cutoff on /auth/refresh.
+        if not user_ids:
+            return
+        before = before if before is not None else time.time()
+        await self.redis.hset(SESSION_CUTOFFS_KEY, mapping={user_id: before for user_id in user_ids})
+        await self.revoke_users(*user_ids, before=before)
+        await self._prune(SESSION_CUTOFFS_KEY, lambda raw: float(raw) + self.refresh_token_seconds)
+
+    async def _prune(self, key: str, expires_at) -> None:
+        now = int(time.time())
+        stale = [user_id async for user_id, raw in self.redis.hscan_iter(key) if expires_at(raw) < now]
+        if stale:
+            await self.redis.hdel(key, *stale)
+
+    async def session_revoked(self, claims: dict) -> bool:
+        before = await self.redis.hget(SESSION_CUTOFFS_KEY, claims.get("sub", ""))
+        return before is not None and claims.get("iat", 0) <= float(before)
+
+    async def is_revoked(self, claims: dict) -> bool:
+        return (await self.revoked_among([claims]))[0]
+
+    async def revoked_among(self, claims_list: list[dict]) -> list[bool]:
+        pipe = self.redis.pipeline(transaction=False)
+        for claims in claims_list:
+            pipe.zscore(REVOKED_JTIS_KEY, claims.get("jti", ""))
+            pipe.hget(USER_CUTOFFS_KEY, claims.get("sub", ""))
+        replies = await pipe.execute()
+        return [
+            revoked_exp is not None or (cutoff is not None and claims.get("iat", 0) <= json.loads(cutoff)["before"])
+            for claims, revoked_exp, cutoff in zip(claims_list, replies[::2], replies[1::2])
+        ]
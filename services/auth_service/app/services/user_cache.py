@@ -0,0 +1,211 @@
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from datetime import datetime
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from ..models import User
+
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "user-cache:invalidate"
+
+# Stores a snapshot only if nobody invalidated the user since the filler read its generation.
+PUT_IF_CURRENT_SCRIPT = """
+if (redis.call('GET', KEYS[2]) or '0') ~= ARGV[1] then
+  return 0
+end
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+return 1
+"""
+
+
+@dataclass(frozen=True)
+class UserSnapshot:
+    id: str
+    email: str
+    role: str
+    is_active: bool
+    created_at: datetime
+
+    @classmethod
+    def from_user(cls, user: User) -> "UserSnapshot":
+        return cls(id=user.id, email=user.email, role=user.role, is_active=user.is_active, created_at=user.created_at)
+
+    def to_json(self) -> str:
+        data = asdict(self)
+        data["created_at"] = self.created_at.isoformat()
+        return json.dumps(data)
+
+    @classmethod
+    def from_json(cls, raw: str) -> "UserSnapshot":
+        data = json.loads(raw)
+        data["created_at"] = datetime.fromisoformat(data["created_at"])
+        return cls(**data)
+
+
+@dataclass(frozen=True)
+class SnapshotVersion:
+    # Taken before reading users from the database, so put() can tell the read was overtaken by an invalidation.
+    local: int
+    shared: dict[str, str] | None
+
+
+class UserSnapshotCache:
+    def __init__(self, redis_client: Redis, max_size: int, ttl_seconds: int, redis_ttl_seconds: int):
+        self.redis = redis_client
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.redis_ttl_seconds = redis_ttl_seconds
+        self._local: OrderedDict[str, tuple[float, UserSnapshot]] = OrderedDict()
+        self._evictions = 0
+        self._put_if_current = redis_client.register_script(PUT_IF_CURRENT_SCRIPT)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(user_id: str) -> str:
+        return f"user-cache:{user_id}"
+
+    @staticmethod
+    def _generation_key(user_id: str) -> str:
+        return f"user-cache:generation:{user_id}"
+
+    def _get_local(self, user_id: str, now: float) -> UserSnapshot | None:
+        entry = self._local.get(user_id)
+        if entry is None:
+            return None
+        expires_at, snapshot = entry
+        if expires_at <= now:
+            del self._local[user_id]
+            return None
+        self._local.move_to_end(user_id)
+        return snapshot
+
+    def _put_local(self, snapshot: UserSnapshot, now: float) -> None:
+        self._local[snapshot.id] = (now + self.ttl_seconds, snapshot)
+        self._local.move_to_end(snapshot.id)
+        while len(self._local) > self.max_size:
+            self._local.popitem(last=False)
+
+    def evict_local(self, user_id: str) -> None:
+        self._local.pop(user_id, None)
+        self._evictions += 1
+
+    async def get(self, user_id: str) -> UserSnapshot | None:
+        now = time.monotonic()
+        snapshot = self._get_local(user_id, now)
+        if snapshot is not None:
+            self.hits += 1
+            return snapshot
+
+        try:
+            raw = await self.redis.get(self._key(user_id))
+        except RedisError:
+            raw = None
+        if raw is None:
+            self.misses += 1
+            return None
+
+        snapshot = UserSnapshot.from_json(raw)
+        self._put_local(snapshot, now)
+        self.hits += 1
+        return snapshot
+
+    async def get_many(self, user_ids: set[str]) -> dict[str, UserSnapshot]:
+        now = time.monotonic()
+        snapshots = {}
+        for user_id in user_ids:
+            snapshot = self._get_local(user_id, now)
+            if snapshot is not None:
+                snapshots[user_id] = snapshot
+        self.hits += len(snapshots)
+        remote = [user_id for user_id in user_ids if user_id not in snapshots]
+        if not remote:
+            return snapshots
+
+        try:
+            raws = await self.redis.mget([self._key(user_id) for user_id in remote])
+        except RedisError:
+            raws = [None] * len(remote)
+        for raw in raws:
+            if raw is None:
+                self.misses += 1
+                continue
+            snapshot = UserSnapshot.from_json(raw)
+            self._put_local(snapshot, now)
+            snapshots[snapshot.id] = snapshot
+            self.hits += 1
+        return snapshots
+
+    async def version(self, user_ids: list[str]) -> SnapshotVersion:
+        try:
+            generations = await self.redis.mget([self._generation_key(user_id) for user_id in user_ids])
+        except RedisError:
+            return SnapshotVersion(self._evictions, None)
+        return SnapshotVersion(self._evictions, dict(zip(user_ids, (generation or "0" for generation in generations))))
+
+    async def put(self, snapshot: UserSnapshot, version: SnapshotVersion | None = None) -> None:
+        # Without a version the caller vouches that the snapshot cannot predate an invalidation.
+        if version is None:
+            self._put_local(snapshot, time.monotonic())
+            try:
+                await self.redis.set(self._key(snapshot.id), snapshot.to_json(), ex=self.redis_ttl_seconds)
+            except RedisError:
+                logger.warning("Could not store user snapshot in Redis", exc_info=True)
+            return
+
+        # Evictions are rare, so any eviction since the read is enough to skip the local copy.
+        if version.local == self._evictions:
+            self._put_local(snapshot, time.monotonic())
+        if version.shared is None:
+            return
+        try:
+            await self._put_if_current(
+                keys=[self._key(snapshot.id), self._generation_key(snapshot.id)],
+                args=[version.shared[snapshot.id], snapshot.to_json(), self.redis_ttl_seconds],
+            )
+        except RedisError:
+            logger.warning("Could not store user snapshot in Redis", exc_info=True)
+
+    async def invalidate(self, *user_ids: str) -> None:
+        for user_id in user_ids:
+            self.evict_local(user_id)
+        if not user_ids:
+            return
+        try:
+            pipe = self.redis.pipeline()
+            for user_id in user_ids:
+                pipe.incr(self._generation_key(user_id))
+                pipe.expire(self._generation_key(user_id), self.redis_ttl_seconds)
+            pipe.delete(*(self._key(user_id) for user_id in user_ids))
+            await pipe.execute()
+            await self.redis.publish(INVALIDATION_CHANNEL, json.dumps(list(user_ids)))
+        except RedisError:
+            logger.warning("Could not publish user cache invalidation", exc_info=True)
+
+    async def listen_for_invalidations(self) -> None:
+        while True:
+            try:
+                pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                try:
+                    while True:
+                        # listen() would trip the client's socket_timeout while the channel is quiet.
+                        message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                        if message is None:
+                            continue
+                        for user_id in json.loads(message["data"]):
+                            self.evict_local(user_id)
+                finally:
+                    await pubsub.aclose()
+            except RedisError:
+                # Entries we may have missed while disconnected age out after ttl_seconds anyway.
+                logger.warning("User cache invalidation listener disconnected", exc_info=True)
+                await asyncio.sleep(1)
@@ -0,0 +1,162 @@
+import csv
+import uuid
+from collections.abc import AsyncIterator
+from datetime import datetime
+
+import orjson
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..hashing import PasswordHasher
+from ..models import User
+from ..schemas import UserImportRow
+
+
+INSERT_IGNORING_CONFLICTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+async def _lines(chunks: AsyncIterator[bytes], max_line_bytes: int) -> AsyncIterator[tuple[int, str | None]]:
+    # One record per physical line, for CSV too: quoted fields may not contain newlines.
+    # A line longer than max_line_bytes comes out as None instead of being buffered whole.
+    buffer = b""
+    number = 0
+    skipping = False
+    async for chunk in chunks:
+        buffer += chunk
+        *complete, buffer = buffer.split(b"\n")
+        for raw in complete:
+            number += 1
+            if skipping or len(raw) > max_line_bytes:
+                skipping = False
+                yield number, None
+                continue
+            yield number, raw.decode("utf-8", errors="replace").rstrip("\r")
+        if len(buffer) > max_line_bytes:
+            buffer = b""
+            skipping = True
+    if skipping or len(buffer) > max_line_bytes:
+        yield number + 1, None
+    elif buffer:
+        yield number + 1, buffer.decode("utf-8", errors="replace").rstrip("\r")
+
+
+async def _records(
+    chunks: AsyncIterator[bytes], import_format: str, max_line_bytes: int
+) -> AsyncIterator[tuple[int, dict | str]]:
+    header: list[str] | None = None
+    async for number, line in _lines(chunks, max_line_bytes):
+        if line is None:
+            yield number, f"Line longer than {max_line_bytes} bytes"
+            if import_format == "csv" and header is None:
+                # Without its header the rest of a CSV body cannot be read.
+                return
+            continue
+        if not line.strip():
+            continue
+        if import_format == "ndjson":
+            try:
+                record = orjson.loads(line)
+            except orjson.JSONDecodeError as exc:
+                yield number, f"Invalid JSON: {exc}"
+                continue
+            yield number, record if isinstance(record, dict) else "Expected a JSON object"
+            continue
+
+        values = next(csv.reader([line]))
+        if header is None:
+            header = [name.strip() for name in values]
+        elif len(values) != len(header):
+            yield number, f"Expected {len(header)} columns, got {len(values)}"
+        else:
+            yield number, {name: value for name, value in zip(header, values) if value != ""}
+
+
+class UserImport:
+    def __init__(self, db: AsyncSession, hasher: PasswordHasher, chunk_size: int, hash_concurrency: int):
+        self.db = db
+        self.hasher = hasher
+        self.chunk_size = chunk_size
+        self.hash_concurrency = hash_concurrency
+        self.results: list[dict] = []
+        self.counts = {"created": 0, "exists": 0, "duplicate": 0, "invalid": 0}
+        self.truncated = False
+        self._seen: set[str] = set()
+        self._pending: list[tuple[int, UserImportRow]] = []
+
+    def _result(self, line: int, status: str, email: str | None = None, **extra) -> None:
+        self.counts[status] += 1
+        self.results.append({"line": line, "email": email, "status": status, **extra})
+
+    async def run(self, chunks: AsyncIterator[bytes], import_format: str, max_rows: int, max_line_bytes: int) -> None:
+        rows = 0
+        async for line, record in _records(chunks, import_format, max_line_bytes):
+            if rows >= max_rows:
+                self.truncated = True
+                break
+            rows += 1
+            if isinstance(record, str):
+                self._result(line, "invalid", error=record)
+                continue
+            try:
+                row = UserImportRow.model_validate(record)
+            except ValidationError as exc:
+                self._result(line, "invalid", record.get("email"), error=exc.errors(include_url=False)[0]["msg"])
+                continue
+
+            row.email = row.email.lower()
+            if row.email in self._seen:
+                self._result(line, "duplicate", row.email)
+                continue
+            self._seen.add(row.email)
+            self._pending.append((line, row))
+            if len(self._pending) >= self.chunk_size:
+                await self._flush()
+        await self._flush()
+
+    async def _flush(self) -> None:
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+
+        # Skip hashing for emails that already exist; ON CONFLICT still covers concurrent inserts.
+        existing = set(
+            await self.db.scalars(select(User.email).where(User.email.in_([row.email for _, row in pending])))
+        )
+        fresh = [(line, row) for line, row in pending if row.email not in existing]
+        hashes = await self.hasher.hash_many([row.password for _, row in fresh], self.hash_concurrency)
+
+        created: dict[str, str] = {}
+        if fresh:
+            now = datetime.utcnow()
+            insert = INSERT_IGNORING_CONFLICTS[self.db.get_bind().dialect.name]
+            stmt = (
+                insert(User)
+                .values(
+                    [
+                        {
+                            "id": str(uuid.uuid4()),
+                            "email": row.email,
+                            "password_hash": password_hash,
+                            "role": row.role,
+                            "is_active": row.is_active,
+                            "created_at": now,
+                        }
+                        for (_, row), password_hash in zip(fresh, hashes)
+                    ]
+                )
+                .on_conflict_do_nothing(index_elements=[User.email])
+                .returning(User.email, User.id)
+            )
+            created = dict((await self.db.execute(stmt)).tuples().all())
+            await self.db.commit()
+
+        for line, row in pending:
+            if row.email in created:
+                self._result(line, "created", row.email, id=created[row.email])
+            else:
+                self._result(line, "exists", row.email)
+
+    def report(self) -> dict:
+        return {**self.counts, "truncated": self.truncated, "results": sorted(self.results, key=lambda r: r["line"])}
@@ -0,0 +1,14 @@
+from services.common.tracing import (  # noqa: F401  (re-exported for this service's modules)
+    FileSpanExporter,
+    Span,
+    SpanContext,
+    Tracer,
+    TracingMiddleware,
+    build_tracer,
+    parse_traceparent,
+)
+
+from .config import settings
+
+
+tracer = build_tracer(settings.app_name, settings.tracing_export_path, settings.tracing_sample_ratio)
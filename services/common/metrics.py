@@ -0,0 +1,107 @@
+import time
+from collections.abc import Callable
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from redis.asyncio import Redis
+from redis.asyncio.client import Pipeline
+from starlette.responses import Response
+
+from .tracing import Tracer
+
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+FAST_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+
+class MetricsMiddleware:
+    def __init__(self, app, histogram: Histogram):
+        self.app = app
+        self.histogram = histogram
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # Label by the gateway's route-table prefix or the route template, never the raw path,
+            # to keep series cardinality bounded.
+            route = scope.get("metrics_route") or getattr(scope.get("route"), "path", "unmatched")
+            self.histogram.labels(scope["method"], route, str(status)).observe(time.perf_counter() - started)
+
+
+class InstrumentedPipeline(Pipeline):
+    def __init__(self, client: "InstrumentedRedis", transaction: bool, shard_hint: str | None):
+        super().__init__(client.connection_pool, client.response_callbacks, transaction, shard_hint)
+        self.timed = client.timed
+
+    async def execute(self, raise_on_error: bool = True):
+        return await self.timed("PIPELINE", super().execute(raise_on_error))
+
+
+class InstrumentedRedis(Redis):
+    # Bound by each service's subclass to its own histogram and, optionally, tracer.
+    command_seconds: Histogram
+    tracer: Tracer | None = None
+
+    async def timed(self, command: str, call):
+        span = None
+        if self.tracer is not None and self.tracer.current_context() is not None:
+            span = self.tracer.start_span(f"redis {command}", "client", attributes={"db.system": "redis"})
+        started = time.perf_counter()
+        try:
+            result = await call
+        except BaseException as exc:
+            if self.tracer is not None:
+                self.tracer.end_span(span, exc)
+            raise
+        finally:
+            self.command_seconds.labels(command).observe(time.perf_counter() - started)
+        if self.tracer is not None:
+            self.tracer.end_span(span)
+        return result
+
+    async def execute_command(self, *args, **options):
+        return await self.timed(str(args[0]).upper(), super().execute_command(*args, **options))
+
+    def pipeline(self, transaction: bool = True, shard_hint: str | None = None) -> Pipeline:
+        return InstrumentedPipeline(self, transaction, shard_hint)
+
+
+class ScrapeTimeCollector:
+    # Reads counters the services already keep as plain ints, so the hot path pays nothing for them.
+    def __init__(self, name: str, documentation: str, kind: str, labels: list[str], read: Callable[[], dict]):
+        self.name = name
+        self.documentation = documentation
+        self.family = CounterMetricFamily if kind == "counter" else GaugeMetricFamily
+        self.labels = labels
+        self.read = read
+
+    def describe(self):
+        yield self.family(self.name, self.documentation, labels=self.labels)
+
+    def collect(self):
+        family = self.family(self.name, self.documentation, labels=self.labels)
+        for label_values, value in self.read().items():
+            family.add_metric(list(label_values), value)
+        yield family
+
+
+def register_scrape_metric(name: str, documentation: str, kind: str, labels: list[str], read: Callable[[], dict]):
+    REGISTRY.register(ScrapeTimeCollector(name, documentation, kind, labels, read))
+
+
+def metrics_response() -> Response:
+    return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,215 @@
+import json
+import logging
+import random
+import re
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+
+logger = logging.getLogger(__name__)
+
+TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+# OTLP SpanKind values.
+SPAN_KINDS = {"internal": 1, "server": 2, "client": 3}
+
+
+@dataclass(frozen=True)
+class SpanContext:
+    trace_id: str
+    span_id: str
+    sampled: bool
+
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+
+def parse_traceparent(value: str | None) -> SpanContext | None:
+    match = TRACEPARENT_RE.match(value.strip().lower()) if value else None
+    if match is None or match.group(1) == "0" * 32 or match.group(2) == "0" * 16:
+        return None
+    return SpanContext(match.group(1), match.group(2), int(match.group(3), 16) & 1 == 1)
+
+
+@dataclass
+class Span:
+    name: str
+    context: SpanContext
+    parent_id: str | None
+    kind: str
+    start_ns: int = field(default_factory=time.time_ns)
+    end_ns: int = 0
+    attributes: dict = field(default_factory=dict)
+    error: str | None = None
+
+    def set_attribute(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    def to_otlp(self) -> dict:
+        span = {
+            "traceId": self.context.trace_id,
+            "spanId": self.context.span_id,
+            "name": self.name,
+            "kind": SPAN_KINDS[self.kind],
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_otlp_attribute(key, value) for key, value in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 0},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+def _otlp_attribute(key: str, value) -> dict:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+class FileSpanExporter:
+    # One OTLP/JSON ExportTraceServiceRequest per line, the format the collector's otlpjsonfile receiver reads.
+    def __init__(self, path: str, service_name: str):
+        self.path = path
+        self.service_name = service_name
+        self._lock = threading.Lock()
+
+    def export(self, spans: list[Span]) -> None:
+        request = {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": [_otlp_attribute("service.name", self.service_name)]},
+                    "scopeSpans": [{"scope": {"name": __name__}, "spans": [span.to_otlp() for span in spans]}],
+                }
+            ]
+        }
+        line = json.dumps(request, separators=(",", ":")) + "\n"
+        with self._lock, open(self.path, "a", encoding="utf-8") as fh:
+            fh.write(line)
+
+
+class Tracer:
+    def __init__(self, exporter: FileSpanExporter | None, sample_ratio: float, batch_size: int = 64):
+        self.exporter = exporter
+        self.sample_ratio = sample_ratio
+        self.batch_size = batch_size
+        self._current: ContextVar[SpanContext | None] = ContextVar("current_span", default=None)
+        self._finished: list[Span] = []
+        self._executor: ThreadPoolExecutor | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def current_context(self) -> SpanContext | None:
+        return self._current.get()
+
+    def start_span(
+        self, name: str, kind: str = "internal", parent: SpanContext | None = None, attributes: dict | None = None
+    ) -> Span | None:
+        if not self.enabled:
+            return None
+        parent = parent or self._current.get()
+        if parent is None:
+            context = SpanContext(secrets.token_hex(16), secrets.token_hex(8), random.random() < self.sample_ratio)
+        else:
+            context = SpanContext(parent.trace_id, secrets.token_hex(8), parent.sampled)
+        return Span(name, context, parent.span_id if parent else None, kind, attributes=attributes or {})
+
+    def end_span(self, span: Span | None, error: BaseException | None = None) -> None:
+        if span is None or not span.context.sampled:
+            return
+        span.end_ns = time.time_ns()
+        if error is not None:
+            span.error = f"{type(error).__name__}: {error}"
+        self._finished.append(span)
+        if len(self._finished) >= self.batch_size:
+            self.flush()
+
+    @contextmanager
+    def activate(self, context: SpanContext):
+        token = self._current.set(context)
+        try:
+            yield
+        finally:
+            self._current.reset(token)
+
+    @contextmanager
+    def span(self, name: str, kind: str = "internal", parent: SpanContext | None = None, attributes: dict | None = None):
+        span = self.start_span(name, kind, parent, attributes)
+        if span is None:
+            yield None
+            return
+        with self.activate(span.context):
+            try:
+                yield span
+            except BaseException as exc:
+                self.end_span(span, exc)
+                raise
+            self.end_span(span)
+
+    def flush(self) -> None:
+        spans, self._finished = self._finished, []
+        if not spans or self.exporter is None:
+            return
+        # File writes stay off the event loop; a single worker keeps batches in order.
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="span-export")
+        self._executor.submit(self._export, spans)
+
+    def _export(self, spans: list[Span]) -> None:
+        try:
+            self.exporter.export(spans)
+        except Exception:
+            logger.warning("Dropped %s spans", len(spans), exc_info=True)
+
+    def shutdown(self) -> None:
+        self.flush()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+def build_tracer(service_name: str, export_path: str | None, sample_ratio: float) -> Tracer:
+    return Tracer(FileSpanExporter(export_path, service_name) if export_path else None, sample_ratio)
+
+
+class TracingMiddleware:
+    def __init__(self, app, tracer: Tracer):
+        self.app = app
+        self.tracer = tracer
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        parent = parse_traceparent(headers.get(b"traceparent", b"").decode("latin-1"))
+        span = self.tracer.start_span(scope["method"], "server", parent, {"http.method": scope["method"]})
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                span.set_attribute("http.status_code", message["status"])
+            await send(message)
+
+        error = None
+        try:
+            with self.tracer.activate(span.context):
+                await self.app(scope, receive, send_with_status)
+        except BaseException as exc:
+            error = exc
+            raise
+        finally:
+            route = scope.get("metrics_route") or getattr(scope.get("route"), "path", None) or scope["path"]
+            span.name = f"{scope['method']} {route}"
+            span.set_attribute("http.route", route)
+            self.tracer.end_span(span, error)
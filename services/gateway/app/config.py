@@ -1,6 +1,27 @@
+from pydantic import BaseModel
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
+class UpstreamPoolConfig(BaseModel):
+    targets: list[str]
+    balancer: str = "least_outstanding"
+    # Auth instances answer /ready with 503 until warmed up, so cold replicas get no traffic.
+    health_path: str = "/ready"
+
+
+class RouteConfig(BaseModel):
+    prefix: str
+    upstream: str
+    rewrite: str
+
+
+DEFAULT_ROUTES = [
+    RouteConfig(prefix="/api/auth/", upstream="auth", rewrite="/auth/"),
+    RouteConfig(prefix="/api/admin/", upstream="auth", rewrite="/admin/"),
+    RouteConfig(prefix="/api/", upstream="auth", rewrite="/auth/"),
+]
+
+
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
 
@@ -9,6 +30,63 @@ class Settings(BaseSettings):
 
     jwt_secret: str = "change-me-in-production"
     jwt_algorithm: str = "HS256"
+    # Used for asymmetric algorithms; defaults to the auth service's /.well-known/jwks.json.
+    jwks_url: str | None = None
+    jwks_refresh_interval_seconds: float = 300.0
+    token_cache_size: int = 10_000
+    token_cache_max_ttl_seconds: int = 300
+
+    redis_url: str | None = None
+    # X-Forwarded-For is only honoured on connections from trusted_proxies (CIDRs, e.g. the nginx ingress).
+    # The client is the entry appended by the outermost of trusted_proxy_hops proxies; anything to its left
+    # was sent by the client and is ignored.
+    trust_proxy_headers: bool = False
+    trusted_proxies: list[str] = []
+    trusted_proxy_hops: int = 1
+
+    rate_limit_enabled: bool = True
+    rate_limit_window_seconds: int = 60
+    rate_limit_per_ip: int = 600
+    rate_limit_per_subject: int = 1200
+    # Path prefix -> limit per client IP within the window.
+    rate_limit_routes: dict[str, int] = {"/api/auth/login": 30, "/api/auth/register": 10}
+    rate_limit_sync_interval_seconds: float = 0.25
+
+    upstream_timeout_seconds: float = 15.0
+    upstream_connect_timeout_seconds: float = 5.0
+    upstream_max_connections: int = 100
+    upstream_max_keepalive_connections: int = 20
+    upstream_keepalive_expiry_seconds: float = 30.0
+    upstream_http2: bool = False
+
+    # Pools keyed by name; when empty a single "auth" pool is built from auth_service_url.
+    upstreams: dict[str, UpstreamPoolConfig] = {}
+    routes: list[RouteConfig] = DEFAULT_ROUTES
+
+    health_check_interval_seconds: float = 5.0
+    health_check_timeout_seconds: float = 2.0
+    circuit_failure_threshold: int = 5
+    circuit_reset_seconds: float = 10.0
+
+    # OTLP/JSON lines are appended here when set; unset disables tracing entirely.
+    tracing_export_path: str | None = None
+    tracing_sample_ratio: float = 0.1
+
+    response_cache_enabled: bool = False
+    response_cache_size: int = 5_000
+    response_cache_max_body_bytes: int = 256 * 1024
+    # Public path prefix -> TTL in seconds for idempotent GETs, per subject.
+    response_cache_routes: dict[str, float] = {"/api/auth/me": 5.0, "/api/me": 5.0, "/api/admin/users": 5.0}
+
+    def resolved_jwks_url(self) -> str:
+        return self.jwks_url or f"{self.auth_service_url}/.well-known/jwks.json"
+
+    def response_cache_ttl(self, path: str) -> float:
+        prefixes = [prefix for prefix in self.response_cache_routes if path.startswith(prefix)]
+        return self.response_cache_routes[max(prefixes, key=len)] if prefixes else 0.0
+
+    def upstream_pools(self) -> dict[str, UpstreamPoolConfig]:
+        return self.upstreams or {"auth": UpstreamPoolConfig(targets=[self.auth_service_url])}
 
 
 settings = Settings()
@@ -0,0 +1,58 @@
+import asyncio
+import logging
+import time
+
+import httpx
+import jwt
+
+
+logger = logging.getLogger(__name__)
+
+
+class JWKSCache:
+    def __init__(self, url: str, refresh_interval_seconds: float, min_refresh_interval_seconds: float = 30.0):
+        self.url = url
+        self.refresh_interval_seconds = refresh_interval_seconds
+        self.min_refresh_interval_seconds = min_refresh_interval_seconds
+        self.keys: dict[str, object] = {}
+        self.last_refresh = 0.0
+        self._refresh_requested: asyncio.Event | None = None
+
+    def load(self, jwks: dict) -> None:
+        keys = {}
+        for data in jwks.get("keys", []):
+            try:
+                jwk = jwt.PyJWK(data)
+            except jwt.PyJWKError:
+                logger.warning("Skipping unusable JWK kid=%s", data.get("kid"))
+                continue
+            keys[jwk.key_id] = jwk.key
+        # Swapped in one assignment: every key in the published set, old and new, verifies during rotation.
+        self.keys = keys
+        self.last_refresh = time.monotonic()
+
+    def key_for(self, kid: str | None):
+        key = self.keys.get(kid)
+        if key is None and self._refresh_requested is not None:
+            self._refresh_requested.set()
+        return key
+
+    async def refresh(self, client: httpx.AsyncClient) -> None:
+        response = await client.get(self.url)
+        response.raise_for_status()
+        self.load(response.json())
+
+    async def run_refresh(self, client: httpx.AsyncClient) -> None:
+        self._refresh_requested = asyncio.Event()
+        while True:
+            try:
+                await asyncio.wait_for(self._refresh_requested.wait(), self.refresh_interval_seconds)
+                # An unknown kid triggers an early refresh, but never more often than the minimum interval.
+                await asyncio.sleep(max(self.last_refresh + self.min_refresh_interval_seconds - time.monotonic(), 0))
+            except TimeoutError:
+                pass
+            self._refresh_requested.clear()
+            try:
+                await self.refresh(client)
+            except (httpx.HTTPError, ValueError):
+                logger.warning("JWKS refresh failed; keeping %s cached keys", len(self.keys), exc_info=True)
@@ -1,12 +1,202 @@
-from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import JSONResponse, Response
+import asyncio
+import contextlib
+import ipaddress
+import logging
+import time
+from dataclasses import replace
+from functools import lru_cache
+
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
 import httpx
 
 from .config import settings
-from .security import PUBLIC_PATHS, decode_access_token
+from .metrics import (
+    HTTP_REQUEST_SECONDS,
+    UPSTREAM_SECONDS,
+    InstrumentedRedis,
+    MetricsMiddleware,
+    metrics_response,
+    register_scrape_metric,
+)
+from .rate_limit import LocalAggregatingRateLimiter, RateLimitMiddleware
+from .response_cache import (
+    CachedResponse,
+    ResponseCache,
+    body_etag,
+    cache_directives,
+    etag_matches,
+    response_ttl,
+)
+from .routing import Route, RouteTable
+from .security import PUBLIC_PATHS, authenticate, bearer_claims, revocation_list, token_verifier
+from .tracing import Span, TracingMiddleware, tracer
+from .upstream import (
+    Dispatch,
+    NoHealthyUpstream,
+    UpstreamPool,
+    build_http_client,
+    build_upstream_pools,
+    downstream_response_headers,
+    has_request_body,
+    is_upstream_failure,
+    run_health_checks,
+    upstream_request_headers,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache
+def _trusted_networks(cidrs: tuple[str, ...]) -> tuple:
+    return tuple(ipaddress.ip_network(cidr, strict=False) for cidr in cidrs)
+
+
+def _is_trusted_proxy(host: str) -> bool:
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in _trusted_networks(tuple(settings.trusted_proxies)))
+
+
+def client_ip(request: Request) -> str:
+    peer = request.client.host if request.client else "unknown"
+    if not settings.trust_proxy_headers or not _is_trusted_proxy(peer):
+        return peer
+    hops = [part.strip() for part in request.headers.get("x-forwarded-for", "").split(",") if part.strip()]
+    if len(hops) < settings.trusted_proxy_hops:
+        return peer
+    return hops[-settings.trusted_proxy_hops]
+
+
+def rate_limit_checks(request: Request) -> list[tuple[str, int, int]]:
+    path = request.url.path
+    if not settings.rate_limit_enabled or not path.startswith("/api/"):
+        return []
+
+    window = settings.rate_limit_window_seconds
+    ip = client_ip(request)
+    checks = [(f"ip:{ip}", settings.rate_limit_per_ip, window)]
+    for prefix, limit in settings.rate_limit_routes.items():
+        if path.startswith(prefix):
+            checks.append((f"route:{prefix}:{ip}", limit, window))
+    return checks
+
+
+def subject_rate_limit_checks(request: Request) -> list[tuple[str, int, int]]:
+    # Resolved only once the IP and route buckets admit the request, so a flood of junk tokens is
+    # turned away before anything is decoded.
+    if not request.headers.get("authorization", "").lower().startswith("bearer "):
+        return []
+    try:
+        subject = bearer_claims(request).get("sub")
+    except HTTPException:
+        return []
+    if not subject:
+        return []
+    return [(f"sub:{subject}", settings.rate_limit_per_subject, settings.rate_limit_window_seconds)]
+
 
+redis_client = InstrumentedRedis.from_url(settings.redis_url, decode_responses=True) if settings.redis_url else None
+rate_limiter = LocalAggregatingRateLimiter(redis_client)
 
-app = FastAPI(title=settings.app_name, version="0.1.0")
+app = FastAPI(title=settings.app_name, version="0.1.0", default_response_class=ORJSONResponse)
+app.state.route_table = RouteTable(settings.routes)
+app.state.upstream_pools = build_upstream_pools()
+app.state.response_cache = (
+    ResponseCache(settings.response_cache_size, settings.response_cache_max_body_bytes)
+    if settings.response_cache_enabled
+    else None
+)
+app.add_middleware(
+    RateLimitMiddleware,
+    limiter=rate_limiter,
+    checks_for=rate_limit_checks,
+    clock=time.time,
+    then_checks_for=subject_rate_limit_checks,
+)
+app.add_middleware(MetricsMiddleware, histogram=HTTP_REQUEST_SECONDS)
+app.add_middleware(TracingMiddleware, tracer=tracer)
+
+
+def _response_cache_stats() -> dict:
+    cache: ResponseCache | None = app.state.response_cache
+    if cache is None:
+        return {}
+    return {("hit",): cache.hits, ("miss",): cache.misses, ("coalesced",): cache.coalesced}
+
+
+def _upstream_stats(read) -> dict:
+    return {
+        (pool.name, upstream.url): read(upstream)
+        for pool in app.state.upstream_pools.values()
+        for upstream in pool.upstreams
+    }
+
+
+register_scrape_metric(
+    "gateway_rate_limit_rejected", "Requests rejected with 429.", "counter", [], lambda: {(): rate_limiter.rejected}
+)
+register_scrape_metric(
+    "gateway_token_cache_requests",
+    "Verified-token cache lookups.",
+    "counter",
+    ["result"],
+    lambda: {("hit",): token_verifier.cache.hits, ("miss",): token_verifier.cache.misses},
+)
+register_scrape_metric(
+    "gateway_response_cache_requests", "Response cache lookups.", "counter", ["result"], _response_cache_stats
+)
+register_scrape_metric(
+    "gateway_upstream_outstanding",
+    "In-flight requests per upstream target.",
+    "gauge",
+    ["upstream", "target"],
+    lambda: _upstream_stats(lambda upstream: upstream.outstanding),
+)
+register_scrape_metric(
+    "gateway_upstream_available",
+    "1 when the target is healthy and its circuit is not open.",
+    "gauge",
+    ["upstream", "target"],
+    lambda: _upstream_stats(lambda upstream: float(upstream.healthy and upstream.breaker.state != upstream.breaker.OPEN)),
+)
+register_scrape_metric(
+    "gateway_revocations", "Revoked jtis and user cutoffs held in memory.", "gauge", [], lambda: {(): len(revocation_list)}
+)
+
+
+@app.on_event("startup")
+async def on_startup() -> None:
+    app.state.http_client = build_http_client()
+    app.state.background_tasks = [
+        asyncio.create_task(run_health_checks(app.state.upstream_pools, app.state.http_client)),
+        asyncio.create_task(rate_limiter.run_sync(settings.rate_limit_sync_interval_seconds, time.time)),
+    ]
+    if redis_client is not None:
+        app.state.background_tasks.append(asyncio.create_task(revocation_list.run_subscriber(redis_client)))
+    if token_verifier.jwks is not None:
+        try:
+            await token_verifier.jwks.refresh(app.state.http_client)
+        except (httpx.HTTPError, ValueError):
+            logger.warning("Initial JWKS fetch failed; retrying in the background", exc_info=True)
+        app.state.background_tasks.append(asyncio.create_task(token_verifier.jwks.run_refresh(app.state.http_client)))
+
+
+@app.on_event("shutdown")
+async def on_shutdown() -> None:
+    for task in app.state.background_tasks:
+        task.cancel()
+    for task in app.state.background_tasks:
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+    await app.state.http_client.aclose()
+    if redis_client is not None:
+        await redis_client.aclose()
+    tracer.shutdown()
 
 
 @app.get("/health")
@@ -14,44 +204,197 @@ def health() -> dict:
     return {"status": "ok", "service": "gateway"}
 
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return metrics_response()
+
+
+class _UpstreamBody:
+    # Starlette skips the response's background task when the body iterator raises, and never starts the
+    # iterator when the client disconnects first; both paths call finish() and only the first one releases.
+    def __init__(self, upstream_response: httpx.Response, pool: UpstreamPool, dispatch: Dispatch):
+        self.upstream_response = upstream_response
+        self.pool = pool
+        self.dispatch = dispatch
+        self._finished = False
+
+    async def __aiter__(self):
+        try:
+            async for chunk in self.upstream_response.aiter_raw():
+                yield chunk
+        finally:
+            await self.finish()
+
+    async def finish(self) -> None:
+        if self._finished:
+            return
+        self._finished = True
+        try:
+            await self.upstream_response.aclose()
+        finally:
+            self.pool.release(self.dispatch)
+
+
+CONDITIONAL_REQUEST_HEADERS = {"if-none-match", "if-modified-since"}
+
+
+def _start_upstream_span(pool: UpstreamPool, dispatch: Dispatch, headers: dict[str, str]) -> Span | None:
+    span = tracer.start_span(f"proxy {pool.name}", "client", attributes={"upstream.target": dispatch.upstream.url})
+    if span is not None:
+        # Replace the caller's traceparent so the upstream's server span hangs off this hop.
+        headers["traceparent"] = span.context.traceparent()
+    return span
+
+
+def _record_upstream(
+    pool: UpstreamPool,
+    dispatch: Dispatch,
+    elapsed: float,
+    status_code: int | None,
+    span: Span | None = None,
+    error: BaseException | None = None,
+) -> None:
+    pool.record(dispatch, ok=status_code is not None and not is_upstream_failure(status_code))
+    UPSTREAM_SECONDS.labels(pool.name, str(status_code) if status_code is not None else "error").observe(elapsed)
+    if span is not None and status_code is not None:
+        span.set_attribute("http.status_code", status_code)
+    tracer.end_span(span, error)
+
+
+async def _fetch_cacheable(
+    request: Request, route: Route, target_path: str, ttl: float, stale: CachedResponse | None
+) -> CachedResponse:
+    headers = {
+        key: value
+        for key, value in upstream_request_headers(request.headers).items()
+        if key.lower() not in CONDITIONAL_REQUEST_HEADERS
+    }
+    if stale is not None and stale.upstream_etag:
+        headers["if-none-match"] = stale.etag
+
+    pool: UpstreamPool = request.app.state.upstream_pools[route.upstream]
+    dispatch = pool.acquire()
+    client: httpx.AsyncClient = request.app.state.http_client
+    span = _start_upstream_span(pool, dispatch, headers)
+    started = time.perf_counter()
+    try:
+        upstream_response = await client.send(
+            client.build_request("GET", f"{dispatch.upstream.url}{target_path}", headers=headers, params=request.query_params),
+            stream=True,
+        )
+        elapsed = time.perf_counter() - started
+        try:
+            body = b"".join([chunk async for chunk in upstream_response.aiter_raw()])
+        finally:
+            await upstream_response.aclose()
+    except httpx.RequestError as exc:
+        _record_upstream(pool, dispatch, time.perf_counter() - started, None, span, exc)
+        raise
+    except BaseException as exc:
+        # Cancellation or anything else that isn't the upstream's fault: close the span, leave the breaker alone.
+        tracer.end_span(span, exc)
+        raise
+    finally:
+        pool.release(dispatch)
+    _record_upstream(pool, dispatch, elapsed, upstream_response.status_code, span)
+
+    now = time.time()
+    cache_control = upstream_response.headers.get("cache-control")
+    if upstream_response.status_code == 304 and stale is not None:
+        return replace(stale, expires_at=now + response_ttl(ttl, cache_control))
+
+    response_headers = downstream_response_headers(upstream_response.headers)
+    etag = upstream_response.headers.get("etag")
+    response_headers["etag"] = etag or body_etag(body)
+    return CachedResponse(
+        status_code=upstream_response.status_code,
+        headers=response_headers,
+        body=body,
+        etag=response_headers["etag"],
+        expires_at=now + (response_ttl(ttl, cache_control) if upstream_response.status_code == 200 else 0.0),
+        upstream_etag=etag is not None,
+    )
+
+
+async def _cached_proxy(request: Request, route: Route, target_path: str, subject: str, ttl: float) -> Response:
+    cache: ResponseCache = request.app.state.response_cache
+    key = (
+        request.method,
+        request.url.path,
+        tuple(sorted(request.query_params.multi_items())),
+        subject,
+        request.headers.get("accept-encoding", ""),
+    )
+    cached = await cache.load(key, lambda stale: _fetch_cacheable(request, route, target_path, ttl, stale))
+    if cached.status_code == 200 and etag_matches(request.headers.get("if-none-match"), cached.etag):
+        return Response(status_code=304, headers={"etag": cached.etag})
+    return Response(content=cached.body, status_code=cached.status_code, headers=cached.headers)
+
+
 @app.api_route("/api/{path:path}", methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"])
 async def proxy_to_auth(path: str, request: Request):
-    target_path = f"/auth/{path}" if not path.startswith("auth/") else f"/{path}"
     public_alias = f"/api/{path}"
 
+    matched = request.app.state.route_table.match(public_alias)
+    if matched is None:
+        raise HTTPException(status_code=404, detail="No route for path")
+    route, target_path = matched
+    request.scope["metrics_route"] = route.prefix
+
+    subject = ""
     if public_alias not in PUBLIC_PATHS:
-        token_payload = decode_access_token(request.headers.get("Authorization"))
+        token_payload = authenticate(request)
         # Basic role enforcement for admin routes in gateway layer.
         if public_alias.startswith("/api/admin/") and token_payload.get("role") != "admin":
             raise HTTPException(status_code=403, detail="Admin role required")
+        subject = token_payload["sub"]
 
-    target_url = f"{settings.auth_service_url}{target_path}"
-    content = await request.body()
-
-    headers = {
-        key: value
-        for key, value in request.headers.items()
-        if key.lower() not in {"host", "content-length"}
-    }
+    if request.method == "GET" and request.app.state.response_cache is not None:
+        ttl = settings.response_cache_ttl(public_alias)
+        directives = cache_directives(request.headers.get("cache-control"))
+        if ttl > 0 and "no-cache" not in directives and "no-store" not in directives:
+            return await _cached_proxy(request, route, target_path, subject, ttl)
 
-    async with httpx.AsyncClient(timeout=15.0) as client:
-        upstream = await client.request(
-            request.method,
-            target_url,
-            content=content,
-            headers=headers,
-            params=request.query_params,
-        )
+    pool: UpstreamPool = request.app.state.upstream_pools[route.upstream]
+    dispatch = pool.acquire()
 
-    response_headers = {
-        key: value
-        for key, value in upstream.headers.items()
-        if key.lower() not in {"content-encoding", "transfer-encoding", "connection"}
-    }
+    client: httpx.AsyncClient = request.app.state.http_client
+    headers = upstream_request_headers(request.headers)
+    span = _start_upstream_span(pool, dispatch, headers)
+    upstream_request = client.build_request(
+        request.method,
+        f"{dispatch.upstream.url}{target_path}",
+        content=request.stream() if has_request_body(request.headers) else None,
+        headers=headers,
+        params=request.query_params,
+    )
+    started = time.perf_counter()
+    try:
+        upstream_response = await client.send(upstream_request, stream=True)
+    except httpx.RequestError as exc:
+        _record_upstream(pool, dispatch, time.perf_counter() - started, None, span, exc)
+        pool.release(dispatch)
+        raise
+    except BaseException as exc:
+        tracer.end_span(span, exc)
+        pool.release(dispatch)
+        raise
+    _record_upstream(pool, dispatch, time.perf_counter() - started, upstream_response.status_code, span)
 
-    return Response(content=upstream.content, status_code=upstream.status_code, headers=response_headers)
+    body = _UpstreamBody(upstream_response, pool, dispatch)
+    return StreamingResponse(
+        body,
+        status_code=upstream_response.status_code,
+        headers=downstream_response_headers(upstream_response.headers),
+        background=BackgroundTask(body.finish),
+    )
 
 
 @app.exception_handler(httpx.RequestError)
 async def upstream_error_handler(_: Request, exc: httpx.RequestError):
-    return JSONResponse(status_code=502, content={"detail": f"Upstream unavailable: {exc}"})
+    return ORJSONResponse(status_code=502, content={"detail": f"Upstream unavailable: {exc}"})
+
+
+@app.exception_handler(NoHealthyUpstream)
+async def no_healthy_upstream_handler(_: Request, exc: NoHealthyUpstream):
+    return ORJSONResponse(status_code=503, content={"detail": str(exc)})
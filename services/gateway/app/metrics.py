@@ -0,0 +1,31 @@
+from prometheus_client import Histogram
+
+from services.common import metrics as common
+from services.common.metrics import (  # noqa: F401  (re-exported for this service's modules)
+    FAST_BUCKETS,
+    LATENCY_BUCKETS,
+    MetricsMiddleware,
+    metrics_response,
+    register_scrape_metric,
+)
+
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "gateway_http_request_duration_seconds",
+    "Request latency by matched route prefix.",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+UPSTREAM_SECONDS = Histogram(
+    "gateway_upstream_response_seconds",
+    "Time from dispatch to upstream response headers.",
+    ["upstream", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+REDIS_COMMAND_SECONDS = Histogram(
+    "gateway_redis_command_duration_seconds", "Redis round-trip latency.", ["command"], buckets=FAST_BUCKETS
+)
+
+
+class InstrumentedRedis(common.InstrumentedRedis):
+    command_seconds = REDIS_COMMAND_SECONDS
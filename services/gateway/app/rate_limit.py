@@ -0,0 +1,144 @@
+import asyncio
+import logging
+import math
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Window:
+    window_id: int
+    window_seconds: int
+    synced: int = 0
+    pending: int = 0
+    previous: int = 0
+
+
+@dataclass(frozen=True)
+class RateLimitDecision:
+    allowed: bool
+    retry_after: int = 0
+
+
+# Decisions use the cluster-wide count last read from Redis plus hits taken locally since,
+# so they never wait on the network; sync() pushes the deltas in one pipeline and reads back totals.
+class LocalAggregatingRateLimiter:
+    def __init__(self, redis_client: Redis | None, key_prefix: str = "gw-rl"):
+        self.redis = redis_client
+        self.key_prefix = key_prefix
+        self._windows: dict[str, _Window] = {}
+        self.rejected = 0
+
+    def _window(self, key: str, window_seconds: int, now: float) -> _Window:
+        window_id = int(now // window_seconds)
+        state = self._windows.get(key)
+        if state is None:
+            state = self._windows[key] = _Window(window_id, window_seconds)
+        elif state.window_id != window_id:
+            previous = state.synced + state.pending if state.window_id == window_id - 1 else 0
+            state = self._windows[key] = _Window(window_id, window_seconds, previous=previous)
+        return state
+
+    @staticmethod
+    def _estimate(state: _Window, now: float) -> float:
+        elapsed = now - state.window_id * state.window_seconds
+        weight = (state.window_seconds - elapsed) / state.window_seconds
+        return state.previous * weight + state.synced + state.pending
+
+    def _admit(self, checks: list[tuple[str, int, int]], now: float) -> tuple[list[_Window], RateLimitDecision | None]:
+        states = []
+        for key, limit, window_seconds in checks:
+            state = self._window(key, window_seconds, now)
+            if self._estimate(state, now) + 1 > limit:
+                self.rejected += 1
+                window_end = (state.window_id + 1) * state.window_seconds
+                return [], RateLimitDecision(allowed=False, retry_after=max(math.ceil(window_end - now), 1))
+            states.append(state)
+        return states, None
+
+    def hit(
+        self,
+        checks: list[tuple[str, int, int]],
+        now: float,
+        then: Callable[[], list[tuple[str, int, int]]] | None = None,
+    ) -> RateLimitDecision:
+        # `then` supplies checks that are costly to compute; it only runs once `checks` have all passed.
+        states, rejected = self._admit(checks, now)
+        if rejected is None and then is not None:
+            more, rejected = self._admit(then(), now)
+            states += more
+        if rejected is not None:
+            return rejected
+        for state in states:
+            state.pending += 1
+        return RateLimitDecision(allowed=True)
+
+    async def sync(self, now: float) -> None:
+        for key in [key for key, state in self._windows.items() if now >= (state.window_id + 2) * state.window_seconds]:
+            del self._windows[key]
+        if self.redis is None or not self._windows:
+            return
+
+        batch = [(key, state, state.pending) for key, state in self._windows.items()]
+        for _, state, sent in batch:
+            state.pending -= sent
+
+        pipe = self.redis.pipeline(transaction=False)
+        for key, state, sent in batch:
+            redis_key = f"{self.key_prefix}:{key}:{state.window_id}"
+            pipe.incrby(redis_key, sent)
+            pipe.expire(redis_key, state.window_seconds * 2)
+        try:
+            results = await pipe.execute()
+        except RedisError:
+            for _, state, sent in batch:
+                state.pending += sent
+            logger.warning("Gateway rate limit sync failed; deciding locally", exc_info=True)
+            return
+
+        for (key, state, _), total in zip(batch, results[::2]):
+            # A rollover during the await replaced the window; its successor starts from scratch.
+            if self._windows.get(key) is state:
+                state.synced = max(state.synced, int(total))
+
+    async def run_sync(self, interval_seconds: float, clock) -> None:
+        while True:
+            await asyncio.sleep(interval_seconds)
+            await self.sync(clock())
+
+
+class RateLimitMiddleware:
+    def __init__(self, app, limiter: LocalAggregatingRateLimiter, checks_for, clock, then_checks_for=None):
+        self.app = app
+        self.limiter = limiter
+        self.checks_for = checks_for
+        self.clock = clock
+        self.then_checks_for = then_checks_for
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request = Request(scope)
+        checks = self.checks_for(request)
+        then = (lambda: self.then_checks_for(request)) if self.then_checks_for is not None else None
+        decision = self.limiter.hit(checks, self.clock(), then) if checks else RateLimitDecision(allowed=True)
+        if decision.allowed:
+            await self.app(scope, receive, send)
+            return
+
+        response = JSONResponse(
+            status_code=429,
+            content={"detail": "Rate limit exceeded"},
+            headers={"Retry-After": str(decision.retry_after)},
+        )
+        await response(scope, receive, send)
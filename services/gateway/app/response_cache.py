@@ -0,0 +1,102 @@
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    status_code: int
+    headers: dict[str, str]
+    body: bytes
+    etag: str
+    expires_at: float
+    # Only upstream-issued ETags can be sent back upstream for revalidation.
+    upstream_etag: bool = False
+
+
+def cache_directives(value: str | None) -> dict[str, str | None]:
+    directives: dict[str, str | None] = {}
+    for part in (value or "").split(","):
+        name, _, arg = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = arg.strip('"') or None
+    return directives
+
+
+def response_ttl(route_ttl: float, cache_control: str | None) -> float:
+    # "private" is fine here: entries are keyed by subject, so they are never shared between users.
+    directives = cache_directives(cache_control)
+    if "no-store" in directives or "no-cache" in directives:
+        return 0.0
+    max_age = directives.get("s-maxage") or directives.get("max-age")
+    if max_age is not None and max_age.isdigit():
+        return min(route_ttl, float(max_age))
+    return route_ttl
+
+
+def body_etag(body: bytes) -> str:
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or etag.removeprefix("W/") in candidates
+
+
+class ResponseCache:
+    def __init__(self, max_size: int, max_body_bytes: int):
+        self.max_size = max_size
+        self.max_body_bytes = max_body_bytes
+        self._entries: OrderedDict[tuple, CachedResponse] = OrderedDict()
+        self._inflight: dict[tuple, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def put(self, key: tuple, entry: CachedResponse) -> None:
+        if len(entry.body) > self.max_body_bytes or self.max_size <= 0:
+            return
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def load(self, key: tuple, fetch: Callable[[CachedResponse | None], Awaitable[CachedResponse]]) -> CachedResponse:
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at > time.time():
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.misses += 1
+            # The fetch runs as its own task so one caller disconnecting doesn't fail the others.
+            task = asyncio.ensure_future(self._fill(key, fetch, entry))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    async def _fill(self, key: tuple, fetch, stale: CachedResponse | None) -> CachedResponse:
+        response = await fetch(stale)
+        if response.expires_at > time.time():
+            self.put(key, response)
+        else:
+            self._entries.pop(key, None)
+        return response
+
+    def _finish(self, key: tuple, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()
@@ -0,0 +1,85 @@
+import asyncio
+import json
+import logging
+import time
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+
+logger = logging.getLogger(__name__)
+
+# Published by the auth service (services/auth_service/app/services/revocation.py).
+REVOCATION_CHANNEL = "token-revocations"
+REVOKED_JTIS_KEY = "revoked:jti"
+USER_CUTOFFS_KEY = "revoked:users"
+
+
+class RevocationList:
+    def __init__(self, prune_interval_seconds: float = 30.0):
+        self.prune_interval_seconds = prune_interval_seconds
+        self._jtis: dict[str, float] = {}
+        # sub -> (tokens issued at or before this time are revoked, cutoff no longer needed after)
+        self._user_cutoffs: dict[str, tuple[float, float]] = {}
+        self._next_prune = 0.0
+
+    def __len__(self) -> int:
+        return len(self._jtis) + len(self._user_cutoffs)
+
+    def revoke_jti(self, jti: str, exp: float) -> None:
+        self._jtis[jti] = exp
+
+    def revoke_user(self, sub: str, before: float, expires: float) -> None:
+        current = self._user_cutoffs.get(sub)
+        if current is None or current[0] < before:
+            self._user_cutoffs[sub] = (before, expires)
+
+    def is_revoked(self, payload: dict, now: float) -> bool:
+        if now >= self._next_prune:
+            self.prune(now)
+        if self._jtis and payload.get("jti") in self._jtis:
+            return True
+        if self._user_cutoffs:
+            cutoff = self._user_cutoffs.get(payload.get("sub"))
+            if cutoff is not None and payload.get("iat", 0) <= cutoff[0]:
+                return True
+        return False
+
+    def prune(self, now: float) -> None:
+        self._next_prune = now + self.prune_interval_seconds
+        self._jtis = {jti: exp for jti, exp in self._jtis.items() if exp > now}
+        self._user_cutoffs = {sub: cutoff for sub, cutoff in self._user_cutoffs.items() if cutoff[1] > now}
+
+    def apply(self, message: dict) -> None:
+        if message.get("kind") == "jti":
+            self.revoke_jti(message["jti"], message["exp"])
+        elif message.get("kind") == "user":
+            self.revoke_user(message["sub"], message["before"], message["expires"])
+        elif message.get("kind") == "users":
+            for sub in message["subs"]:
+                self.revoke_user(sub, message["before"], message["expires"])
+
+    async def bootstrap(self, redis_client: Redis) -> None:
+        now = time.time()
+        for jti, exp in await redis_client.zrangebyscore(REVOKED_JTIS_KEY, now, "+inf", withscores=True):
+            self.revoke_jti(jti, exp)
+        for sub, raw in (await redis_client.hgetall(USER_CUTOFFS_KEY)).items():
+            cutoff = json.loads(raw)
+            self.revoke_user(sub, cutoff["before"], cutoff["expires"])
+        self.prune(now)
+
+    async def run_subscriber(self, redis_client: Redis) -> None:
+        while True:
+            try:
+                pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+                await pubsub.subscribe(REVOCATION_CHANNEL)
+                try:
+                    # Subscribe before reloading so nothing published in between is lost.
+                    await self.bootstrap(redis_client)
+                    async for message in pubsub.listen():
+                        self.apply(json.loads(message["data"]))
+                finally:
+                    await pubsub.aclose()
+            except RedisError:
+                logger.warning("Revocation feed disconnected; resubscribing", exc_info=True)
+                await asyncio.sleep(1)
@@ -0,0 +1,26 @@
+from dataclasses import dataclass
+
+from .config import RouteConfig
+
+
+@dataclass(frozen=True)
+class Route:
+    prefix: str
+    upstream: str
+    rewrite: str
+
+
+class RouteTable:
+    def __init__(self, routes: list[RouteConfig]):
+        # Longest prefix wins, so specific routes can shadow a catch-all like "/api/".
+        self.routes = sorted(
+            (Route(prefix=r.prefix, upstream=r.upstream, rewrite=r.rewrite) for r in routes),
+            key=lambda route: len(route.prefix),
+            reverse=True,
+        )
+
+    def match(self, path: str) -> tuple[Route, str] | None:
+        for route in self.routes:
+            if path.startswith(route.prefix):
+                return route, f"{route.rewrite}{path[len(route.prefix):]}"
+        return None
@@ -1,7 +1,13 @@
-from fastapi import Header, HTTPException, status
+import hashlib
+import time
+from collections import OrderedDict
+
+from fastapi import HTTPException, Request, status
 import jwt
 
 from .config import settings
+from .jwks import JWKSCache
+from .revocation import RevocationList
 
 
 PUBLIC_PATHS = {
@@ -12,17 +18,131 @@ PUBLIC_PATHS = {
 }
 
 
-def decode_access_token(auth_header: str | None) -> dict:
+class InvalidTokenType(jwt.InvalidTokenError):
+    pass
+
+
+class VerifiedTokenCache:
+    def __init__(self, max_size: int, max_ttl_seconds: int):
+        self.max_size = max_size
+        self.max_ttl_seconds = max_ttl_seconds
+        self._entries: OrderedDict[bytes, tuple[float, dict]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, digest: bytes, now: float) -> dict | None:
+        entry = self._entries.get(digest)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, payload = entry
+        if expires_at <= now:
+            del self._entries[digest]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(digest)
+        self.hits += 1
+        return payload
+
+    def put(self, digest: bytes, payload: dict, now: float) -> None:
+        expires_at = now + self.max_ttl_seconds
+        if isinstance(payload.get("exp"), (int, float)):
+            expires_at = min(expires_at, payload["exp"])
+        if expires_at <= now or self.max_size <= 0:
+            return
+        self._entries[digest] = (expires_at, payload)
+        self._entries.move_to_end(digest)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class TokenVerifier:
+    def __init__(self, secret: str, algorithm: str, cache: VerifiedTokenCache, jwks: JWKSCache | None = None):
+        # Resolve key bytes, algorithm list and decoder once instead of on every request.
+        self.key = secret.encode("utf-8")
+        self.algorithms = [algorithm]
+        self.cache = cache
+        self.jwks = jwks
+        self._decoder = jwt.PyJWT(options={"require": ["exp", "sub"]})
+
+    def _key_for(self, token: str):
+        if self.jwks is None:
+            return self.key
+        key = self.jwks.key_for(jwt.get_unverified_header(token).get("kid"))
+        if key is None:
+            raise jwt.InvalidTokenError("Unknown signing key")
+        return key
+
+    def verify(self, token: str) -> dict:
+        now = time.time()
+        digest = hashlib.sha256(token.encode("utf-8")).digest()
+        cached = self.cache.get(digest, now)
+        if cached is not None:
+            return dict(cached)
+
+        payload = self._decoder.decode(token, self._key_for(token), algorithms=self.algorithms)
+        if payload.get("type") != "access":
+            raise InvalidTokenType("Invalid token type")
+
+        self.cache.put(digest, payload, now)
+        return dict(payload)
+
+
+token_verifier = TokenVerifier(
+    settings.jwt_secret,
+    settings.jwt_algorithm,
+    VerifiedTokenCache(settings.token_cache_size, settings.token_cache_max_ttl_seconds),
+    None
+    if settings.jwt_algorithm.startswith("HS")
+    else JWKSCache(settings.resolved_jwks_url(), settings.jwks_refresh_interval_seconds),
+)
+
+revocation_list = RevocationList()
+
+
+def _verify_bearer(auth_header: str | None) -> dict:
     if not auth_header or not auth_header.lower().startswith("bearer "):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing bearer token")
 
     token = auth_header.split(" ", 1)[1]
     try:
-        payload = jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_algorithm])
-    except Exception as exc:
+        return token_verifier.verify(token)
+    except InvalidTokenType as exc:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token type") from exc
+    except jwt.PyJWTError as exc:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token") from exc
 
-    if payload.get("type") != "access":
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token type")
 
+def _reject_revoked(payload: dict) -> dict:
+    if revocation_list.is_revoked(payload, time.time()):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token revoked")
     return payload
+
+
+def decode_access_token(auth_header: str | None) -> dict:
+    return _reject_revoked(_verify_bearer(auth_header))
+
+
+def bearer_claims(request: Request) -> dict:
+    # Memoized on the request: the rate limiter reads the subject before routing and the route reuses it,
+    # so a token is verified, and counted in the token-cache stats, once per request.
+    outcome = getattr(request.state, "bearer_claims", None)
+    if outcome is None:
+        try:
+            outcome = _verify_bearer(request.headers.get("authorization"))
+        except HTTPException as exc:
+            outcome = exc
+        request.state.bearer_claims = outcome
+    if isinstance(outcome, HTTPException):
+        raise outcome
+    return outcome
+
+
+def authenticate(request: Request) -> dict:
+    return _reject_revoked(bearer_claims(request))
@@ -0,0 +1,203 @@
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass
+
+import httpx
+
+from .config import UpstreamPoolConfig, settings
+
+
+logger = logging.getLogger(__name__)
+
+HOP_BY_HOP_HEADERS = {
+    "connection",
+    "keep-alive",
+    "proxy-authenticate",
+    "proxy-authorization",
+    "te",
+    "trailer",
+    "trailers",
+    "transfer-encoding",
+    "upgrade",
+}
+
+BALANCERS = {"least_outstanding", "p2c"}
+
+
+class NoHealthyUpstream(Exception):
+    pass
+
+
+def build_http_client() -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=settings.upstream_max_connections,
+        max_keepalive_connections=settings.upstream_max_keepalive_connections,
+        keepalive_expiry=settings.upstream_keepalive_expiry_seconds,
+    )
+    timeout = httpx.Timeout(settings.upstream_timeout_seconds, connect=settings.upstream_connect_timeout_seconds)
+    return httpx.AsyncClient(limits=limits, timeout=timeout, http2=settings.upstream_http2)
+
+
+def upstream_request_headers(headers) -> dict[str, str]:
+    forwarded = {
+        key: value
+        for key, value in headers.items()
+        if key.lower() not in {"host", "accept-encoding"} and key.lower() not in HOP_BY_HOP_HEADERS
+    }
+    # Bodies are relayed raw, so the upstream may only use encodings the client itself accepts.
+    forwarded["accept-encoding"] = headers.get("accept-encoding") or "identity"
+    return forwarded
+
+
+def downstream_response_headers(headers) -> dict[str, str]:
+    return {key: value for key, value in headers.items() if key.lower() not in HOP_BY_HOP_HEADERS}
+
+
+def has_request_body(headers) -> bool:
+    return "content-length" in headers or "transfer-encoding" in headers
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+        # Bumped every time the breaker opens; outcomes of requests dispatched under an older generation
+        # say nothing about the upstream since then and are ignored.
+        self.generation = 0
+
+    def allows(self, now: float) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and now - self.opened_at >= self.reset_seconds:
+            self.state = self.HALF_OPEN
+            self.trial_in_flight = False
+        return self.state == self.HALF_OPEN and not self.trial_in_flight
+
+    def on_dispatch(self) -> bool:
+        if self.state == self.HALF_OPEN:
+            self.trial_in_flight = True
+            return True
+        return False
+
+    def on_release(self, trial: bool, generation: int) -> None:
+        if trial and generation == self.generation:
+            self.trial_in_flight = False
+
+    def record_success(self, generation: int | None = None) -> None:
+        if generation is not None and generation != self.generation:
+            return
+        self.state = self.CLOSED
+        self.failures = 0
+        self.trial_in_flight = False
+
+    def record_failure(self, now: float, generation: int | None = None) -> None:
+        if generation is not None and generation != self.generation:
+            return
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = now
+            self.trial_in_flight = False
+            self.generation += 1
+
+
+class Upstream:
+    def __init__(self, url: str, breaker: CircuitBreaker):
+        self.url = url.rstrip("/")
+        self.breaker = breaker
+        self.outstanding = 0
+        self.healthy = True
+
+    def available(self, now: float) -> bool:
+        return self.healthy and self.breaker.allows(now)
+
+
+@dataclass(frozen=True)
+class Dispatch:
+    upstream: Upstream
+    generation: int
+    trial: bool
+
+
+class UpstreamPool:
+    def __init__(self, name: str, config: UpstreamPoolConfig):
+        if config.balancer not in BALANCERS:
+            raise ValueError(f"Unknown balancer for pool={name}: {config.balancer}")
+        if not config.targets:
+            raise ValueError(f"Upstream pool={name} has no targets")
+        self.name = name
+        self.balancer = config.balancer
+        self.health_path = config.health_path
+        self.upstreams = [
+            Upstream(url, CircuitBreaker(settings.circuit_failure_threshold, settings.circuit_reset_seconds))
+            for url in config.targets
+        ]
+
+    def acquire(self) -> Dispatch:
+        now = time.monotonic()
+        candidates = [upstream for upstream in self.upstreams if upstream.available(now)]
+        if not candidates:
+            raise NoHealthyUpstream(f"No healthy upstream for pool={self.name}")
+
+        if self.balancer == "p2c" and len(candidates) > 1:
+            first, second = random.sample(candidates, 2)
+            chosen = first if first.outstanding <= second.outstanding else second
+        else:
+            fewest = min(upstream.outstanding for upstream in candidates)
+            chosen = random.choice([upstream for upstream in candidates if upstream.outstanding == fewest])
+
+        generation = chosen.breaker.generation
+        trial = chosen.breaker.on_dispatch()
+        chosen.outstanding += 1
+        return Dispatch(chosen, generation, trial)
+
+    def record(self, dispatch: Dispatch, ok: bool) -> None:
+        breaker = dispatch.upstream.breaker
+        if ok:
+            breaker.record_success(dispatch.generation)
+        else:
+            breaker.record_failure(time.monotonic(), dispatch.generation)
+
+    def release(self, dispatch: Dispatch) -> None:
+        dispatch.upstream.outstanding -= 1
+        dispatch.upstream.breaker.on_release(dispatch.trial, dispatch.generation)
+
+    async def check_health(self, client: httpx.AsyncClient) -> None:
+        async def probe(upstream: Upstream) -> None:
+            try:
+                response = await client.get(
+                    f"{upstream.url}{self.health_path}", timeout=settings.health_check_timeout_seconds
+                )
+                upstream.healthy = response.status_code < 500
+            except httpx.HTTPError:
+                upstream.healthy = False
+
+        await asyncio.gather(*(probe(upstream) for upstream in self.upstreams))
+
+
+def build_upstream_pools() -> dict[str, UpstreamPool]:
+    return {name: UpstreamPool(name, config) for name, config in settings.upstream_pools().items()}
+
+
+async def run_health_checks(pools: dict[str, UpstreamPool], client: httpx.AsyncClient) -> None:
+    while True:
+        await asyncio.sleep(settings.health_check_interval_seconds)
+        try:
+            await asyncio.gather(*(pool.check_health(client) for pool in pools.values()))
+        except Exception:
+            # One bad round must not end health checking for the life of the process.
+            logger.exception("Upstream health check round failed")
+
+
+def is_upstream_failure(status_code: int) -> bool:
+    return status_code in {502, 503, 504}
@@ -0,0 +1,44 @@
+from datetime import datetime
+
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from services.auth_service.app import deps
+from services.auth_service.app.db import Base, get_db
+from services.auth_service.app.main import app
+from services.auth_service.app.services.user_cache import UserSnapshot
+
+
+@pytest_asyncio.fixture
+async def session_factory():
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    await engine.dispose()
+
+
+@pytest.fixture
+def current_user() -> UserSnapshot:
+    # Override in a test module to call the endpoints as someone else.
+    return UserSnapshot("admin-1", "admin@example.com", "admin", True, datetime(2024, 1, 1))
+
+
+@pytest.fixture
+def app_overrides(session_factory, current_user):
+    async def override_db():
+        async with session_factory() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_db
+    app.dependency_overrides[deps.get_current_user] = lambda: current_user
+    yield app.dependency_overrides
+    app.dependency_overrides.clear()
+
+
+@pytest_asyncio.fixture
+async def client(app_overrides):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://auth") as client:
+        yield client
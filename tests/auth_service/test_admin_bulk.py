@@ -0,0 +1,114 @@
+import time
+from datetime import datetime, timedelta
+
+import fakeredis
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+
+from services.auth_service.app import deps
+from services.auth_service.app.main import app
+from services.auth_service.app.models import AuditEvent, RefreshToken, User
+from services.auth_service.app.security import create_access_token
+from services.auth_service.app.services.revocation import RevocationPublisher
+from services.auth_service.app.services.user_cache import UserSnapshot, UserSnapshotCache
+
+
+@pytest_asyncio.fixture
+async def admin(session_factory) -> User:
+    async with session_factory() as db:
+        admin = User(email="admin@example.com", password_hash="x", role="admin")
+        db.add(admin)
+        await db.commit()
+    return admin
+
+
+@pytest.fixture
+def current_user(admin) -> UserSnapshot:
+    return UserSnapshot(admin.id, admin.email, "admin", True, admin.created_at)
+
+
+@pytest.fixture
+def admin_client(client, admin, monkeypatch):
+    redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+    monkeypatch.setattr(deps, "_user_cache", UserSnapshotCache(redis, max_size=100, ttl_seconds=30, redis_ttl_seconds=300))
+    monkeypatch.setattr(deps, "_revocation_publisher", RevocationPublisher(redis, 900, 7 * 86400))
+    return client, redis, admin
+
+
+async def _seed(session_factory, count: int, **fields) -> list[str]:
+    async with session_factory() as db:
+        users = [User(email=f"u{i}-{time.monotonic_ns()}@example.com", password_hash="x", **fields) for i in range(count)]
+        db.add_all(users)
+        await db.flush()
+        for user in users:
+            db.add(RefreshToken(user_id=user.id, token_jti=f"jti-{user.id}", expires_at=datetime.utcnow() + timedelta(days=1)))
+        await db.commit()
+        return [user.id for user in users]
+
+
+@pytest.mark.asyncio
+async def test_bulk_session_revocation_is_set_based_and_pushed_out(session_factory, admin_client):
+    client, redis, _ = admin_client
+    user_ids = await _seed(session_factory, 3)
+
+    response = await client.post("/admin/users/sessions/revoke", json={"role": "user"})
+
+    assert response.json() == {"affected_users": 3}
+    publisher = deps.get_revocation_publisher()
+    issued = {"sub": user_ids[0], "jti": "x", "iat": int(time.time()) - 10}
+    assert await publisher.is_revoked(issued)
+    # Refresh tokens fall to the same cutoff, whichever store holds them.
+    assert await publisher.session_revoked({**issued, "type": "refresh"})
+    async with session_factory() as db:
+        events = list(await db.scalars(select(AuditEvent).where(AuditEvent.action == "users_bulk_sessions_revoked")))
+    assert len(events) == 1
+
+
+@pytest.mark.asyncio
+async def test_bulk_deactivate_role_change_and_activate(session_factory, admin_client):
+    client, redis, admin = admin_client
+    user_ids = await _seed(session_factory, 2)
+    cache = deps.get_user_cache()
+    async with session_factory() as db:
+        for user in await db.scalars(select(User).where(User.id.in_(user_ids))):
+            await cache.put(UserSnapshot.from_user(user))
+
+    # The acting admin is excluded even though the filter would match them.
+    response = await client.post("/admin/users/deactivate", json={"created_after": "2000-01-01T00:00:00"})
+    assert response.json()["affected_users"] == 2
+    assert await cache.get(user_ids[0]) is None
+
+    response = await client.post("/admin/users/role", json={"user_ids": user_ids, "new_role": "admin"})
+    assert response.json()["affected_users"] == 2
+    response = await client.post("/admin/users/activate", json={"user_ids": [*user_ids, admin.id]})
+    assert response.json()["affected_users"] == 2
+
+    async with session_factory() as db:
+        users = {user.id: user for user in await db.scalars(select(User))}
+    assert all(users[user_id].is_active and users[user_id].role == "admin" for user_id in user_ids)
+    assert users[admin.id].is_active
+
+
+@pytest.mark.asyncio
+async def test_bulk_actions_require_a_criterion(admin_client):
+    client, _, _ = admin_client
+
+    response = await client.post("/admin/users/deactivate", json={})
+
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_revoked_sessions_are_rejected_by_the_auth_service_itself(session_factory, admin_client):
+    client, _, admin = admin_client
+    app.dependency_overrides.pop(deps.get_current_user)
+    admin_headers = {"Authorization": f"Bearer {create_access_token(admin.id, 'admin')}"}
+    (user_id,) = await _seed(session_factory, 1)
+    user_headers = {"Authorization": f"Bearer {create_access_token(user_id, 'user')}"}
+    assert (await client.get("/auth/me", headers=user_headers)).status_code == 200
+
+    await client.post("/admin/users/sessions/revoke", json={"user_ids": [user_id]}, headers=admin_headers)
+
+    assert (await client.get("/auth/me", headers=user_headers)).status_code == 401
+    assert (await client.get("/auth/me", headers=admin_headers)).status_code == 200
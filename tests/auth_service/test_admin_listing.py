@@ -0,0 +1,131 @@
+import base64
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+
+from services.auth_service.app.models import AuditEvent, User
+from services.auth_service.app.routers import admin as admin_router
+
+
+BASE = datetime(2024, 5, 1, 12, 0)
+
+
+@pytest.fixture(autouse=True)
+def export_sessions(session_factory, monkeypatch):
+    # The export streams from its own session rather than the request-scoped one.
+    monkeypatch.setattr(admin_router, "SessionLocal", session_factory)
+
+
+@pytest_asyncio.fixture
+async def users(session_factory):
+    async with session_factory() as db:
+        db.add_all(
+            [
+                User(
+                    id=f"user-{i}",
+                    email=f"u{i}@example.com",
+                    password_hash="x",
+                    role="admin" if i == 0 else "user",
+                    is_active=i != 4,
+                    created_at=BASE + timedelta(minutes=i),
+                )
+                for i in range(5)
+            ]
+        )
+        await db.commit()
+
+
+@pytest_asyncio.fixture
+async def events(session_factory):
+    async with session_factory() as db:
+        db.add_all(
+            [
+                AuditEvent(
+                    user_id=f"user-{i % 2}",
+                    action="login_success" if i % 3 else "login_failed",
+                    detail=f"event {i}",
+                    ip_address="10.0.0.1",
+                    created_at=BASE + timedelta(minutes=i),
+                )
+                for i in range(7)
+            ]
+        )
+        await db.commit()
+
+
+async def _all_pages(client: AsyncClient, path: str, **params) -> list[list[dict]]:
+    pages, cursor = [], None
+    while True:
+        response = await client.get(path, params={**params, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        body = response.json()
+        pages.append(body["items"])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+def _cursor(position: list) -> str:
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode().rstrip("=")
+
+
+@pytest.mark.asyncio
+async def test_list_users_pages_newest_first_and_filters(client, users):
+    pages = await _all_pages(client, "/admin/users", limit=2)
+
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert [user["id"] for page in pages for user in page] == [f"user-{i}" for i in reversed(range(5))]
+
+    active_users = await _all_pages(client, "/admin/users", role="user", is_active="true")
+    assert [user["id"] for user in active_users[0]] == ["user-3", "user-2", "user-1"]
+
+
+@pytest.mark.asyncio
+async def test_list_audit_events_pages_and_filters(client, events):
+    pages = await _all_pages(client, "/admin/audit", limit=3)
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert [event["detail"] for page in pages for event in page] == [f"event {i}" for i in reversed(range(7))]
+
+    (failed,) = await _all_pages(client, "/admin/audit", action="login_failed", user_id="user-0")
+    assert [event["detail"] for event in failed] == ["event 6", "event 0"]
+
+    (window,) = await _all_pages(
+        client, "/admin/audit", since=(BASE + timedelta(minutes=2)).isoformat(), until=(BASE + timedelta(minutes=4)).isoformat()
+    )
+    assert [event["detail"] for event in window] == ["event 3", "event 2"]
+
+
+@pytest.mark.asyncio
+async def test_cursor_with_the_wrong_id_type_is_rejected(client, users, events):
+    users_response = await client.get("/admin/users", params={"cursor": _cursor([BASE.isoformat(), 7])})
+    audit_response = await client.get("/admin/audit", params={"cursor": _cursor([BASE.isoformat(), "7"])})
+
+    assert users_response.status_code == 400
+    assert audit_response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_export_streams_ndjson_and_csv(client, events):
+    response = await client.get("/admin/audit/export", params={"action": "login_success"})
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["detail"] for row in rows] == ["event 5", "event 4", "event 2", "event 1"]
+
+    response = await client.get("/admin/audit/export", params={"format": "csv", "user_id": "user-1"})
+    assert response.headers["content-type"].startswith("text/csv")
+    assert 'filename="audit-events.csv"' in response.headers["content-disposition"]
+    header, *rows = list(csv.reader(io.StringIO(response.text)))
+    assert header == ["id", "user_id", "action", "detail", "ip_address", "created_at"]
+    assert [row[3] for row in rows] == ["event 5", "event 3", "event 1"]
+
+
+@pytest.mark.asyncio
+async def test_empty_csv_export_still_has_a_header(client):
+    response = await client.get("/admin/audit/export", params={"format": "csv"})
+
+    assert list(csv.reader(io.StringIO(response.text))) == [["id", "user_id", "action", "detail", "ip_address", "created_at"]]
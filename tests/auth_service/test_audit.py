@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+
+from services.auth_service.app.services.audit import AuditWriter
+
+
+class FakeSession:
+    def __init__(self, batches: list, release: asyncio.Event | None = None):
+        self.batches = batches
+        self.release = release
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, _statement, rows):
+        if self.release is not None:
+            await self.release.wait()
+        self.batches.append(list(rows))
+
+    async def commit(self):
+        return None
+
+
+def _event(n: int) -> dict:
+    return {"user_id": None, "action": f"event-{n}", "detail": "", "ip_address": None}
+
+
+@pytest.mark.asyncio
+async def test_audit_writer_flushes_in_batches_and_drains_on_stop():
+    batches = []
+    writer = AuditWriter(lambda: FakeSession(batches), queue_size=100, batch_size=2, flush_interval_seconds=5, overflow_policy="block")
+    writer.start()
+
+    for n in range(5):
+        await writer.submit(_event(n))
+    await writer.stop(timeout=5)
+
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert [event["action"] for batch in batches for event in batch] == [f"event-{n}" for n in range(5)]
+
+
+@pytest.mark.asyncio
+async def test_audit_writer_drop_oldest_keeps_newest_events():
+    batches = []
+    writer = AuditWriter(lambda: FakeSession(batches), queue_size=2, batch_size=10, flush_interval_seconds=5, overflow_policy="drop_oldest")
+    writer.start()
+
+    for n in range(4):
+        await writer.submit(_event(n))
+    await writer.stop(timeout=5)
+
+    assert writer.dropped == 2
+    assert [event["action"] for batch in batches for event in batch] == ["event-2", "event-3"]
+
+
+@pytest.mark.asyncio
+async def test_audit_writer_stop_is_bounded_when_the_queue_is_full_and_the_database_stalls():
+    stalled = asyncio.Event()
+    writer = AuditWriter(lambda: FakeSession([], stalled), queue_size=2, batch_size=1, flush_interval_seconds=5, overflow_policy="block")
+    writer.start()
+    for n in range(3):
+        await writer.submit(_event(n))
+    await asyncio.sleep(0)
+    assert writer.queue.full()
+
+    await asyncio.wait_for(writer.stop(timeout=0.1), 1)
+
+    assert not writer.running
+
+
+@pytest.mark.asyncio
+async def test_audit_writer_drop_oldest_never_drops_the_stop_sentinel():
+    batches = []
+    release = asyncio.Event()
+    writer = AuditWriter(lambda: FakeSession(batches, release), queue_size=1, batch_size=1, flush_interval_seconds=5, overflow_policy="drop_oldest")
+    writer.start()
+    await writer.submit(_event(0))
+    await asyncio.sleep(0)
+    stopping = asyncio.create_task(writer.stop(timeout=5))
+    await asyncio.sleep(0.01)
+    assert writer.queue.full()
+
+    await writer.submit(_event(1))
+    release.set()
+    await asyncio.wait_for(stopping, 1)
+
+    assert writer.dropped == 1
+    assert [event["action"] for batch in batches for event in batch] == ["event-0"]
@@ -0,0 +1,69 @@
+import os
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from services.auth_service.app.models import AuditEvent
+from services.auth_service.app.services.maintenance import create_partitioned_audit_table, enforce_audit_retention
+
+
+POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL")
+NOW = datetime(2024, 6, 15)
+
+pytestmark = [
+    pytest.mark.postgres,
+    pytest.mark.skipif(not POSTGRES_URL, reason="set TEST_POSTGRES_URL to a disposable database"),
+]
+
+
+@pytest_asyncio.fixture
+async def engine():
+    engine = create_async_engine(POSTGRES_URL)
+    async with engine.begin() as conn:
+        await conn.execute(text("DROP TABLE IF EXISTS audit_events CASCADE"))
+        await create_partitioned_audit_table(conn, now=NOW)
+    yield engine
+    async with engine.begin() as conn:
+        await conn.execute(text("DROP TABLE IF EXISTS audit_events CASCADE"))
+    await engine.dispose()
+
+
+async def _partitions(engine) -> dict[str, int]:
+    async with engine.connect() as conn:
+        names = await conn.scalars(
+            text(
+                "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                "JOIN pg_class p ON p.oid = i.inhparent WHERE p.relname = 'audit_events'"
+            )
+        )
+        return {name: await conn.scalar(text(f"SELECT count(*) FROM {name}")) for name in names}
+
+
+@pytest.mark.asyncio
+async def test_monthly_partitions_exist_from_creation(engine):
+    partitions = await _partitions(engine)
+
+    assert {"audit_events_default", "audit_events_p202406", "audit_events_p202407", "audit_events_p202408"} <= set(partitions)
+
+
+@pytest.mark.asyncio
+async def test_rotation_moves_default_rows_into_new_partition_and_drops_expired(engine):
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    later = NOW + timedelta(days=120)
+    async with session_factory() as db:
+        # October has no partition yet, so this lands in the default partition.
+        db.add_all([AuditEvent(action="login", detail="", created_at=later) for _ in range(3)])
+        db.add(AuditEvent(action="login", detail="", created_at=NOW))
+        await db.commit()
+
+    await enforce_audit_retention(session_factory, later, timedelta(days=30), batch_size=100, max_batches=10)
+
+    partitions = await _partitions(engine)
+    assert partitions["audit_events_p202410"] == 3
+    assert partitions["audit_events_default"] == 0
+    assert "audit_events_p202406" not in partitions
+    async with session_factory() as db:
+        assert await db.scalar(select(func.count()).select_from(AuditEvent)) == 3
@@ -0,0 +1,28 @@
+from benchmarks.report import LoadResult, check, compare
+
+
+def test_load_result_reports_percentiles():
+    result = LoadResult("me", requests=100, errors=0, seconds=2.0, latencies_ms=[float(i) for i in range(1, 101)])
+
+    metrics = result.as_dict()
+
+    assert metrics["rps"] == 50.0
+    assert (metrics["p50_ms"], metrics["p95_ms"], metrics["p99_ms"]) == (50.0, 95.0, 99.0)
+
+
+def test_compare_flags_only_regressions_past_tolerance():
+    baseline = {"me": {"rps": 1000.0, "p99_ms": 10.0}, "decode": {"ns_per_op": 1000}}
+    results = {"me": {"rps": 900.0, "p99_ms": 13.0}, "decode": {"ns_per_op": 1100}, "new": {"rps": 1.0}}
+
+    assert compare(results, baseline, tolerance=0.25) == ["me.p99_ms: 13.0 vs baseline 10.0 (tolerance 25%)"]
+
+
+def test_check_fails_without_a_baseline_unless_explicitly_allowed(capsys):
+    results = {"me": {"rps": 900.0}}
+
+    assert check(results, None, tolerance=0.25) == 2
+    assert "ERROR: no saved baseline" in capsys.readouterr().err
+    assert check(results, None, tolerance=0.25, allow_missing=True) == 0
+    assert "WARNING" in capsys.readouterr().err
+    assert check(results, {"me": {"rps": 1000.0}}, tolerance=0.25) == 0
+    assert check(results, {"me": {"rps": 2000.0}}, tolerance=0.25) == 1
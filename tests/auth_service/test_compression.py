@@ -0,0 +1,56 @@
+import gzip
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from services.auth_service.app.compression import CompressionMiddleware, negotiate_encoding
+
+
+app = FastAPI()
+app.add_middleware(CompressionMiddleware, minimum_size=100)
+
+
+@app.get("/small")
+def small():
+    return PlainTextResponse("tiny")
+
+
+@app.get("/large")
+def large():
+    return PlainTextResponse("x" * 1000)
+
+
+@app.get("/stream")
+def stream():
+    return StreamingResponse(iter([b"a" * 10, b"b" * 10]), media_type="text/plain")
+
+
+def test_negotiate_encoding_respects_quality_values():
+    assert negotiate_encoding("gzip, deflate") == "gzip"
+    assert negotiate_encoding("gzip;q=0, identity") is None
+    assert negotiate_encoding("") is None
+
+
+def test_compresses_only_bodies_over_threshold():
+    client = TestClient(app)
+
+    small_response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    large_response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+    plain_response = client.get("/large", headers={"Accept-Encoding": "identity"})
+
+    assert "content-encoding" not in small_response.headers
+    assert large_response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in large_response.headers["vary"]
+    assert int(large_response.headers["content-length"]) < 1000
+    assert large_response.text == "x" * 1000
+    assert "content-encoding" not in plain_response.headers
+
+
+def test_compresses_streamed_bodies_incrementally():
+    with TestClient(app).stream("GET", "/stream", headers={"Accept-Encoding": "gzip"}) as response:
+        raw = b"".join(response.iter_raw())
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert gzip.decompress(raw) == b"a" * 10 + b"b" * 10
@@ -0,0 +1,23 @@
+from services.auth_service.app import db
+from services.auth_service.app.config import settings
+from services.auth_service.app.metrics import TimedQueuePool
+
+
+def test_postgres_urls_get_the_tuned_pool(monkeypatch):
+    monkeypatch.setattr(settings, "database_url", "postgresql+psycopg://auth:auth@db:5432/auth")
+
+    options = db._engine_options()
+
+    assert options["poolclass"] is TimedQueuePool
+    assert options["pool_size"] == settings.db_pool_size
+    assert options["max_overflow"] == settings.db_max_overflow
+    assert options["pool_recycle"] == settings.db_pool_recycle_seconds
+    assert options["pool_timeout"] == settings.db_pool_timeout_seconds
+    assert options["connect_args"] == {"options": f"-c statement_timeout={settings.db_statement_timeout_ms}"}
+    assert options["pool_pre_ping"]
+
+
+def test_sqlite_urls_keep_the_driver_defaults(monkeypatch):
+    monkeypatch.setattr(settings, "database_url", "sqlite+aiosqlite:///./auth.db")
+
+    assert db._engine_options() == {"pool_pre_ping": True}
@@ -1,7 +1,7 @@
 import pytest
 from fastapi import HTTPException
 
-from services.gateway.app.security import decode_access_token
+from services.gateway.app.security import VerifiedTokenCache, decode_access_token, token_verifier
 from services.auth_service.app.security import create_access_token
 
 
@@ -18,3 +18,22 @@ def test_gateway_accepts_valid_access_token():
 
     assert payload["sub"] == "user-42"
     assert payload["type"] == "access"
+
+
+def test_gateway_caches_verified_tokens():
+    token = create_access_token("user-7", role="user")
+    hits = token_verifier.cache.hits
+
+    decode_access_token(f"Bearer {token}")
+    decode_access_token(f"Bearer {token}")
+
+    assert token_verifier.cache.hits == hits + 1
+
+
+def test_token_cache_drops_entries_at_expiry():
+    cache = VerifiedTokenCache(max_size=2, max_ttl_seconds=300)
+    cache.put(b"a", {"exp": 100}, now=50)
+
+    assert cache.get(b"a", now=99) == {"exp": 100}
+    assert cache.get(b"a", now=100) is None
+    assert len(cache) == 0
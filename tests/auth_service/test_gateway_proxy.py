@@ -0,0 +1,60 @@
+import json
+
+import httpx
+from fastapi.testclient import TestClient
+
+from services.auth_service.app.security import create_access_token
+from services.gateway.app.main import app
+
+
+async def _upstream(request: httpx.Request) -> httpx.Response:
+    body = json.dumps({"path": request.url.path, "body": (await request.aread()).decode()}).encode()
+
+    async def chunks():
+        yield body[:5]
+        yield body[5:]
+
+    return httpx.Response(200, headers={"content-type": "application/json", "connection": "keep-alive"}, content=chunks())
+
+
+def test_gateway_streams_request_and_response_through_shared_client():
+    with TestClient(app) as client:
+        app.state.http_client = httpx.AsyncClient(transport=httpx.MockTransport(_upstream))
+        response = client.post("/api/auth/login", json={"email": "a@example.com", "password": "x"})
+
+    assert response.status_code == 200
+    assert response.json()["path"] == "/auth/login"
+    assert json.loads(response.json()["body"]) == {"email": "a@example.com", "password": "x"}
+    assert "connection" not in response.headers
+
+
+def test_gateway_forwards_authorized_get_without_body():
+    token = create_access_token("user-1", role="user")
+    with TestClient(app) as client:
+        app.state.http_client = httpx.AsyncClient(transport=httpx.MockTransport(_upstream))
+        response = client.get("/api/me", headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == 200
+    assert response.json() == {"path": "/auth/me", "body": ""}
+
+
+class _BrokenStream(httpx.AsyncByteStream):
+    def __init__(self):
+        self.closed = False
+
+    async def __aiter__(self):
+        yield b'{"partial":'
+        raise httpx.ReadError("upstream reset")
+
+    async def aclose(self) -> None:
+        self.closed = True
+
+
+def test_gateway_releases_the_upstream_when_the_body_fails_mid_stream():
+    stream = _BrokenStream()
+    with TestClient(app, raise_server_exceptions=False) as client:
+        app.state.http_client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, stream=stream)))
+        client.post("/api/auth/login", json={"email": "a@example.com", "password": "x"})
+
+    assert stream.closed
+    assert all(upstream.outstanding == 0 for pool in app.state.upstream_pools.values() for upstream in pool.upstreams)
@@ -0,0 +1,103 @@
+import fakeredis
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+
+from services.auth_service.app.security import create_access_token
+from services.gateway.app.config import settings
+from services.gateway.app.main import app, client_ip, rate_limit_checks
+from services.gateway.app.rate_limit import LocalAggregatingRateLimiter
+from services.gateway.app.security import token_verifier
+
+
+def test_local_limiter_decides_without_redis():
+    limiter = LocalAggregatingRateLimiter(None)
+    checks = [("ip:1.2.3.4", 2, 60)]
+
+    assert limiter.hit(checks, now=0).allowed
+    assert limiter.hit(checks, now=1).allowed
+
+    decision = limiter.hit(checks, now=2)
+    assert not decision.allowed
+    assert decision.retry_after == 58
+
+
+def test_rejected_check_does_not_consume_other_limits():
+    limiter = LocalAggregatingRateLimiter(None)
+
+    limiter.hit([("route:/api/auth/login:ip", 1, 60)], now=0)
+    assert not limiter.hit([("ip:ip", 5, 60), ("route:/api/auth/login:ip", 1, 60)], now=1).allowed
+
+    assert limiter.hit([("ip:ip", 1, 60)], now=2).allowed
+
+
+def test_subject_checks_are_resolved_only_after_the_ip_bucket_admits():
+    limiter = LocalAggregatingRateLimiter(None)
+    limiter.hit([("ip:ip", 1, 60)], now=0)
+
+    def subject_checks():
+        raise AssertionError("the token should not be looked at")
+
+    assert not limiter.hit([("ip:ip", 1, 60)], now=1, then=subject_checks).allowed
+    assert not limiter.hit([("ip:other", 5, 60)], now=1, then=lambda: [("sub:user-1", 0, 60)]).allowed
+    # The rejected subject check left the IP bucket untouched.
+    assert limiter.hit([("ip:other", 1, 60)], now=2).allowed
+
+
+def test_a_proxied_request_verifies_its_token_once():
+    token = create_access_token("user-1", role="user")
+    token_verifier.cache.clear()
+    lookups = token_verifier.cache.hits + token_verifier.cache.misses
+    with TestClient(app) as client:
+        app.state.http_client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, stream=httpx.ByteStream(b"{}"))))
+        response = client.get("/api/me", headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == 200
+    assert token_verifier.cache.hits + token_verifier.cache.misses == lookups + 1
+
+
+@pytest.mark.asyncio
+async def test_gateways_share_counts_after_sync():
+    redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+    first = LocalAggregatingRateLimiter(redis)
+    second = LocalAggregatingRateLimiter(redis)
+    checks = [("sub:user-1", 3, 60)]
+
+    assert first.hit(checks, now=0).allowed
+    assert first.hit(checks, now=0).allowed
+    assert second.hit(checks, now=0).allowed
+    await first.sync(now=1)
+    await second.sync(now=1)
+
+    assert not second.hit(checks, now=2).allowed
+
+
+def _request(peer: str, headers: dict[str, str]) -> Request:
+    return Request(
+        {
+            "type": "http",
+            "method": "POST",
+            "path": "/api/auth/login",
+            "headers": [(name.lower().encode(), value.encode()) for name, value in headers.items()],
+            "client": (peer, 50000),
+        }
+    )
+
+
+def test_spoofed_forwarding_headers_do_not_change_the_bucket(monkeypatch):
+    monkeypatch.setattr(settings, "trust_proxy_headers", True)
+    monkeypatch.setattr(settings, "trusted_proxies", ["10.0.0.10/32"])
+    monkeypatch.setattr(settings, "trusted_proxy_hops", 1)
+    spoofed = {"X-Forwarded-For": "6.6.6.6", "X-Real-IP": "7.7.7.7"}
+
+    # Straight to the gateway: the headers are the client's own and are ignored.
+    assert client_ip(_request("203.0.113.5", spoofed)) == "203.0.113.5"
+    # Through nginx, which appends the address it saw; the client's prefix is ignored.
+    via_proxy = _request("10.0.0.10", {"X-Forwarded-For": "6.6.6.6, 203.0.113.5", "X-Real-IP": "7.7.7.7"})
+    assert client_ip(via_proxy) == "203.0.113.5"
+    assert rate_limit_checks(via_proxy)[0][0] == "ip:203.0.113.5"
+
+
+def test_proxy_headers_are_ignored_by_default():
+    assert client_ip(_request("203.0.113.5", {"X-Forwarded-For": "6.6.6.6"})) == "203.0.113.5"
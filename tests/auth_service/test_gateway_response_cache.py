@@ -0,0 +1,68 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from services.auth_service.app.security import create_access_token
+from services.gateway.app.main import app
+from services.gateway.app.response_cache import CachedResponse, ResponseCache, etag_matches, response_ttl
+
+
+def test_response_ttl_honors_upstream_cache_control():
+    assert response_ttl(5.0, None) == 5.0
+    assert response_ttl(5.0, "private, max-age=2") == 2.0
+    assert response_ttl(5.0, "no-store") == 0.0
+    assert etag_matches('W/"abc", "def"', '"abc"')
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_fetch():
+    cache = ResponseCache(max_size=10, max_body_bytes=1024)
+    calls = 0
+
+    async def fetch(stale):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return CachedResponse(200, {}, b"{}", '"e"', time.time() + 5)
+
+    results = await asyncio.gather(*(cache.load(("GET", "/api/me"), fetch) for _ in range(20)))
+
+    assert calls == 1
+    assert cache.coalesced == 19
+    assert all(result is results[0] for result in results)
+    assert await cache.load(("GET", "/api/me"), fetch) is results[0]
+    assert calls == 1
+
+
+def test_gateway_serves_cached_me_per_subject_with_etag():
+    calls = []
+
+    async def upstream(request: httpx.Request) -> httpx.Response:
+        calls.append(request.headers.get("authorization"))
+
+        async def body():
+            yield b'{"id": "x"}'
+
+        return httpx.Response(200, headers={"content-type": "application/json"}, content=body())
+
+    first = {"Authorization": f"Bearer {create_access_token('user-1', role='user')}"}
+    second = {"Authorization": f"Bearer {create_access_token('user-2', role='user')}"}
+    with TestClient(app) as client:
+        app.state.http_client = httpx.AsyncClient(transport=httpx.MockTransport(upstream))
+        app.state.response_cache = ResponseCache(max_size=10, max_body_bytes=1024)
+        try:
+            response = client.get("/api/me", headers=first)
+            cached = client.get("/api/me", headers=first)
+            revalidated = client.get("/api/me", headers={**first, "If-None-Match": response.headers["etag"]})
+            client.get("/api/me", headers=second)
+            client.get("/api/me", headers={**first, "Cache-Control": "no-cache"})
+        finally:
+            app.state.response_cache = None
+
+    assert cached.json() == {"id": "x"}
+    assert cached.headers["etag"] == response.headers["etag"]
+    assert revalidated.status_code == 304
+    assert len(calls) == 3
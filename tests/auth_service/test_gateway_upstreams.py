@@ -0,0 +1,121 @@
+import asyncio
+import contextlib
+
+import pytest
+
+from services.gateway.app.config import DEFAULT_ROUTES, UpstreamPoolConfig, settings
+from services.gateway.app.routing import RouteTable
+from services.gateway.app.upstream import CircuitBreaker, Dispatch, NoHealthyUpstream, UpstreamPool, run_health_checks
+
+
+def test_route_table_prefers_longest_prefix():
+    table = RouteTable(DEFAULT_ROUTES)
+
+    assert table.match("/api/admin/users")[1] == "/admin/users"
+    assert table.match("/api/auth/login")[1] == "/auth/login"
+    assert table.match("/api/me")[1] == "/auth/me"
+    assert table.match("/other") is None
+
+
+def test_least_outstanding_spreads_in_flight_requests():
+    pool = UpstreamPool("auth", UpstreamPoolConfig(targets=["http://a", "http://b"]))
+
+    first = pool.acquire()
+    second = pool.acquire()
+
+    assert {first.upstream.url, second.upstream.url} == {"http://a", "http://b"}
+
+
+def test_circuit_breaker_opens_then_allows_single_trial():
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=10)
+    breaker.record_failure(now=0)
+    assert breaker.allows(now=1)
+
+    breaker.record_failure(now=1)
+    assert not breaker.allows(now=5)
+
+    assert breaker.allows(now=11)
+    breaker.on_dispatch()
+    assert not breaker.allows(now=11)
+
+    breaker.record_success()
+    assert breaker.allows(now=12)
+
+
+def test_pool_fails_fast_when_every_upstream_is_open():
+    pool = UpstreamPool("auth", UpstreamPoolConfig(targets=["http://a"], balancer="p2c"))
+    upstream = pool.upstreams[0]
+    for _ in range(10):
+        pool.record(Dispatch(upstream, upstream.breaker.generation, trial=False), ok=False)
+
+    with pytest.raises(NoHealthyUpstream):
+        pool.acquire()
+
+
+def _single_target_pool(reset_seconds: float) -> UpstreamPool:
+    pool = UpstreamPool("auth", UpstreamPoolConfig(targets=["http://a"]))
+    pool.upstreams[0].breaker = CircuitBreaker(failure_threshold=1, reset_seconds=reset_seconds)
+    return pool
+
+
+def test_only_the_trial_request_frees_the_half_open_slot():
+    pool = _single_target_pool(reset_seconds=0)
+    slow = pool.acquire()
+    failed = pool.acquire()
+    pool.record(failed, ok=False)
+    pool.release(failed)
+
+    trial = pool.acquire()
+    assert trial.trial
+    # A request dispatched before the breaker opened finishes while the trial is still in flight.
+    pool.record(slow, ok=True)
+    pool.release(slow)
+
+    assert pool.upstreams[0].breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(NoHealthyUpstream):
+        pool.acquire()
+
+    pool.record(trial, ok=True)
+    pool.release(trial)
+    assert pool.upstreams[0].breaker.state == CircuitBreaker.CLOSED
+
+
+def test_reports_from_before_the_breaker_opened_are_ignored():
+    pool = _single_target_pool(reset_seconds=60)
+    slow_success = pool.acquire()
+    slow_failure = pool.acquire()
+    failed = pool.acquire()
+    pool.record(failed, ok=False)
+
+    pool.record(slow_success, ok=True)
+    assert pool.upstreams[0].breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(NoHealthyUpstream):
+        pool.acquire()
+
+    opened_at = pool.upstreams[0].breaker.opened_at
+    pool.record(slow_failure, ok=False)
+    assert pool.upstreams[0].breaker.opened_at == opened_at
+
+
+@pytest.mark.asyncio
+async def test_health_checks_keep_running_after_an_unexpected_error(monkeypatch):
+    monkeypatch.setattr(settings, "health_check_interval_seconds", 0)
+    rounds = []
+
+    class FlakyPool:
+        async def check_health(self, client) -> None:
+            rounds.append(client)
+            if len(rounds) == 1:
+                raise RuntimeError("probe bug")
+
+    async def third_round() -> None:
+        while len(rounds) < 3:
+            await asyncio.sleep(0)
+
+    task = asyncio.create_task(run_health_checks({"auth": FlakyPool()}, None))
+    try:
+        await asyncio.wait_for(third_round(), 1)
+    finally:
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
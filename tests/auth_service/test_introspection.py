@@ -0,0 +1,71 @@
+import fakeredis
+import jwt
+import pytest
+
+from services.auth_service.app.models import User
+from services.auth_service.app.security import create_access_token, create_refresh_token
+from services.auth_service.app.services.introspection import TokenIntrospector
+from services.auth_service.app.services.revocation import RevocationPublisher
+from services.auth_service.app.services.user_cache import UserSnapshotCache
+
+
+@pytest.fixture
+def redis():
+    return fakeredis.FakeAsyncRedis(decode_responses=True)
+
+
+@pytest.fixture
+def introspector(redis):
+    user_cache = UserSnapshotCache(redis, max_size=100, ttl_seconds=30, redis_ttl_seconds=300)
+    return TokenIntrospector(RevocationPublisher(redis, access_token_seconds=900), user_cache, max_size=100)
+
+
+@pytest.mark.asyncio
+async def test_introspect_checks_signature_revocation_and_user_status(session_factory, introspector):
+    async with session_factory() as db:
+        active = User(email="a@example.com", password_hash="x")
+        disabled = User(email="b@example.com", password_hash="x", is_active=False)
+        db.add_all([active, disabled])
+        await db.commit()
+
+        good = create_access_token(active.id, "user")
+        revoked = create_access_token(active.id, "user")
+        claims = jwt.decode(revoked, options={"verify_signature": False})
+        await introspector.revocations.revoke_jti(claims["jti"], claims["exp"])
+        forged = good.rsplit(".", 1)[0] + ".c2lnbmF0dXJl"
+
+        results = await introspector.introspect(
+            db,
+            [
+                good,
+                revoked,
+                create_access_token(disabled.id, "user"),
+                create_access_token("missing-user", "user"),
+                create_refresh_token(active.id, "user"),
+                forged,
+                "not-a-jwt",
+            ],
+        )
+
+    assert results[0]["active"] and results[0]["sub"] == active.id and results[0]["role"] == "user"
+    assert [result["active"] for result in results[1:]] == [False] * 6
+    assert results[1] == {"active": False}
+
+
+@pytest.mark.asyncio
+async def test_introspect_caches_verified_claims_per_jti(session_factory, introspector):
+    async with session_factory() as db:
+        user = User(email="a@example.com", password_hash="x")
+        db.add(user)
+        await db.commit()
+        token = create_access_token(user.id, "user")
+
+        await introspector.introspect(db, [token])
+        results = await introspector.introspect(db, [token, token])
+        assert introspector.misses == 1
+        assert [result["active"] for result in results] == [True, True]
+
+        # Revocation still wins over a cached signature check.
+        await introspector.revocations.revoke_users(user.id)
+        assert await introspector.introspect(db, [token]) == [{"active": False}]
+        assert jwt.decode(token, options={"verify_signature": False})["jti"] in introspector._revoked
@@ -0,0 +1,35 @@
+import jwt
+import pytest
+
+from services.auth_service.app.keys import KeyRing, SigningKey, generate_private_key
+from services.gateway.app.jwks import JWKSCache
+from services.gateway.app.security import TokenVerifier, VerifiedTokenCache
+
+
+def _ring(algorithm: str, *kids: str, active: str) -> KeyRing:
+    keys = [SigningKey(kid, algorithm, generate_private_key(algorithm)) for kid in kids]
+    return KeyRing(algorithm, keys=keys, active_kid=active)
+
+
+@pytest.mark.parametrize("algorithm", ["RS256", "EdDSA"])
+def test_key_ring_signs_with_kid_and_publishes_public_keys(algorithm):
+    ring = _ring(algorithm, "k1", active="k1")
+    token = ring.sign({"sub": "user-1", "type": "access", "exp": 4102444800})
+
+    assert jwt.get_unverified_header(token)["kid"] == "k1"
+    assert ring.decode(token)["sub"] == "user-1"
+    assert "d" not in ring.jwks()["keys"][0]
+
+
+def test_gateway_verifies_tokens_from_both_keys_during_rotation():
+    old_ring = _ring("RS256", "old", active="old")
+    new_ring = KeyRing("RS256", keys=[*old_ring.keys.values(), *_ring("RS256", "new", active="new").keys.values()], active_kid="new")
+    jwks = JWKSCache("http://auth/.well-known/jwks.json", refresh_interval_seconds=300)
+    jwks.load(new_ring.jwks())
+    verifier = TokenVerifier("unused", "RS256", VerifiedTokenCache(10, 300), jwks)
+    claims = {"sub": "user-1", "type": "access", "exp": 4102444800}
+
+    assert verifier.verify(old_ring.sign(claims))["sub"] == "user-1"
+    assert verifier.verify(new_ring.sign(claims))["sub"] == "user-1"
+    with pytest.raises(jwt.InvalidTokenError):
+        verifier.verify(_ring("RS256", "rogue", active="rogue").sign(claims))
@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, select
+
+from services.auth_service.app.models import AuditEvent, RefreshToken
+from services.auth_service.app.services.maintenance import enforce_audit_retention, purge_refresh_tokens
+
+
+NOW = datetime(2024, 6, 1)
+
+
+@pytest.mark.asyncio
+async def test_purge_refresh_tokens_deletes_expired_and_old_revoked_rows(session_factory):
+    async with session_factory() as db:
+        db.add_all(
+            [RefreshToken(user_id="u", token_jti=f"expired-{n}", expires_at=NOW - timedelta(days=1)) for n in range(5)]
+            + [
+                RefreshToken(user_id="u", token_jti="old-revoked", expires_at=NOW + timedelta(days=1), revoked=True, revoked_at=NOW - timedelta(days=2)),
+                RefreshToken(user_id="u", token_jti="fresh-revoked", expires_at=NOW + timedelta(days=1), revoked=True, revoked_at=NOW),
+                # Issued days ago but rotated a minute ago: must stay so a replay is still seen as reuse.
+                RefreshToken(
+                    user_id="u",
+                    token_jti="old-recently-revoked",
+                    expires_at=NOW + timedelta(days=5),
+                    revoked=True,
+                    created_at=NOW - timedelta(days=2),
+                    revoked_at=NOW - timedelta(minutes=1),
+                ),
+                RefreshToken(user_id="u", token_jti="active", expires_at=NOW + timedelta(days=1)),
+            ]
+        )
+        await db.commit()
+
+    report = await purge_refresh_tokens(session_factory, NOW, batch_size=2, max_batches=10, revoked_retention=timedelta(hours=24))
+
+    async with session_factory() as db:
+        remaining = set((await db.scalars(select(RefreshToken.token_jti))).all())
+    assert report.rows == 6
+    assert report.batches == 4
+    assert remaining == {"fresh-revoked", "old-recently-revoked", "active"}
+
+
+@pytest.mark.asyncio
+async def test_audit_retention_stops_at_max_batches(session_factory):
+    async with session_factory() as db:
+        db.add_all([AuditEvent(action="login", detail="", created_at=NOW - timedelta(days=400)) for _ in range(6)])
+        db.add(AuditEvent(action="login", detail="", created_at=NOW))
+        await db.commit()
+
+    report = await enforce_audit_retention(session_factory, NOW, timedelta(days=180), batch_size=2, max_batches=2)
+
+    async with session_factory() as db:
+        remaining = await db.scalar(select(func.count()).select_from(AuditEvent))
+    assert report.rows == 4
+    assert remaining == 3
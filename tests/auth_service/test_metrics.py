@@ -0,0 +1,36 @@
+import httpx
+from fastapi.testclient import TestClient
+
+from services.auth_service.app.main import app as auth_app
+from services.auth_service.app.security import create_access_token
+from services.gateway.app.main import app as gateway_app
+
+
+def test_auth_metrics_expose_route_templates_and_pool_stats():
+    client = TestClient(auth_app)
+    client.get("/health")
+
+    body = client.get("/metrics").text
+
+    assert 'auth_http_request_duration_seconds_count{method="GET",route="/health",status="200"}' in body
+    assert "auth_user_cache_requests_total" in body
+    assert "auth_password_hash_pending" in body
+
+
+def test_gateway_metrics_label_upstream_calls_by_route_prefix():
+    async def upstream(request: httpx.Request) -> httpx.Response:
+        async def body():
+            yield b"{}"
+
+        return httpx.Response(200, headers={"content-type": "application/json"}, content=body())
+
+    token = create_access_token("user-1", role="user")
+    with TestClient(gateway_app) as client:
+        gateway_app.state.http_client = httpx.AsyncClient(transport=httpx.MockTransport(upstream))
+        client.get("/api/auth/me", headers={"Authorization": f"Bearer {token}"})
+        body = client.get("/metrics").text
+
+    assert 'gateway_http_request_duration_seconds_count{method="GET",route="/api/auth/",status="200"}' in body
+    assert 'gateway_upstream_response_seconds_count{status="200",upstream="auth"}' in body
+    assert 'gateway_token_cache_requests_total{result="miss"}' in body
+    assert 'gateway_upstream_available{target="http://auth_service:8000",upstream="auth"} 1.0' in body
@@ -0,0 +1,102 @@
+import pytest
+from sqlalchemy import inspect, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from services.auth_service.app.db import Base
+from services.auth_service.app.migrations import LATEST_VERSION, current_version, migrate
+
+
+@pytest.mark.asyncio
+async def test_migrate_applies_pending_versions_once():
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.connect() as conn:
+        assert await current_version(conn) == 0
+
+    assert await migrate(engine) == list(range(1, LATEST_VERSION + 1))
+    assert await migrate(engine) == []
+
+    async with engine.connect() as conn:
+        assert await current_version(conn) == LATEST_VERSION
+        tables = await conn.run_sync(lambda sync_conn: inspect(sync_conn).get_table_names())
+    assert {"users", "audit_events", "schema_migrations"} <= set(tables)
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_baseline_adopts_a_schema_created_before_versioning():
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    assert await migrate(engine) == list(range(1, LATEST_VERSION + 1))
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_revoked_at_is_added_and_backfilled_on_existing_databases():
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.execute(
+            text(
+                "CREATE TABLE refresh_tokens (id VARCHAR(36) PRIMARY KEY, user_id VARCHAR(36), token_jti VARCHAR(64), "
+                "family_id VARCHAR(64), expires_at DATETIME, revoked BOOLEAN, created_at DATETIME)"
+            )
+        )
+        await conn.execute(text("INSERT INTO refresh_tokens (id, token_jti, revoked) VALUES ('1', 'a', 1), ('2', 'b', 0)"))
+
+    await migrate(engine)
+
+    async with engine.connect() as conn:
+        rows = dict((await conn.execute(text("SELECT token_jti, revoked_at FROM refresh_tokens"))).all())
+    assert rows["a"] is not None and rows["b"] is None
+    await engine.dispose()
+
+
+BASELINE_SCHEMA = [
+    "CREATE TABLE users (id VARCHAR(36) PRIMARY KEY, email VARCHAR(255) NOT NULL, password_hash VARCHAR(255) NOT NULL, "
+    "role VARCHAR(32) NOT NULL, is_active BOOLEAN NOT NULL, created_at DATETIME NOT NULL)",
+    "CREATE UNIQUE INDEX ix_users_email ON users (email)",
+    "CREATE INDEX ix_users_role ON users (role)",
+    "CREATE TABLE refresh_tokens (id VARCHAR(36) PRIMARY KEY, "
+    "user_id VARCHAR(36) NOT NULL REFERENCES users (id) ON DELETE CASCADE, token_jti VARCHAR(64) NOT NULL, "
+    "expires_at DATETIME NOT NULL, revoked BOOLEAN NOT NULL, created_at DATETIME NOT NULL)",
+    "CREATE INDEX ix_refresh_tokens_user_id ON refresh_tokens (user_id)",
+    "CREATE UNIQUE INDEX ix_refresh_tokens_token_jti ON refresh_tokens (token_jti)",
+    "CREATE TABLE audit_events (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id VARCHAR(36), action VARCHAR(100) NOT NULL, "
+    "detail TEXT, ip_address VARCHAR(64), created_at DATETIME NOT NULL)",
+    "CREATE INDEX ix_audit_events_user_id ON audit_events (user_id)",
+    "CREATE INDEX ix_audit_events_action ON audit_events (action)",
+    "CREATE INDEX ix_audit_events_created_at ON audit_events (created_at)",
+]
+
+
+@pytest.mark.asyncio
+async def test_upgrading_the_baseline_schema_matches_the_models():
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        for statement in BASELINE_SCHEMA:
+            await conn.execute(text(statement))
+
+    assert await migrate(engine) == list(range(1, LATEST_VERSION + 1))
+
+    def schema(sync_conn):
+        inspector = inspect(sync_conn)
+        return {
+            table: (
+                {column["name"] for column in inspector.get_columns(table)},
+                {index["name"] for index in inspector.get_indexes(table)},
+            )
+            for table in ("users", "refresh_tokens", "audit_events")
+        }
+
+    async with engine.connect() as conn:
+        upgraded = await conn.run_sync(schema)
+    fresh_engine = create_async_engine("sqlite+aiosqlite://")
+    async with fresh_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        fresh = await conn.run_sync(schema)
+    assert upgraded == fresh
+    assert "ix_audit_events_user_created" in upgraded["audit_events"][1]
+    assert "ix_audit_events_user_id" not in upgraded["audit_events"][1]
+    await engine.dispose()
+    await fresh_engine.dispose()
@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+
+from services.auth_service.app.models import AuditEvent
+from services.auth_service.app.services.user_cache import UserSnapshot
+
+
+BASE = datetime(2024, 5, 1, 12, 0)
+
+
+@pytest.fixture
+def current_user() -> UserSnapshot:
+    return UserSnapshot("user-1", "a@example.com", "user", True, BASE)
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def events(session_factory):
+    async with session_factory() as db:
+        db.add_all(
+            [
+                AuditEvent(
+                    user_id="user-1" if i % 4 else "user-2",
+                    action="refresh" if i % 2 else "login_success",
+                    detail=f"event {i}",
+                    # Pairs share a timestamp, so paging has to break ties on id.
+                    created_at=BASE + timedelta(minutes=i // 2),
+                )
+                for i in range(10)
+            ]
+        )
+        await db.commit()
+
+
+async def _ids(client: AsyncClient, **params) -> list[list[int]]:
+    pages, cursor = [], None
+    while True:
+        response = await client.get("/auth/audit", params={**params, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        body = response.json()
+        assert {event["user_id"] for event in body["items"]} <= {"user-1"}
+        assert all("detail" not in event for event in body["items"])
+        pages.append([event["id"] for event in body["items"]])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.asyncio
+async def test_my_audit_returns_only_the_callers_events_newest_first(client):
+    (page,) = await _ids(client)
+
+    assert page == [10, 8, 7, 6, 4, 3, 2]
+
+
+@pytest.mark.asyncio
+async def test_my_audit_cursor_pages_without_gaps_or_repeats(client):
+    pages = await _ids(client, limit=2)
+
+    assert [len(page) for page in pages] == [2, 2, 2, 1]
+    assert [event_id for page in pages for event_id in page] == [10, 8, 7, 6, 4, 3, 2]
+
+
+@pytest.mark.asyncio
+async def test_my_audit_filters_by_action(client):
+    (page,) = await _ids(client, action="login_success")
+
+    assert page == [7, 3]
@@ -0,0 +1,32 @@
+import base64
+import json
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from services.auth_service.app.pagination import decode_cursor, encode_cursor
+
+
+def test_cursor_roundtrip_keeps_timestamp_and_id():
+    created_at = datetime(2024, 5, 1, 12, 30, 15, 123456)
+
+    assert decode_cursor(encode_cursor(created_at, 42)) == (created_at, 42)
+    assert decode_cursor(encode_cursor(created_at, "user-1")) == (created_at, "user-1")
+
+
+def test_malformed_cursor_is_a_client_error():
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor("not-a-cursor")
+
+    assert exc.value.status_code == 400
+
+
+@pytest.mark.parametrize("position", [["2024-05-01T12:30:15", {"id": 1}], ["2024-05-01T12:30:15", "42"], [1, 42]])
+def test_cursor_with_wrong_types_is_a_client_error(position):
+    cursor = base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(cursor, int)
+
+    assert exc.value.status_code == 400
@@ -1,33 +1,138 @@
-import pytest
-
-from services.auth_service.app.rate_limit import RateLimitExceeded, RedisRateLimiter
+import asyncio
 
+import fakeredis
+import pytest
 
-class FakeRedis:
-    def __init__(self):
-        self.store = {}
+from services.auth_service.app.rate_limit import SCRIPTS, RateLimitExceeded, RedisRateLimiter
 
-    async def incr(self, key: str):
-        self.store[key] = self.store.get(key, 0) + 1
-        return self.store[key]
 
-    async def expire(self, key: str, _seconds: int):
-        return True
+@pytest.fixture
+def redis():
+    return fakeredis.FakeAsyncRedis(decode_responses=True)
 
 
 @pytest.mark.asyncio
-async def test_rate_limit_allows_requests_until_limit():
-    limiter = RedisRateLimiter(FakeRedis())
+@pytest.mark.parametrize("algorithm", sorted(SCRIPTS))
+async def test_rate_limit_allows_requests_until_limit(redis, algorithm):
+    limiter = RedisRateLimiter(redis, algorithm)
 
     await limiter.enforce("login:127.0.0.1", limit=2, window_seconds=60)
-    await limiter.enforce("login:127.0.0.1", limit=2, window_seconds=60)
+    result = await limiter.enforce("login:127.0.0.1", limit=2, window_seconds=60)
+
+    assert result.remaining == 0
 
 
 @pytest.mark.asyncio
-async def test_rate_limit_raises_after_limit():
-    limiter = RedisRateLimiter(FakeRedis())
+@pytest.mark.parametrize("algorithm", sorted(SCRIPTS))
+async def test_rate_limit_raises_after_limit(redis, algorithm):
+    limiter = RedisRateLimiter(redis, algorithm)
 
     await limiter.enforce("login:127.0.0.1", limit=1, window_seconds=60)
 
-    with pytest.raises(RateLimitExceeded):
+    with pytest.raises(RateLimitExceeded) as exc:
         await limiter.enforce("login:127.0.0.1", limit=1, window_seconds=60)
+
+    assert exc.value.result.retry_after > 0
+    assert "Retry-After" in exc.value.result.headers()
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_keys_always_carry_a_ttl(redis):
+    limiter = RedisRateLimiter(redis, "sliding_window")
+
+    await limiter.enforce("register:127.0.0.1", limit=5, window_seconds=60)
+
+    assert await redis.pttl("rl:sliding_window:register:127.0.0.1") > 0
+
+
+class FlakyRedis:
+    def __init__(self, redis):
+        self._redis = redis
+        self.down = False
+        self.stalled = False
+
+    def __getattr__(self, name):
+        return getattr(self._redis, name)
+
+    def pipeline(self, transaction=True):
+        if self.down:
+            raise ConnectionError("redis is down")
+        pipe = self._redis.pipeline(transaction=transaction)
+        if self.stalled:
+            pipe.execute = lambda raise_on_error=True: asyncio.Event().wait()
+        return pipe
+
+
+@pytest.mark.asyncio
+async def test_concurrent_checks_share_one_pipeline(redis):
+    limiter = RedisRateLimiter(redis, "sliding_window")
+
+    results = await asyncio.gather(*(limiter.check(f"login:10.0.0.{i}", 5, 60) for i in range(8)))
+
+    assert all(result.allowed for result in results)
+    assert limiter.batches == 1
+
+
+@pytest.mark.asyncio
+async def test_falls_back_locally_while_redis_is_down_and_resyncs(redis):
+    now = [1000.0]
+    flaky = FlakyRedis(redis)
+    limiter = RedisRateLimiter(flaky, "sliding_window", failure_threshold=2, reset_seconds=5, clock=lambda: now[0])
+
+    await limiter.enforce("login:127.0.0.1", limit=3, window_seconds=60)
+    flaky.down = True
+    for _ in range(3):
+        await limiter.enforce("login:127.0.0.1", limit=3, window_seconds=60)
+    assert limiter.degraded
+
+    with pytest.raises(RateLimitExceeded):
+        await limiter.enforce("login:127.0.0.1", limit=3, window_seconds=60)
+
+    flaky.down = False
+    now[0] += 6
+    result = await limiter.check("login:127.0.0.1", limit=3, window_seconds=60)
+    await asyncio.gather(*limiter._tasks)
+
+    assert not limiter.degraded
+    assert result.allowed
+    # Hits admitted during the outage were replayed, so the key is exhausted again.
+    assert await redis.hget("rl:sliding_window:login:127.0.0.1", "c") == "3"
+
+
+@pytest.mark.asyncio
+async def test_a_failed_batch_counts_as_one_failure(redis):
+    flaky = FlakyRedis(redis)
+    limiter = RedisRateLimiter(flaky, "sliding_window", failure_threshold=2)
+    flaky.down = True
+
+    results = await asyncio.gather(*(limiter.check(f"login:10.0.0.{i}", 5, 60) for i in range(8)))
+
+    assert all(result.allowed for result in results)
+    assert limiter.batches == 1
+    assert limiter.failures == 1
+    assert not limiter.degraded
+
+
+@pytest.mark.asyncio
+async def test_cancelled_trial_check_frees_the_trial_slot(redis):
+    now = [1000.0]
+    flaky = FlakyRedis(redis)
+    limiter = RedisRateLimiter(flaky, "sliding_window", timeout_seconds=60, failure_threshold=1, clock=lambda: now[0])
+    flaky.down = True
+    await limiter.check("login:127.0.0.1", 5, 60)
+    assert limiter.degraded
+
+    flaky.down, flaky.stalled = False, True
+    now[0] += 10
+    trial = asyncio.create_task(limiter.check("login:127.0.0.1", 5, 60))
+    await asyncio.sleep(0.01)
+    assert limiter._trial_in_flight
+
+    trial.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await trial
+
+    assert not limiter._trial_in_flight
+    for task in list(limiter._tasks):
+        task.cancel()
+    await asyncio.gather(*limiter._tasks, return_exceptions=True)
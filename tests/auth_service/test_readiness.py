@@ -0,0 +1,83 @@
+import pytest
+import pytest_asyncio
+from redis.asyncio import Redis
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from services.auth_service.app import main, readiness as readiness_module
+from services.auth_service.app.migrations import migrate
+from services.auth_service.app.rate_limit import RedisRateLimiter
+from services.auth_service.app.readiness import Readiness
+
+
+@pytest_asyncio.fixture
+async def engine(monkeypatch):
+    engine = create_async_engine("sqlite+aiosqlite://")
+    monkeypatch.setattr(readiness_module, "get_engine", lambda: engine)
+    yield engine
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def redis_down(monkeypatch):
+    # Nothing listens on port 1, so every command fails with a connection error.
+    redis = Redis(host="127.0.0.1", port=1, socket_connect_timeout=0.2, socket_timeout=0.2)
+    monkeypatch.setattr(readiness_module, "get_redis", lambda: redis)
+    monkeypatch.setattr(readiness_module, "get_rate_limiter", lambda: RedisRateLimiter(redis, "sliding_window"))
+    yield redis
+    await redis.aclose()
+
+
+@pytest.fixture
+def probe(monkeypatch):
+    probe = Readiness()
+    monkeypatch.setattr(main, "readiness", probe)
+    return probe
+
+
+@pytest.mark.asyncio
+async def test_not_ready_before_warm_up(engine, redis_down, probe, client):
+    await migrate(engine)
+
+    response = await client.get("/ready")
+
+    assert response.status_code == 503
+    assert response.json()["checks"]["warmed"] is False
+    assert response.json()["checks"]["database"] is True
+
+
+@pytest.mark.asyncio
+async def test_ready_after_warm_up_while_redis_is_down(engine, redis_down, probe, client):
+    await migrate(engine)
+
+    await probe.warm_up()
+    response = await client.get("/ready")
+
+    assert probe.warmed
+    assert response.status_code == 200
+    assert response.json()["checks"]["redis"] is False
+
+
+@pytest.mark.asyncio
+async def test_not_ready_until_the_schema_is_migrated(engine, redis_down):
+    probe = Readiness()
+
+    await probe.warm_up()
+    ready, checks = await probe.status()
+    assert not ready and checks["warmed"] and not checks["schema"]
+
+    await migrate(engine)
+    ready, checks = await probe.status()
+    assert ready and checks["schema"]
+
+
+@pytest.mark.asyncio
+async def test_not_ready_while_draining(engine, redis_down):
+    await migrate(engine)
+    probe = Readiness()
+    await probe.warm_up()
+    assert (await probe.status())[0]
+
+    probe.draining = True
+
+    ready, checks = await probe.status()
+    assert not ready and checks["draining"]
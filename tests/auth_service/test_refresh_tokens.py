@@ -0,0 +1,113 @@
+import fakeredis
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+
+from services.auth_service.app.models import RefreshToken, User
+from services.auth_service.app.security import issue_refresh_token
+from services.auth_service.app.services.refresh_tokens import (
+    RedisRefreshTokenStore,
+    RotationOutcome,
+    SqlRefreshTokenStore,
+)
+
+
+@pytest.fixture
+def store():
+    return RedisRefreshTokenStore(fakeredis.FakeAsyncRedis(decode_responses=True))
+
+
+@pytest.mark.asyncio
+async def test_redis_store_rotates_once(store):
+    _, first = issue_refresh_token("user-1", "user")
+    _, second = issue_refresh_token("user-1", "user", family_id=first["fam"])
+    await store.add(None, first)
+
+    assert await store.rotate(None, first, second) is RotationOutcome.ROTATED
+    assert await store.redis.pttl(f"rt:{{{first['fam']}}}:{second['jti']}") > 0
+
+
+@pytest.mark.asyncio
+async def test_redis_store_reuse_revokes_whole_family(store):
+    _, first = issue_refresh_token("user-1", "user")
+    _, second = issue_refresh_token("user-1", "user", family_id=first["fam"])
+    _, third = issue_refresh_token("user-1", "user", family_id=first["fam"])
+    await store.add(None, first)
+    await store.rotate(None, first, second)
+
+    assert await store.rotate(None, first, third) is RotationOutcome.REUSED
+    assert await store.rotate(None, second, third) is RotationOutcome.INVALID
+
+
+@pytest.mark.asyncio
+async def test_redis_store_rejects_unknown_and_revoked_tokens(store):
+    _, first = issue_refresh_token("user-1", "user")
+    _, second = issue_refresh_token("user-1", "user", family_id=first["fam"])
+
+    assert await store.rotate(None, first, second) is RotationOutcome.INVALID
+
+    await store.add(None, first)
+    assert await store.revoke(None, first)
+    assert not await store.revoke(None, first)
+
+
+@pytest_asyncio.fixture
+async def db(session_factory):
+    async with session_factory() as session:
+        session.add(User(id="user-1", email="a@example.com", password_hash="x"))
+        await session.commit()
+        yield session
+
+
+async def _rows(db) -> dict[str, RefreshToken]:
+    return {row.token_jti: row for row in await db.scalars(select(RefreshToken).execution_options(populate_existing=True))}
+
+
+@pytest.mark.asyncio
+async def test_sql_store_rotates_once(db):
+    store = SqlRefreshTokenStore()
+    _, first = issue_refresh_token("user-1", "user")
+    _, second = issue_refresh_token("user-1", "user", family_id=first["fam"])
+    await store.add(db, first)
+
+    assert await store.rotate(db, first, second) is RotationOutcome.ROTATED
+
+    rows = await _rows(db)
+    assert rows[first["jti"]].revoked and rows[first["jti"]].revoked_at is not None
+    assert not rows[second["jti"]].revoked
+    assert rows[second["jti"]].family_id == first["fam"]
+
+
+@pytest.mark.asyncio
+async def test_sql_store_reuse_revokes_whole_family(db):
+    store = SqlRefreshTokenStore()
+    _, first = issue_refresh_token("user-1", "user")
+    _, second = issue_refresh_token("user-1", "user", family_id=first["fam"])
+    _, third = issue_refresh_token("user-1", "user", family_id=first["fam"])
+    _, other = issue_refresh_token("user-1", "user")
+    await store.add(db, first)
+    await store.add(db, other)
+    await store.rotate(db, first, second)
+
+    assert await store.rotate(db, first, third) is RotationOutcome.REUSED
+
+    rows = await _rows(db)
+    assert third["jti"] not in rows
+    assert rows[second["jti"]].revoked and rows[second["jti"]].revoked_at is not None
+    assert not rows[other["jti"]].revoked
+    # The stolen token's successor is dead too, so presenting it is reuse as well.
+    assert await store.rotate(db, second, third) is RotationOutcome.REUSED
+
+
+@pytest.mark.asyncio
+async def test_sql_store_rejects_unknown_and_revoked_tokens(db):
+    store = SqlRefreshTokenStore()
+    _, first = issue_refresh_token("user-1", "user")
+    _, second = issue_refresh_token("user-1", "user", family_id=first["fam"])
+
+    assert await store.rotate(db, first, second) is RotationOutcome.INVALID
+
+    await store.add(db, first)
+    assert await store.revoke(db, first)
+    assert not await store.revoke(db, first)
+    assert second["jti"] not in await _rows(db)
@@ -0,0 +1,86 @@
+import time
+
+import fakeredis
+import jwt
+import pytest
+from fastapi import HTTPException
+
+from services.auth_service.app.security import create_access_token
+from services.auth_service.app.services.revocation import RevocationPublisher
+from services.gateway.app.revocation import RevocationList
+from services.gateway.app.security import decode_access_token, revocation_list
+
+
+def _claims(token: str) -> dict:
+    return jwt.decode(token, options={"verify_signature": False})
+
+
+@pytest.mark.asyncio
+async def test_gateway_bootstraps_published_revocations():
+    redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+    publisher = RevocationPublisher(redis, access_token_seconds=900)
+    revoked = _claims(create_access_token("user-1", role="user"))
+    other = _claims(create_access_token("user-2", role="user"))
+    await publisher.revoke_jti(revoked["jti"], revoked["exp"])
+    await publisher.revoke_users("user-3", before=int(time.time()))
+
+    revocations = RevocationList()
+    await revocations.bootstrap(redis)
+
+    now = time.time()
+    assert revocations.is_revoked(revoked, now)
+    assert not revocations.is_revoked(other, now)
+    assert revocations.is_revoked({"jti": "x", "sub": "user-3", "iat": int(now) - 5}, now)
+    assert await publisher.is_revoked(revoked)
+    assert not await publisher.is_revoked(other)
+
+
+def test_user_cutoff_spares_tokens_issued_later_and_is_pruned():
+    revocations = RevocationList(prune_interval_seconds=0)
+    revocations.apply({"kind": "user", "sub": "user-1", "before": 100, "expires": 1000})
+
+    assert revocations.is_revoked({"jti": "a", "sub": "user-1", "iat": 100}, now=200)
+    assert not revocations.is_revoked({"jti": "b", "sub": "user-1", "iat": 101}, now=200)
+
+    revocations.is_revoked({"jti": "c", "sub": "user-2", "iat": 0}, now=1000)
+    assert len(revocations) == 0
+
+
+@pytest.mark.asyncio
+async def test_tokens_issued_in_the_same_second_after_a_revocation_stay_valid():
+    redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+    publisher = RevocationPublisher(redis, access_token_seconds=900)
+    revocations = RevocationList()
+    earlier = _claims(create_access_token("user-1", role="user"))
+    earlier_refresh = {**earlier, "type": "refresh"}
+
+    await publisher.revoke_sessions("user-1")
+    await revocations.bootstrap(redis)
+    later = _claims(create_access_token("user-1", role="user"))
+
+    assert int(later["iat"]) - int(earlier["iat"]) <= 1
+    assert revocations.is_revoked(earlier, time.time())
+    assert await publisher.session_revoked(earlier_refresh)
+    assert not revocations.is_revoked(later, time.time())
+    assert not await publisher.is_revoked(later)
+    assert not await publisher.session_revoked({**later, "type": "refresh"})
+
+
+def test_bulk_user_message_revokes_every_subject():
+    revocations = RevocationList()
+    revocations.apply({"kind": "users", "subs": ["user-1", "user-2"], "before": 100, "expires": 1000})
+
+    assert revocations.is_revoked({"jti": "a", "sub": "user-2", "iat": 50}, now=200)
+    assert not revocations.is_revoked({"jti": "b", "sub": "user-3", "iat": 50}, now=200)
+
+
+def test_gateway_rejects_revoked_token():
+    token = create_access_token("user-9", role="user")
+    claims = _claims(token)
+    decode_access_token(f"Bearer {token}")
+
+    revocation_list.revoke_jti(claims["jti"], claims["exp"])
+
+    with pytest.raises(HTTPException) as exc:
+        decode_access_token(f"Bearer {token}")
+    assert exc.value.detail == "Token revoked"
@@ -1,3 +1,9 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from passlib.hash import pbkdf2_sha256
+
+from services.auth_service.app.hashing import HashPoolSaturated, PasswordHasher
 from services.auth_service.app.security import (
     create_access_token,
     create_refresh_token,
@@ -32,3 +38,24 @@ def test_refresh_token_has_expected_claims():
     assert payload["sub"] == "user-2"
     assert payload["role"] == "user"
     assert payload["type"] == "refresh"
+
+
+@pytest.mark.asyncio
+async def test_password_hasher_upgrades_outdated_hashes():
+    hasher = PasswordHasher(ThreadPoolExecutor(max_workers=1), max_pending=4)
+    outdated = pbkdf2_sha256.using(rounds=1000).hash("super-secret-pass")
+
+    verified, upgraded = await hasher.verify_and_update("super-secret-pass", outdated)
+
+    assert verified
+    assert upgraded is not None and verify_password("super-secret-pass", upgraded)
+    hasher.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_password_hasher_rejects_work_when_saturated():
+    hasher = PasswordHasher(ThreadPoolExecutor(max_workers=1), max_pending=0)
+
+    with pytest.raises(HashPoolSaturated):
+        await hasher.hash("super-secret-pass")
+    hasher.shutdown()
@@ -0,0 +1,176 @@
+import json
+import threading
+
+import fakeredis
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from services.auth_service.app import db as auth_db, tracing as auth_tracing
+from services.auth_service.app.metrics import InstrumentedRedis
+from services.auth_service.app.security import create_access_token
+from services.auth_service.app.tracing import FileSpanExporter, Tracer, parse_traceparent
+from services.gateway.app import tracing as gateway_tracing
+from services.gateway.app.main import _fetch_cacheable, app as gateway_app
+
+
+INCOMING = "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+
+
+def _exported_spans(path) -> list[dict]:
+    return [
+        span
+        for line in path.read_text().splitlines()
+        for resource in json.loads(line)["resourceSpans"]
+        for scope in resource["scopeSpans"]
+        for span in scope["spans"]
+    ]
+
+
+def test_parse_traceparent_rejects_malformed_and_zero_ids():
+    context = parse_traceparent(INCOMING)
+
+    assert context.trace_id == "4bf92f3577b34da6a3ce929d0e0e4736"
+    assert context.sampled
+    assert parse_traceparent("00-" + "0" * 32 + "-00f067aa0ba902b7-01") is None
+    assert parse_traceparent("garbage") is None
+
+
+def test_nested_spans_share_trace_and_unsampled_traces_are_dropped(tmp_path):
+    path = tmp_path / "spans.jsonl"
+    tracer = Tracer(FileSpanExporter(str(path), "auth"), sample_ratio=1.0)
+    with tracer.span("outer") as outer:
+        with tracer.span("inner") as inner:
+            pass
+    with tracer.span("unsampled", parent=parse_traceparent(INCOMING[:-2] + "00")):
+        pass
+    tracer.shutdown()
+
+    spans = {span["name"]: span for span in _exported_spans(path)}
+    assert set(spans) == {"outer", "inner"}
+    assert spans["inner"]["parentSpanId"] == outer.context.span_id
+    assert inner.context.trace_id == outer.context.trace_id
+
+
+def test_spans_are_exported_off_the_calling_thread():
+    exported = []
+
+    class RecordingExporter:
+        def export(self, spans):
+            exported.append((threading.current_thread(), [span.name for span in spans]))
+
+    tracer = Tracer(RecordingExporter(), sample_ratio=1.0, batch_size=2)
+    for name in ("a", "b", "c"):
+        with tracer.span(name):
+            pass
+    tracer.shutdown()
+
+    assert [names for _, names in exported] == [["a", "b"], ["c"]]
+    assert all(thread is not threading.current_thread() for thread, _ in exported)
+
+
+@pytest.fixture
+def auth_spans(tmp_path, monkeypatch):
+    path = tmp_path / "auth.jsonl"
+    monkeypatch.setattr(auth_tracing.tracer, "exporter", FileSpanExporter(str(path), "auth"))
+
+    def spans() -> dict[str, list[dict]]:
+        auth_tracing.tracer.shutdown()
+        by_name: dict[str, list[dict]] = {}
+        for span in _exported_spans(path):
+            by_name.setdefault(span["name"], []).append(span)
+        return by_name
+
+    return spans
+
+
+@pytest.mark.asyncio
+async def test_auth_database_statements_are_traced_under_the_request(auth_spans):
+    engine = create_async_engine("sqlite+aiosqlite://")
+    auth_db._trace_statements(engine)
+    tracer = auth_tracing.tracer
+
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+        with tracer.span("request", parent=parse_traceparent(INCOMING)) as request:
+            await conn.execute(text("SELECT 2"))
+            with pytest.raises(OperationalError):
+                await conn.execute(text("SELECT * FROM missing"))
+    await engine.dispose()
+
+    queries = auth_spans()["db.query"]
+    assert len(queries) == 2
+    assert {span["parentSpanId"] for span in queries} == {request.context.span_id}
+    assert [span["status"]["code"] for span in queries] == [0, 2]
+    assert "missing" in queries[1]["status"]["message"]
+
+
+@pytest.mark.asyncio
+async def test_auth_redis_commands_and_pipelines_are_traced_under_the_request(auth_spans):
+    redis = InstrumentedRedis(connection_pool=fakeredis.FakeAsyncRedis(decode_responses=True).connection_pool)
+    tracer = auth_tracing.tracer
+
+    await redis.get("untraced")
+    with tracer.span("request", parent=parse_traceparent(INCOMING)) as request:
+        await redis.set("key", "value")
+        pipe = redis.pipeline(transaction=False)
+        pipe.get("key")
+        pipe.incr("counter")
+        assert await pipe.execute() == ["value", 1]
+
+    spans = auth_spans()
+    assert "redis GET" not in spans
+    for name in ("redis SET", "redis PIPELINE"):
+        (span,) = spans[name]
+        assert span["parentSpanId"] == request.context.span_id
+        assert span["traceId"] == request.context.trace_id
+
+
+def test_gateway_continues_incoming_trace_into_upstream(tmp_path, monkeypatch):
+    path = tmp_path / "gateway.jsonl"
+    monkeypatch.setattr(gateway_tracing.tracer, "exporter", FileSpanExporter(str(path), "gateway"))
+    forwarded = []
+
+    async def upstream(request: httpx.Request) -> httpx.Response:
+        forwarded.append(request.headers["traceparent"])
+
+        async def body():
+            yield b"{}"
+
+        return httpx.Response(200, content=body())
+
+    token = create_access_token("user-1", role="user")
+    with TestClient(gateway_app) as client:
+        gateway_app.state.http_client = httpx.AsyncClient(transport=httpx.MockTransport(upstream))
+        client.get("/api/auth/me", headers={"Authorization": f"Bearer {token}", "traceparent": INCOMING})
+
+    spans = {span["name"]: span for span in _exported_spans(path)}
+    upstream_context = parse_traceparent(forwarded[0])
+    assert upstream_context.trace_id == "4bf92f3577b34da6a3ce929d0e0e4736"
+    assert spans["GET /api/auth/"]["parentSpanId"] == "00f067aa0ba902b7"
+    assert spans["proxy auth"]["spanId"] == upstream_context.span_id
+    assert spans["proxy auth"]["parentSpanId"] == spans["GET /api/auth/"]["spanId"]
+
+
+@pytest.mark.asyncio
+async def test_gateway_ends_the_upstream_span_when_a_cacheable_fetch_fails(tmp_path, monkeypatch):
+    path = tmp_path / "gateway.jsonl"
+    monkeypatch.setattr(gateway_tracing.tracer, "exporter", FileSpanExporter(str(path), "gateway"))
+
+    def upstream(request: httpx.Request) -> httpx.Response:
+        raise RuntimeError("not a transport error")
+
+    monkeypatch.setattr(gateway_app.state, "http_client", httpx.AsyncClient(transport=httpx.MockTransport(upstream)), raising=False)
+    request = Request({"type": "http", "method": "GET", "path": "/api/me", "headers": [], "query_string": b"", "app": gateway_app})
+    route, target_path = gateway_app.state.route_table.match("/api/me")
+    with gateway_tracing.tracer.activate(parse_traceparent(INCOMING)), pytest.raises(RuntimeError):
+        await _fetch_cacheable(request, route, target_path, 30.0, None)
+    gateway_tracing.tracer.shutdown()
+
+    (span,) = [span for span in _exported_spans(path) if span["name"] == "proxy auth"]
+    assert span["status"]["code"] == 2
+    assert all(upstream.outstanding == 0 for pool in gateway_app.state.upstream_pools.values() for upstream in pool.upstreams)
@@ -0,0 +1,74 @@
+from datetime import datetime
+
+import fakeredis
+import pytest
+
+from services.auth_service.app.services.user_cache import INVALIDATION_CHANNEL, UserSnapshot, UserSnapshotCache
+
+
+@pytest.fixture
+def redis():
+    return fakeredis.FakeAsyncRedis(decode_responses=True)
+
+
+def _cache(redis) -> UserSnapshotCache:
+    return UserSnapshotCache(redis, max_size=10, ttl_seconds=30, redis_ttl_seconds=300)
+
+
+def _snapshot(**overrides) -> UserSnapshot:
+    data = {"id": "user-1", "email": "a@example.com", "role": "user", "is_active": True, "created_at": datetime(2024, 1, 1)}
+    data.update(overrides)
+    return UserSnapshot(**data)
+
+
+@pytest.mark.asyncio
+async def test_user_cache_shares_snapshots_through_redis(redis):
+    writer = _cache(redis)
+    reader = _cache(redis)
+
+    await writer.put(_snapshot(role="admin"))
+
+    assert await reader.get("user-1") == _snapshot(role="admin")
+
+
+@pytest.mark.asyncio
+async def test_user_cache_invalidate_drops_local_and_shared_entries(redis):
+    cache = _cache(redis)
+    await cache.put(_snapshot())
+    pubsub = redis.pubsub(ignore_subscribe_messages=True)
+    await pubsub.subscribe(INVALIDATION_CHANNEL)
+
+    await cache.invalidate("user-1")
+
+    assert await cache.get("user-1") is None
+    messages = [await pubsub.get_message(ignore_subscribe_messages=True, timeout=0.1) for _ in range(3)]
+    assert [message["data"] for message in messages if message] == ['["user-1"]']
+    await pubsub.aclose()
+
+
+@pytest.mark.asyncio
+async def test_fill_overtaken_by_an_invalidation_is_not_cached(redis):
+    filler = _cache(redis)
+    admin = _cache(redis)
+
+    # The filler reads the old row, then an admin changes the user and invalidates before the fill lands.
+    version = await filler.version(["user-1"])
+    await admin.invalidate("user-1")
+    await filler.put(_snapshot(is_active=True), version)
+
+    assert await _cache(redis).get("user-1") is None
+
+    await filler.put(_snapshot(is_active=False), await filler.version(["user-1"]))
+    assert (await _cache(redis).get("user-1")).is_active is False
+
+
+@pytest.mark.asyncio
+async def test_invalidation_received_during_a_fill_skips_the_local_copy(redis):
+    cache = _cache(redis)
+
+    version = await cache.version(["user-1"])
+    # Another instance's invalidation reaches this one through the listener.
+    cache.evict_local("user-1")
+    await cache.put(_snapshot(), version)
+
+    assert cache._get_local("user-1", 0) is None
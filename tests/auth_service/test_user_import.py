@@ -0,0 +1,128 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import select
+
+from services.auth_service.app import deps
+from services.auth_service.app.config import settings
+from services.auth_service.app.hashing import PasswordHasher
+from services.auth_service.app.main import app
+from services.auth_service.app.models import AuditEvent, User
+from services.auth_service.app.security import verify_password
+from services.auth_service.app.services.user_import import UserImport
+
+
+async def _stream(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+@pytest.mark.asyncio
+async def test_import_reports_each_row_and_skips_existing_users(session_factory):
+    hasher = PasswordHasher(ThreadPoolExecutor(max_workers=2), max_pending=4)
+    async with session_factory() as db:
+        db.add(User(email="taken@example.com", password_hash="x"))
+        await db.commit()
+
+        job = UserImport(db, hasher, chunk_size=2, hash_concurrency=2)
+        # The split inside line 3 checks that records spanning chunk boundaries are reassembled.
+        await job.run(
+            _stream(
+                b'{"email": "a@example.com", "password": "password123"}\n{"email": "TAKEN@example.com", "pas',
+                b'sword": "password123"}\n{"email": "A@example.com", "password": "password123"}\n',
+                b'{"email": "b@example.com", "password": "short"}\n[1]\n{"email": "c@example.com", "password": "password123", "role": "admin"}',
+            ),
+            "ndjson",
+            max_rows=100,
+            max_line_bytes=1024,
+        )
+
+        users = {user.email: user for user in await db.scalars(select(User))}
+
+    report = job.report()
+    assert [row["status"] for row in report["results"]] == ["created", "exists", "duplicate", "invalid", "invalid", "created"]
+    assert (report["created"], report["exists"], report["duplicate"], report["invalid"]) == (2, 1, 1, 2)
+    assert users["c@example.com"].role == "admin"
+    assert verify_password("password123", users["a@example.com"].password_hash)
+    hasher.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_csv_import_stops_at_max_rows(session_factory):
+    hasher = PasswordHasher(ThreadPoolExecutor(max_workers=1), max_pending=4)
+    async with session_factory() as db:
+        job = UserImport(db, hasher, chunk_size=10, hash_concurrency=1)
+        await job.run(
+            _stream(b"email,password,is_active\nx@example.com,password123,false\ny@example.com,password123,true\n"),
+            "csv",
+            max_rows=1,
+            max_line_bytes=1024,
+        )
+        user = await db.scalar(select(User))
+
+    assert job.report()["truncated"]
+    assert (user.email, user.is_active) == ("x@example.com", False)
+    hasher.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_over_long_lines_are_reported_without_being_buffered(session_factory):
+    hasher = PasswordHasher(ThreadPoolExecutor(max_workers=1), max_pending=4)
+    async with session_factory() as db:
+        job = UserImport(db, hasher, chunk_size=10, hash_concurrency=1)
+        await job.run(
+            _stream(
+                b'{"email": "a@example.com", "password": "password123"}\n{"email": "',
+                b"x" * 200,
+                b"x" * 200,
+                b'@example.com"}\n{"email": "b@example.com", "password": "password123"}\n',
+                b"y" * 300,
+            ),
+            "ndjson",
+            max_rows=100,
+            max_line_bytes=128,
+        )
+
+    report = job.report()
+    assert [(row["line"], row["status"]) for row in report["results"]] == [
+        (1, "created"),
+        (2, "invalid"),
+        (3, "created"),
+        (4, "invalid"),
+    ]
+    assert report["results"][1]["error"] == "Line longer than 128 bytes"
+    hasher.shutdown()
+
+
+class FailingHasher(PasswordHasher):
+    def __init__(self):
+        super().__init__(ThreadPoolExecutor(max_workers=1), max_pending=4)
+        self.calls = 0
+
+    async def hash_many(self, passwords: list[str], concurrency: int) -> list[str]:
+        self.calls += 1
+        if self.calls > 1:
+            raise RuntimeError("hasher crashed")
+        return await super().hash_many(passwords, concurrency)
+
+
+@pytest.mark.asyncio
+async def test_import_is_audited_with_partial_counts_when_it_fails(session_factory, app_overrides, monkeypatch):
+    hasher = FailingHasher()
+    monkeypatch.setattr(settings, "user_import_chunk_size", 1)
+    app_overrides[deps.get_password_hasher] = lambda: hasher
+    body = b'{"email": "a@example.com", "password": "password123"}\n{"email": "b@example.com", "password": "password123"}\n'
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app, raise_app_exceptions=False), base_url="http://auth") as client:
+            response = await client.post("/admin/users/import", content=body)
+    finally:
+        hasher.shutdown()
+
+    assert response.status_code == 500
+    async with session_factory() as db:
+        (event,) = await db.scalars(select(AuditEvent).where(AuditEvent.action == "users_bulk_import"))
+        emails = list(await db.scalars(select(User.email)))
+    assert event.detail == "Bulk import (ndjson): created=1, exists=0, duplicate=0, invalid=0 (aborted)"
+    assert event.user_id == "admin-1"
+    assert emails == ["a@example.com"]